@@ -2343,12 +2343,16 @@ export default function StatisticsPage() {
                             <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
                                 <div className="bg-white p-6 rounded-lg shadow">
                                     <h3 className="text-lg font-semibold mb-4">Temps de Réponse</h3>
-                                    <p className="text-3xl font-bold text-blue-600">150ms</p>
-                                    <p className="text-sm text-gray-500">Moyenne</p>
+                                    <p className="text-3xl font-bold text-blue-600">
+                                        {systemData.average_response_time != null ? `${systemData.average_response_time}ms` : '—'}
+                                    </p>
+                                    <p className="text-sm text-gray-500">Moyenne sur 24h</p>
                                 </div>
                                 <div className="bg-white p-6 rounded-lg shadow">
                                     <h3 className="text-lg font-semibold mb-4">Disponibilité</h3>
-                                    <p className="text-3xl font-bold text-green-600">{systemData.uptime_percentage}%</p>
+                                    <p className="text-3xl font-bold text-green-600">
+                                        {systemData.uptime_percentage != null ? `${systemData.uptime_percentage}%` : '—'}
+                                    </p>
                                     <p className="text-sm text-gray-500">Uptime</p>
                                 </div>
                                 <div className="bg-white p-6 rounded-lg shadow">
@@ -2357,15 +2361,15 @@ export default function StatisticsPage() {
                                         <div className="space-y-2">
                                             <div className="flex justify-between">
                                                 <span className="text-sm">Global</span>
-                                                <span className="text-sm font-bold text-green-600">{systemData.system_health.overall_health}%</span>
+                                                <span className="text-sm font-bold text-green-600">{systemData.system_health.overall_health != null ? `${systemData.system_health.overall_health}%` : '—'}</span>
                                             </div>
                                             <div className="flex justify-between">
                                                 <span className="text-sm">Base de données</span>
-                                                <span className="text-sm font-bold text-blue-600">{systemData.system_health.database_health}%</span>
+                                                <span className="text-sm font-bold text-blue-600">{systemData.system_health.database_health != null ? `${systemData.system_health.database_health}%` : '—'}</span>
                                             </div>
                                             <div className="flex justify-between">
                                                 <span className="text-sm">API</span>
-                                                <span className="text-sm font-bold text-purple-600">{systemData.system_health.api_health}%</span>
+                                                <span className="text-sm font-bold text-purple-600">{systemData.system_health.api_health != null ? `${systemData.system_health.api_health}%` : '—'}</span>
                                             </div>
                                         </div>
                                     ) : (
@@ -125,7 +125,9 @@ export default function NewTicketPage() {
                     console.error('Detailed error response:', response.data)
 
                     // Handle validation errors
-                    if (response.data.type && Array.isArray(response.data.type)) {
+                    if (response.data.attachments && Array.isArray(response.data.attachments)) {
+                        errorMessage = `Pièces jointes refusées: ${response.data.attachments.join(', ')}`
+                    } else if (response.data.type && Array.isArray(response.data.type)) {
                         errorMessage = `Erreur de validation: ${response.data.type.join(', ')}`
                     } else if (response.data.detail) {
                         errorMessage = response.data.detail
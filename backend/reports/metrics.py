@@ -0,0 +1,370 @@
+"""
+Runtime metrics collected in-process.
+
+QueryInstrumentationMiddleware (ticketing_system/middleware.py) reports every
+request here: latency, status, SQL time and query count, keyed by URL name.
+
+- A ring of METRICS_WINDOW_SECONDS windows (the last METRICS_RING_SIZE) holds
+  bucketed latency / SQL-time histograms per endpoint, from which p50/p95/p99
+  are estimated, plus error counts and a process CPU / RSS sample.
+- Cumulative histograms and counters since process start back the Prometheus
+  exposition served at /metrics (one target per worker process).
+- A background thread closes each window and, with METRICS_PERSIST, stores it
+  as a MetricWindow row (one per worker and window, kept METRICS_RETENTION_DAYS
+  days) and adds it to the worker's MetricRollup row for that hour.
+  get_system_statistics aggregates the hourly rollups across workers and reads
+  single windows only where an hour is too coarse (the last hour, the edge of
+  a rolling period).
+
+Histograms use fixed buckets, so windows from several workers and periods merge
+exactly and memory does not grow with traffic.
+"""
+
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; one more bucket counts everything slower
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+UNMATCHED = '<unmatched>'
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, counts=None, total=0.0):
+        self.counts = list(counts) if counts else [0] * (len(BUCKETS_MS) + 1)
+        self.sum = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value_ms):
+        self.counts[bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.sum += value_ms
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+        return self
+
+    def percentile(self, pct):
+        """Estimate, interpolating linearly inside the bucket (None without data)"""
+        total = self.count
+        if not total:
+            return None
+        rank = pct / 100 * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(BUCKETS_MS):
+                    return float(BUCKETS_MS[-1])
+                lower = BUCKETS_MS[index - 1] if index else 0
+                return lower + (BUCKETS_MS[index] - lower) * (rank - seen) / count
+            seen += count
+        return float(BUCKETS_MS[-1])
+
+    def mean(self):
+        total = self.count
+        return self.sum / total if total else None
+
+    def apdex(self, threshold_ms, errors=0):
+        """
+        Share of satisfied (<= threshold) plus half the tolerating (<= 4x)
+        observations, errors counting as frustrated. None without data.
+        """
+        total = self.count
+        if not total:
+            return None
+        satisfied = sum(self.counts[:bisect_left(BUCKETS_MS, threshold_ms) + 1])
+        tolerating = sum(self.counts[:bisect_left(BUCKETS_MS, threshold_ms * 4) + 1]) - satisfied
+        return max(0.0, (satisfied + tolerating / 2 - errors) / total)
+
+
+class EndpointStats:
+    __slots__ = ('latency', 'db', 'errors', 'queries')
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db = Histogram()
+        self.errors = 0
+        self.queries = 0
+
+    def record(self, duration_ms, sql_ms, queries, error):
+        self.latency.observe(duration_ms)
+        self.db.observe(sql_ms)
+        self.queries += queries
+        self.errors += int(error)
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.db.merge(other.db)
+        self.errors += other.errors
+        self.queries += other.queries
+        return self
+
+    def as_row(self):
+        return {
+            'latency': self.latency.counts,
+            'latency_sum': round(self.latency.sum, 3),
+            'db': self.db.counts,
+            'db_sum': round(self.db.sum, 3),
+            'errors': self.errors,
+            'queries': self.queries,
+        }
+
+    @classmethod
+    def from_row(cls, row):
+        stats = cls()
+        stats.latency = Histogram(row['latency'], row['latency_sum'])
+        stats.db = Histogram(row['db'], row['db_sum'])
+        stats.errors = row['errors']
+        stats.queries = row['queries']
+        return stats
+
+
+class Window:
+    def __init__(self, started_at):
+        self.started_at = started_at  # epoch seconds, aligned on METRICS_WINDOW_SECONDS
+        self.endpoints = {}
+        self.cpu_percent = None
+        self.rss_bytes = None
+
+    def totals(self):
+        totals = EndpointStats()
+        for stats in self.endpoints.values():
+            totals.merge(stats)
+        return totals
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'[:64]
+        self._current = None
+        self._ring = deque()
+        self._unsaved = []
+        # Since process start, for Prometheus: (view, method) -> EndpointStats / {status class: count}
+        self._cumulative = {}
+        self._statuses = {}
+        self._last_cpu = (time.monotonic(), time.process_time())
+        self._sampler = None
+        self._store_lock = threading.Lock()  # rollups are read, merged and written back
+
+    # Recording
+
+    def observe_request(self, view, method, status_code, duration, sql_time, queries):
+        """Record one request (``duration`` and ``sql_time`` in seconds)"""
+        view = view or UNMATCHED
+        duration_ms, sql_ms = duration * 1000, sql_time * 1000
+        error = status_code >= 500
+        key = (view, method)
+        status_class = f'{status_code // 100}xx'
+        with self._lock:
+            window = self._window(time.time())
+            window.endpoints.setdefault(view, EndpointStats()).record(duration_ms, sql_ms, queries, error)
+            self._cumulative.setdefault(key, EndpointStats()).record(duration_ms, sql_ms, queries, error)
+            statuses = self._statuses.setdefault(key, {})
+            statuses[status_class] = statuses.get(status_class, 0) + 1
+        self._ensure_sampler()
+
+    def _window(self, now):
+        """Current window, closing the previous one (caller holds the lock)"""
+        size = settings.METRICS_WINDOW_SECONDS
+        started_at = int(now // size * size)
+        if self._current is None or self._current.started_at != started_at:
+            if self._current is not None:
+                self._close(self._current)
+            self._current = Window(started_at)
+        return self._current
+
+    def _close(self, window):
+        window.cpu_percent, window.rss_bytes = self._sample_process()
+        self._ring.append(window)
+        while len(self._ring) > settings.METRICS_RING_SIZE:
+            self._ring.popleft()
+        self._unsaved.append(window)
+
+    def _sample_process(self):
+        """(CPU % of one core since the previous sample, resident set size in bytes)"""
+        wall, cpu = time.monotonic(), time.process_time()
+        last_wall, last_cpu = self._last_cpu
+        self._last_cpu = (wall, cpu)
+        cpu_percent = round((cpu - last_cpu) / (wall - last_wall) * 100, 1) if wall > last_wall else None
+        return cpu_percent, process_rss()
+
+    # Background closing / persistence
+
+    def _ensure_sampler(self):
+        if self._sampler is not None:
+            return
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run_sampler, name='metrics-sampler', daemon=True)
+                self._sampler.start()
+                atexit.register(self.flush)
+
+    def _run_sampler(self):
+        size = settings.METRICS_WINDOW_SECONDS
+        while True:
+            # Just past the end of the current window
+            time.sleep(size - time.time() % size + 0.5)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Persisting metrics failed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Close the current window if it is over (even without traffic, so idle
+        time still counts as up) and store the closed ones. Returns the number stored.
+        """
+        with self._lock:
+            self._window(time.time())
+            unsaved, self._unsaved = self._unsaved, []
+        if not unsaved or not settings.METRICS_PERSIST:
+            return 0
+
+        from .models import MetricRollup, MetricWindow
+        try:
+            with self._store_lock, transaction.atomic():
+                MetricWindow.objects.bulk_create([
+                    MetricWindow(
+                        started_at=datetime.fromtimestamp(window.started_at, dt_timezone.utc),
+                        duration=settings.METRICS_WINDOW_SECONDS,
+                        worker=self.worker,
+                        cpu_percent=window.cpu_percent,
+                        rss_bytes=window.rss_bytes,
+                        endpoints={view: stats.as_row() for view, stats in window.endpoints.items()},
+                    )
+                    for window in unsaved
+                ])
+                self._roll_up(unsaved)
+        except Exception:
+            with self._lock:
+                self._unsaved[:0] = unsaved[-settings.METRICS_RING_SIZE:]
+            raise
+        cutoff = datetime.now(dt_timezone.utc) - timedelta(days=settings.METRICS_RETENTION_DAYS)
+        MetricWindow.objects.filter(started_at__lt=cutoff).delete()
+        MetricRollup.objects.filter(hour__lt=cutoff).delete()
+        return len(unsaved)
+
+    def _roll_up(self, windows):
+        """Add the windows to this worker's hourly MetricRollup rows"""
+        from .models import MetricRollup
+
+        hours = {}
+        for window in windows:
+            stats_by_view = hours.setdefault(window.started_at - window.started_at % 3600, {})
+            for view, stats in window.endpoints.items():
+                stats_by_view.setdefault(view, EndpointStats()).merge(stats)
+        for hour, stats_by_view in hours.items():
+            rollup, created = MetricRollup.objects.select_for_update().get_or_create(
+                worker=self.worker, hour=datetime.fromtimestamp(hour, dt_timezone.utc),
+            )
+            for view, row in rollup.endpoints.items():
+                stats_by_view.setdefault(view, EndpointStats()).merge(EndpointStats.from_row(row))
+            rollup.endpoints = {view: stats.as_row() for view, stats in stats_by_view.items()}
+            rollup.save(update_fields=['endpoints'])
+
+    # Reading
+
+    def current_window(self):
+        """Endpoint stats of the window in progress in this process (not stored yet)"""
+        with self._lock:
+            window = self._window(time.time())
+            return window.started_at, {view: EndpointStats().merge(stats) for view, stats in window.endpoints.items()}
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            cumulative = {key: EndpointStats().merge(stats) for key, stats in self._cumulative.items()}
+            statuses = {key: dict(value) for key, value in self._statuses.items()}
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by URL name',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (view, method), stats in sorted(cumulative.items()):
+            labels = f'view="{_escape(view)}",method="{method}"'
+            seen = 0
+            for bound, count in zip(BUCKETS_MS, stats.latency.counts):
+                seen += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound / 1000}"}} {seen}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.latency.count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {stats.latency.sum / 1000}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {stats.latency.count}')
+
+        lines += ['# HELP http_requests_total Requests by URL name and status class', '# TYPE http_requests_total counter']
+        for (view, method), counts in sorted(statuses.items()):
+            for status_class, count in sorted(counts.items()):
+                lines.append(
+                    f'http_requests_total{{view="{_escape(view)}",method="{method}",status="{status_class}"}} {count}'
+                )
+
+        lines += ['# HELP db_queries_total SQL queries run by requests', '# TYPE db_queries_total counter']
+        for (view, method), stats in sorted(cumulative.items()):
+            lines.append(f'db_queries_total{{view="{_escape(view)}",method="{method}"}} {stats.queries}')
+        lines += [
+            '# HELP db_query_duration_seconds_total Time spent in SQL by requests',
+            '# TYPE db_query_duration_seconds_total counter',
+        ]
+        for (view, method), stats in sorted(cumulative.items()):
+            lines.append(f'db_query_duration_seconds_total{{view="{_escape(view)}",method="{method}"}} {stats.db.sum / 1000}')
+
+        rss = process_rss()
+        lines += [
+            '# HELP process_cpu_seconds_total User and system CPU time of this worker',
+            '# TYPE process_cpu_seconds_total counter',
+            f'process_cpu_seconds_total {time.process_time()}',
+            '# HELP process_start_time_seconds Start time of this worker (epoch seconds)',
+            '# TYPE process_start_time_seconds gauge',
+            f'process_start_time_seconds {self.started_at}',
+        ]
+        if rss is not None:
+            lines += [
+                '# HELP process_resident_memory_bytes Resident memory of this worker',
+                '# TYPE process_resident_memory_bytes gauge',
+                f'process_resident_memory_bytes {rss}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def process_rss():
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def total_memory():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.PositiveIntegerField(help_text='Durée de la fenêtre en secondes')),
+                ('worker', models.CharField(help_text='hôte:pid du processus', max_length=64)),
+                ('cpu_percent', models.FloatField(blank=True, help_text="CPU du processus en % d'un cœur", null=True)),
+                ('rss_bytes', models.BigIntegerField(blank=True, help_text='Mémoire résidente du processus', null=True)),
+                ('endpoints', models.JSONField(default=dict, help_text="Statistiques par nom d'URL")),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['started_at'], name='reports_met_started_ace42a_idx')],
+            },
+        ),
+    ]
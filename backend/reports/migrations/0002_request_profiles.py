@@ -0,0 +1,41 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_metric_windows'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('trigger', models.CharField(choices=[('requested', 'Demandé'), ('slow', 'Requête lente')], max_length=10)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('view', models.CharField(blank=True, help_text="Nom d'URL de la vue", max_length=200)),
+                ('params', models.JSONField(default=dict, help_text='Paramètres de la requête (filtres)')),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('sql_ms', models.FloatField(blank=True, null=True)),
+                ('queries', models.PositiveIntegerField(blank=True, null=True)),
+                ('sampled_from_ms', models.FloatField(help_text="Début de l'échantillonnage après le début de la requête")),
+                ('interval_ms', models.FloatField(help_text="Intervalle d'échantillonnage")),
+                ('samples', models.PositiveIntegerField()),
+                ('stacks', models.TextField(help_text='Piles au format folded')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='reports_req_created_d6f815_idx')],
+            },
+        ),
+    ]
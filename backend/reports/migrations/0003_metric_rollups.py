@@ -0,0 +1,58 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:32
+
+from django.db import migrations, models
+
+
+def add_row(total, row):
+    """Sum of two reports.metrics.EndpointStats rows (copied: migrations do not import live code)"""
+    if total is None:
+        return dict(row)
+    return {
+        'latency': [a + b for a, b in zip(total['latency'], row['latency'])],
+        'latency_sum': round(total['latency_sum'] + row['latency_sum'], 3),
+        'db': [a + b for a, b in zip(total['db'], row['db'])],
+        'db_sum': round(total['db_sum'] + row['db_sum'], 3),
+        'errors': total['errors'] + row['errors'],
+        'queries': total['queries'] + row['queries'],
+    }
+
+
+def roll_up_windows(apps, schema_editor):
+    MetricWindow = apps.get_model('reports', 'MetricWindow')
+    MetricRollup = apps.get_model('reports', 'MetricRollup')
+    rollups = {}
+    windows = MetricWindow.objects.values_list('worker', 'started_at', 'endpoints')
+    for worker, started_at, endpoints in windows.iterator(chunk_size=2000):
+        hour = started_at.replace(minute=0, second=0, microsecond=0)
+        stats_by_view = rollups.setdefault((worker, hour), {})
+        for view, row in endpoints.items():
+            stats_by_view[view] = add_row(stats_by_view.get(view), row)
+    MetricRollup.objects.bulk_create(
+        [MetricRollup(worker=worker, hour=hour, endpoints=endpoints) for (worker, hour), endpoints in rollups.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_request_profiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text="Début de l'heure (UTC)")),
+                ('worker', models.CharField(help_text='hôte:pid du processus', max_length=64)),
+                ('endpoints', models.JSONField(default=dict, help_text="Statistiques par nom d'URL")),
+            ],
+            options={
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='reports_met_hour_29dc5b_idx')],
+                'unique_together': {('worker', 'hour')},
+            },
+        ),
+        migrations.RunPython(roll_up_windows, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,86 @@
 from django.db import models
 
-# Create your models here.
+
+class MetricWindow(models.Model):
+    """
+    Métriques d'exécution d'un processus sur une fenêtre de temps
+    (voir reports/metrics.py) : histogrammes de latence et de temps SQL par
+    endpoint, échantillon CPU / mémoire. Une ligne par processus et par fenêtre.
+    """
+    started_at = models.DateTimeField()
+    duration = models.PositiveIntegerField(help_text="Durée de la fenêtre en secondes")
+    worker = models.CharField(max_length=64, help_text="hôte:pid du processus")
+    cpu_percent = models.FloatField(null=True, blank=True, help_text="CPU du processus en % d'un cœur")
+    rss_bytes = models.BigIntegerField(null=True, blank=True, help_text="Mémoire résidente du processus")
+    endpoints = models.JSONField(default=dict, help_text="Statistiques par nom d'URL")
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at']),  # For period aggregation and retention
+        ]
+
+    def __str__(self):
+        return f"{self.worker} @ {self.started_at}"
+
+
+class MetricRollup(models.Model):
+    """
+    Somme horaire des fenêtres d'un processus (voir reports/metrics.py), mise à
+    jour à chaque enregistrement de fenêtres : les statistiques par heure et par
+    jour se lisent ici plutôt qu'en relisant chaque fenêtre. Une ligne par
+    processus et par heure, pour que chaque processus ne modifie que les siennes.
+    """
+    hour = models.DateTimeField(help_text="Début de l'heure (UTC)")
+    worker = models.CharField(max_length=64, help_text="hôte:pid du processus")
+    endpoints = models.JSONField(default=dict, help_text="Statistiques par nom d'URL")
+
+    class Meta:
+        ordering = ['-hour']
+        unique_together = [('worker', 'hour')]
+        indexes = [
+            models.Index(fields=['hour']),  # For period aggregation and retention
+        ]
+
+    def __str__(self):
+        return f"{self.worker} @ {self.hour}"
+
+
+class RequestProfile(models.Model):
+    """
+    Profil d'échantillonnage d'une requête (voir reports/profiling.py), demandé
+    par un administrateur ou capturé parce que la requête était lente. Les piles
+    sont au format « folded » (une pile par ligne, suivie du nombre
+    d'échantillons), lu tel quel par flamegraph.pl, speedscope ou inferno.
+    """
+    TRIGGER_CHOICES = [
+        ('requested', 'Demandé'),
+        ('slow', 'Requête lente'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    requested_by = models.ForeignKey(
+        'users.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles'
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True, help_text="Nom d'URL de la vue")
+    params = models.JSONField(default=dict, help_text="Paramètres de la requête (filtres)")
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    sql_ms = models.FloatField(null=True, blank=True)
+    queries = models.PositiveIntegerField(null=True, blank=True)
+    sampled_from_ms = models.FloatField(help_text="Début de l'échantillonnage après le début de la requête")
+    interval_ms = models.FloatField(help_text="Intervalle d'échantillonnage")
+    samples = models.PositiveIntegerField()
+    stacks = models.TextField(help_text="Piles au format folded")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),  # For the list and retention
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,146 @@
+"""
+Sampling profiler for single requests.
+
+ProfilingMiddleware (ticketing_system/middleware.py) registers requests here;
+one background thread reads the registered threads' Python stacks every
+PROFILING_INTERVAL_MS and counts identical stacks. A request is sampled:
+
+- from its start, when an admin asks for it with ``?profile=1`` or an
+  ``X-Profile-Request: 1`` header;
+- from PROFILING_SLOW_MS on, for any request, when that threshold is set. Fast
+  requests then cost a registration and nothing else, and the profile of a
+  slow one covers the time past the threshold, where the unexpected time goes.
+
+Profiles are stored as RequestProfile rows in the folded format of flame
+graphs, with the request's query parameters (the report filters), and the
+newest PROFILING_KEEP are kept. Sampling needs no tracing hook, so the request
+runs at its normal speed, and stacks are read between bytecodes: SQL time
+shows up as the frames waiting on the database driver.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Capture:
+    """Stacks sampled from one request's thread"""
+
+    def __init__(self, thread_id, root_code, delay):
+        self.thread_id = thread_id
+        self.root_code = root_code  # frames above this one (server, middleware) are left out
+        self.started = time.monotonic()
+        self.sample_from = self.started + delay
+        self.stacks = Counter()
+        self.samples = 0
+
+    def add(self, frame):
+        stack = []
+        while frame is not None and frame.f_code is not self.root_code:
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        """One ``frame;frame;frame count`` line per distinct stack, most sampled first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+_labels = {}
+
+
+def _label(code):
+    """``function (file:line)``, paths relative to the project or to site-packages"""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(str(settings.BASE_DIR)):
+            filename = os.path.relpath(filename, settings.BASE_DIR)
+        elif 'site-packages' in filename:
+            filename = filename.rsplit('site-packages' + os.sep, 1)[-1]
+        label = _labels[code] = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+    return label
+
+
+class StackSampler:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._captures = {}
+        self._thread = None
+
+    def start(self, root_code, delay=0.0):
+        """Sample the calling thread, from ``delay`` seconds on, until stop()"""
+        capture = Capture(threading.get_ident(), root_code, delay)
+        with self._condition:
+            self._captures[capture.thread_id] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return capture
+
+    def stop(self, capture):
+        with self._condition:
+            self._captures.pop(capture.thread_id, None)
+
+    def _run(self):
+        interval = settings.PROFILING_INTERVAL_MS / 1000
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = [capture for capture in self._captures.values() if capture.sample_from <= now]
+                if not due:
+                    # Sleep until the first registered request reaches its threshold
+                    next_due = min((capture.sample_from for capture in self._captures.values()), default=None)
+                    self._condition.wait(None if next_due is None else max(next_due - now, interval))
+                    continue
+                frames = sys._current_frames()
+                for capture in due:
+                    if capture.samples < settings.PROFILING_MAX_SAMPLES:
+                        capture.add(frames.get(capture.thread_id))
+                del frames
+            time.sleep(interval)
+
+
+sampler = StackSampler()
+
+
+def save_profile(capture, request, response, trigger, user=None):
+    """Store the capture as a RequestProfile and drop the ones past PROFILING_KEEP"""
+    from .models import RequestProfile
+
+    metrics = getattr(request, '_request_metrics', None)
+    match = request.resolver_match
+    params = {key: values if len(values) > 1 else values[0] for key, values in request.GET.lists()}
+    params.pop('profile', None)
+    profile = RequestProfile.objects.create(
+        trigger=trigger,
+        requested_by=user,
+        method=request.method,
+        path=request.path[:500],
+        view=(match.view_name if match else '')[:200],
+        params=params,
+        status_code=response.status_code,
+        duration_ms=round((time.monotonic() - capture.started) * 1000, 1),
+        sql_ms=round(metrics.sql_time * 1000, 1) if metrics else None,
+        queries=metrics.queries if metrics else None,
+        sampled_from_ms=round((capture.sample_from - capture.started) * 1000, 1),
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        samples=capture.samples,
+        stacks=capture.folded(),
+    )
+    stale = list(
+        RequestProfile.objects.order_by('-created_at').values_list('id', flat=True)[settings.PROFILING_KEEP:]
+    )
+    if stale:
+        RequestProfile.objects.filter(id__in=stale).delete()
+    return profile
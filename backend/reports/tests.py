@@ -1,3 +1,147 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from tickets.seeding import SEED_PASSWORD
+from tickets.testing import LARGE_DATASET, SMALL_DATASET, QueryBudgetTestCase
+from users.models import User
+
+from .metrics import EndpointStats, MetricsRegistry, Window
+from .models import MetricRollup, MetricWindow
+
+
+class ReportEndpointQueryBudgets:
+    """Maximum queries per request for every URL of reports/urls.py, as the statistics page calls them"""
+
+    def assertReportBudget(self, budget, path, **params):
+        self.assertMaxQueries(budget, 'get', f'/api/reports/{path}/', self.admin, data=dict(time_filter='month', **params))
+
+    def test_ticket_analytics(self):
+        self.assertReportBudget(17, 'ticket-analytics')
+
+    def test_user_performance(self):
+        self.assertReportBudget(4, 'user-performance')
+
+    def test_employee_statistics(self):
+        self.assertReportBudget(9, 'employee-statistics')
+
+    def test_technician_statistics(self):
+        self.assertReportBudget(3, 'technician-statistics')
+
+    def test_group_statistics(self):
+        # Tickets per group, then the closed tickets timed per group in one scan
+        self.assertReportBudget(2, 'group-statistics')
+
+    def test_sla_tracking(self):
+        self.assertReportBudget(2, 'sla-tracking')
+
+    def test_quality_metrics(self):
+        self.assertReportBudget(3, 'quality-metrics')
+
+    def test_recurring_problems(self):
+        self.assertReportBudget(1, 'recurring-problems')
+
+    def test_performance_statistics(self):
+        self.assertReportBudget(4, 'performance-statistics')
+
+    def test_trends_statistics(self):
+        self.assertReportBudget(5, 'trends-statistics')
+
+    def test_workload_statistics(self):
+        # Technicians, active tickets per technician (3 grouped queries), the last 7 days grouped by day
+        self.assertReportBudget(5, 'workload-statistics')
+
+    def test_system_statistics(self):
+        # Hourly rollups, the windows of the last hour and period edges, the uptime count
+        self.assertReportBudget(3, 'system-statistics')
+
+    def test_employees_list(self):
+        self.assertReportBudget(1, 'employees-list')
+
+    def test_technicians_list(self):
+        self.assertReportBudget(1, 'technicians-list')
+
+    def test_storage_usage(self):
+        self.assertReportBudget(11, 'storage-usage')
+
+    def test_request_profiles(self):
+        response = self.client.post('/api/auth/login/', {'email': self.admin.email, 'password': SEED_PASSWORD})
+        profiled = self.client.get(
+            '/api/reports/ticket-analytics/', {'time_filter': 'month', 'profile': '1'},
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access']}",
+        )
+        self.assertIn('X-Profile-Id', profiled.headers)
+        self.assertMaxQueries(1, 'get', '/api/reports/profiles/', self.admin)
+        self.assertMaxQueries(0, 'get', '/api/reports/profiles/', self.admin, status=(400,), data={'limit': 'all'})
+        download = self.assertMaxQueries(1, 'get', f"/api/reports/profiles/{profiled.headers['X-Profile-Id']}/", self.admin)
+        self.assertEqual(download['Content-Type'], 'text/plain; charset=utf-8')
+
+
+class SmallDatasetReportQueryTests(ReportEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = SMALL_DATASET
+
+
+class LargeDatasetReportQueryTests(ReportEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = LARGE_DATASET
+
+
+@override_settings(METRICS_PERSIST=False)
+class PrometheusMetricsAccessTests(TestCase):
+    @override_settings(DEBUG=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=[])
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_allowed_scraper_address(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.6').status_code, 403)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='scrape-secret', METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+
+@override_settings(METRICS_PERSIST=True, METRICS_WINDOW_SECONDS=60)
+class MetricRollupTests(APITestCase):
+    def store_windows(self, registry, *started_at):
+        """Store a window per start, each with two 'ticket_list' requests (10 and 30 ms, 3 queries each)"""
+        for start in started_at:
+            window = Window(start)
+            stats = window.endpoints['ticket_list'] = EndpointStats()
+            stats.record(10, 2, 3, False)
+            stats.record(30, 4, 3, False)
+            registry._unsaved.append(window)
+        registry.flush()
+
+    def test_windows_are_added_to_the_hourly_rollup(self):
+        registry = MetricsRegistry()
+        hour = int(time.time() // 3600 * 3600)
+        self.store_windows(registry, hour, hour + 60)
+        self.store_windows(registry, hour + 120)
+        self.store_windows(registry, hour - 60)
+
+        self.assertEqual(MetricWindow.objects.count(), 4)
+        rollups = {rollup.hour.timestamp(): rollup.endpoints['ticket_list'] for rollup in MetricRollup.objects.all()}
+        self.assertEqual(sorted(rollups), [hour - 3600, hour])
+        self.assertEqual(sum(rollups[hour]['latency']), 6)
+        self.assertEqual(rollups[hour]['queries'], 18)
+        self.assertEqual(rollups[hour]['latency_sum'], 120)
+
+    def test_system_statistics_read_the_rollups(self):
+        registry = MetricsRegistry()
+        hour = int(time.time() // 3600 * 3600)
+        self.store_windows(registry, hour - 7200, hour - 3600, hour)
+        admin = User.objects.create_user('metrics.admin@example.com', password=SEED_PASSWORD, role='admin')
+        self.client.force_authenticate(user=admin)
+
+        with mock.patch('reports.metrics.metrics', registry):
+            data = self.client.get('/api/reports/system-statistics/').data
+        self.assertEqual(sum(row['requests'] for row in data['response_times']), 6)
+        self.assertEqual(data['database']['queries'], 18)
+        ticket_list = next(row for row in data['endpoints'] if row['view'] == 'ticket_list')
+        self.assertEqual(ticket_list['requests'], 6)
@@ -16,4 +16,7 @@ urlpatterns = [
     path('system-statistics/', views.get_system_statistics, name='system_statistics'),
     path('employees-list/', views.get_employees_list, name='employees_list'),
     path('technicians-list/', views.get_technicians_list, name='technicians_list'),
+    path('storage-usage/', views.get_storage_usage, name='storage_usage'),
+    path('profiles/', views.get_request_profiles, name='request_profiles'),
+    path('profiles/<int:profile_id>/', views.download_request_profile, name='download_request_profile'),
 ]
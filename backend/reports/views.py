@@ -2,12 +2,116 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count, Q, Avg, F, Case, When, IntegerField
+from django.conf import settings
+from django.db.models import Count, Q, Avg, F, Case, When, IntegerField, Max, Min, OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
 from django.utils import timezone
 from datetime import datetime, timedelta
 from tickets.models import Ticket, TicketEvent
 from users.models import User
 import json
+import time
+from collections import Counter, defaultdict
+
+
+def _scan(queryset, *fields):
+    """
+    Iterate a potentially large ticket scan loading only ``fields``.
+    On PostgreSQL the rows are streamed from a server-side cursor in
+    REPORT_SCAN_CHUNK_SIZE batches instead of being fetched all at once.
+    """
+    return queryset.only(*fields).iterator(chunk_size=settings.REPORT_SCAN_CHUNK_SIZE)
+
+
+def _limit_param(request, default, maximum):
+    """``?limit=`` clamped to 1..maximum, or None when it is not an integer"""
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        return None
+    return max(1, min(limit, maximum))
+
+
+def _count_per_date(queryset, since=None):
+    """
+    ``Counter`` of tickets created per date (from ``since``), in one grouped
+    query: charts sum these days into their periods instead of counting each
+    period with its own query.
+    """
+    if since is not None:
+        queryset = queryset.filter(created_at__date__gte=since)
+    return Counter(dict(queryset.order_by().values_list('created_at__date').annotate(Count('pk', distinct=True))))
+
+
+def _mean_hours(queryset, until):
+    """
+    Mean hours from creation to ``until`` (a field, or an annotation such as
+    _first_event_at) over the tickets of ``queryset``, in one scan instead of
+    exists() + scan + count(). Tickets without an ``until`` time count but add
+    nothing; 0 without tickets.
+    """
+    fields = ['created_at'] if until in queryset.query.annotations else ['created_at', until]
+    total_hours = 0
+    tickets = 0
+    for ticket in _scan(queryset, *fields):
+        ended = getattr(ticket, until)
+        if ended and ticket.created_at:
+            total_hours += (ended - ticket.created_at).total_seconds() / 3600
+        tickets += 1
+    return total_hours / tickets if tickets else 0
+
+
+def _closure_stats(closed_tickets):
+    """
+    ``(mean resolution hours, % closed within the priority's SLA target, count)``
+    of closed tickets, in one scan. Tickets without closed_at count against the
+    SLA rate but stay out of the mean.
+    """
+    sla_targets = {'P1': 2, 'P2': 4, 'P3': 8, 'P4': 24}
+    total_hours = 0
+    timed = 0
+    on_time = 0
+    tickets = 0
+    for ticket in _scan(closed_tickets, 'created_at', 'closed_at', 'priority'):
+        tickets += 1
+        if ticket.closed_at and ticket.created_at:
+            resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
+            total_hours += resolution_hours
+            timed += 1
+            if resolution_hours <= sla_targets.get(ticket.priority, 24):
+                on_time += 1
+    return (total_hours / timed if timed else 0), (on_time / tickets * 100 if tickets else 0), tickets
+
+
+def _count_per_period(queryset, field, periods):
+    """
+    Tickets whose ``field`` falls in each ``(start, end)`` period of
+    ``periods`` (both included), counted in one aggregate instead of one
+    query per period.
+    """
+    counts = queryset.aggregate(**{
+        f'period_{i}': Count('pk', distinct=True, filter=Q(**{f'{field}__gte': start, f'{field}__lte': end}))
+        for i, (start, end) in enumerate(periods)
+    })
+    return [counts[f'period_{i}'] for i in range(len(periods))]
+
+
+def _sum_dates(counts, start, end):
+    """Sum of ``counts`` (see _count_per_date) from ``start`` to ``end``, both included"""
+    return sum(count for date, count in counts.items() if start <= date <= end)
+
+
+def _first_event_at(*event_types):
+    """
+    Annotation: when the ticket first got one of ``event_types``, looked up
+    in the same query as the tickets instead of one query per ticket.
+    """
+    return Subquery(
+        TicketEvent.objects.filter(ticket=OuterRef('pk'), event_type__in=event_types)
+        .order_by('created_at').values('created_at')[:1]
+    )
 
 
 @api_view(['GET'])
@@ -105,41 +209,33 @@ def get_ticket_analytics(request):
         closed_at__isnull=False,
         created_at__isnull=False
     )
-    avg_resolution_time = 0
-    if closed_tickets_with_times.exists():
-        total_hours = 0
-        for ticket in closed_tickets_with_times:
-            resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-            total_hours += resolution_hours
-        avg_resolution_time = total_hours / closed_tickets_with_times.count()
+    avg_resolution_time = _mean_hours(closed_tickets_with_times, 'closed_at')
     
     # First response time (time to first technician response)
     avg_first_response_time = 0
     # Use only tickets that have been claimed by a technician
     claimed_tickets = queryset.filter(claimed_by__isnull=False)
     
-    if claimed_tickets.exists():
-        total_frt_hours = 0
-        valid_tickets = 0
-        
-        for ticket in claimed_tickets:
-            # Try to get exact claim time from events first
-            claim_event = ticket.events.filter(event_type='claimed').order_by('created_at').first()
-            
-            if claim_event:
-                # Use exact claim time from event
-                frt_hours = (claim_event.created_at - ticket.created_at).total_seconds() / 3600
-                total_frt_hours += frt_hours
-                valid_tickets += 1
-            elif ticket.claimed_by:
-                # Fallback: estimate based on when ticket was first claimed
-                # This is an approximation since we don't have exact claim time
-                frt_hours = (ticket.updated_at - ticket.created_at).total_seconds() / 3600
-                total_frt_hours += frt_hours
-                valid_tickets += 1
-        
-        if valid_tickets > 0:
-            avg_first_response_time = total_frt_hours / valid_tickets
+    total_frt_hours = 0
+    valid_tickets = 0
+    
+    claimed_tickets = claimed_tickets.annotate(claimed_at=_first_event_at('claimed'))
+    for ticket in _scan(claimed_tickets, 'created_at', 'updated_at'):
+        # Try to get exact claim time from events first
+        if ticket.claimed_at:
+            # Use exact claim time from event
+            frt_hours = (ticket.claimed_at - ticket.created_at).total_seconds() / 3600
+            total_frt_hours += frt_hours
+            valid_tickets += 1
+        else:
+            # Fallback: estimate based on when ticket was first claimed
+            # This is an approximation since we don't have exact claim time
+            frt_hours = (ticket.updated_at - ticket.created_at).total_seconds() / 3600
+            total_frt_hours += frt_hours
+            valid_tickets += 1
+    
+    if valid_tickets > 0:
+        avg_first_response_time = total_frt_hours / valid_tickets
     
     # Status distribution with French labels
     status_distribution_raw = list(queryset.values('status').annotate(count=Count('id')).order_by('status'))
@@ -178,93 +274,90 @@ def get_ticket_analytics(request):
         '14+_days': 0
     }
     
-    # If no closed tickets exist, return empty distribution
-    if not resolution_queryset.exists():
-        pass  # Keep empty distribution
-    else:
-        # Apply closure date filters based on time_filter
-        if time_filter == 'month':
-            # Show tickets closed in the current month
-            now = timezone.now()
-            month_start = datetime(now.year, now.month, 1)
-            if now.month == 12:
-                month_end = datetime(now.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = datetime(now.year, now.month + 1, 1) - timedelta(days=1)
-            
-            resolution_queryset = resolution_queryset.filter(closed_at__date__range=[month_start.date(), month_end.date()])
-            
-        elif time_filter == 'year':
-            # Show tickets closed in the current year
-            now = timezone.now()
-            year_start = datetime(now.year, 1, 1)
-            year_end = datetime(now.year, 12, 31)
-            
-            resolution_queryset = resolution_queryset.filter(closed_at__date__range=[year_start.date(), year_end.date()])
-        elif time_filter == 'quarter':
-            # Show tickets closed in the current quarter
-            now = timezone.now()
-            current_quarter = (now.month - 1) // 3 + 1
-            quarter_start_month = (current_quarter - 1) * 3 + 1
-            quarter_end_month = quarter_start_month + 2
-            
-            quarter_start = datetime(now.year, quarter_start_month, 1)
-            if quarter_end_month == 12:
-                quarter_end = datetime(now.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                quarter_end = datetime(now.year, quarter_end_month + 1, 1) - timedelta(days=1)
-            resolution_queryset = resolution_queryset.filter(closed_at__date__range=[quarter_start.date(), quarter_end.date()])
-        elif time_filter == 'custom' and start_date and end_date:
-            # Show tickets closed within the custom date range
-            resolution_queryset = resolution_queryset.filter(closed_at__date__range=[start_date, end_date])
-        # For 'today', 'week', and 'all' - show all closed tickets (ignore time filter)
-    
-        # Apply other filters (priority, type, user, technician, group) to resolution queryset
-        if priority_filter in ['P1', 'P2', 'P3', 'P4']:
-            resolution_queryset = resolution_queryset.filter(priority=priority_filter)
+    # Apply closure date filters based on time_filter
+    if time_filter == 'month':
+        # Show tickets closed in the current month
+        now = timezone.now()
+        month_start = datetime(now.year, now.month, 1)
+        if now.month == 12:
+            month_end = datetime(now.year + 1, 1, 1) - timedelta(days=1)
+        else:
+            month_end = datetime(now.year, now.month + 1, 1) - timedelta(days=1)
         
-        if type_filter in ['Network', 'Hardware', 'Software']:
-            resolution_queryset = resolution_queryset.filter(type=type_filter)
+        resolution_queryset = resolution_queryset.filter(closed_at__date__range=[month_start.date(), month_end.date()])
         
-        if user_filter != 'all':
-            try:
-                user = User.objects.get(id=user_filter)
-                resolution_queryset = resolution_queryset.filter(requester=user)
-            except User.DoesNotExist:
-                pass
+    elif time_filter == 'year':
+        # Show tickets closed in the current year
+        now = timezone.now()
+        year_start = datetime(now.year, 1, 1)
+        year_end = datetime(now.year, 12, 31)
         
-        if technician_filter != 'all':
-            try:
-                technician = User.objects.get(id=technician_filter)
-                resolution_queryset = resolution_queryset.filter(
-                    Q(claimed_by=technician) | Q(additional_technicians=technician)
-                ).distinct()
-            except User.DoesNotExist:
-                pass
+        resolution_queryset = resolution_queryset.filter(closed_at__date__range=[year_start.date(), year_end.date()])
+    elif time_filter == 'quarter':
+        # Show tickets closed in the current quarter
+        now = timezone.now()
+        current_quarter = (now.month - 1) // 3 + 1
+        quarter_start_month = (current_quarter - 1) * 3 + 1
+        quarter_end_month = quarter_start_month + 2
         
-        if group_filter != 'all':
-            resolution_queryset = resolution_queryset.filter(requester__group=group_filter)
+        quarter_start = datetime(now.year, quarter_start_month, 1)
+        if quarter_end_month == 12:
+            quarter_end = datetime(now.year + 1, 1, 1) - timedelta(days=1)
+        else:
+            quarter_end = datetime(now.year, quarter_end_month + 1, 1) - timedelta(days=1)
+        resolution_queryset = resolution_queryset.filter(closed_at__date__range=[quarter_start.date(), quarter_end.date()])
+    elif time_filter == 'custom' and start_date and end_date:
+        # Show tickets closed within the custom date range
+        resolution_queryset = resolution_queryset.filter(closed_at__date__range=[start_date, end_date])
+    # For 'today', 'week', and 'all' - show all closed tickets (ignore time filter)
+    
+    # Apply other filters (priority, type, user, technician, group) to resolution queryset
+    if priority_filter in ['P1', 'P2', 'P3', 'P4']:
+        resolution_queryset = resolution_queryset.filter(priority=priority_filter)
+    
+    if type_filter in ['Network', 'Hardware', 'Software']:
+        resolution_queryset = resolution_queryset.filter(type=type_filter)
+    
+    if user_filter != 'all':
+        try:
+            user = User.objects.get(id=user_filter)
+            resolution_queryset = resolution_queryset.filter(requester=user)
+        except User.DoesNotExist:
+            pass
+    
+    if technician_filter != 'all':
+        try:
+            technician = User.objects.get(id=technician_filter)
+            resolution_queryset = resolution_queryset.filter(
+                Q(claimed_by=technician) | Q(additional_technicians=technician)
+            ).distinct()
+        except User.DoesNotExist:
+            pass
+    
+    if group_filter != 'all':
+        resolution_queryset = resolution_queryset.filter(requester__group=group_filter)
+    
+    # Calculate resolution time distribution (empty without closed tickets)
+    for ticket in _scan(resolution_queryset, 'created_at', 'closed_at'):
+        resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
+        resolution_days = resolution_hours / 24
         
-        # Calculate resolution time distribution
-        if resolution_queryset.exists():
-            for ticket in resolution_queryset:
-                resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-                resolution_days = resolution_hours / 24
-                
-                if resolution_days <= 1:
-                    resolution_time_distribution['0-1_day'] += 1
-                elif resolution_days <= 3:
-                    resolution_time_distribution['1-3_days'] += 1
-                elif resolution_days <= 7:
-                    resolution_time_distribution['3-7_days'] += 1
-                elif resolution_days <= 14:
-                    resolution_time_distribution['7-14_days'] += 1
-                else:
-                    resolution_time_distribution['14+_days'] += 1
+        if resolution_days <= 1:
+            resolution_time_distribution['0-1_day'] += 1
+        elif resolution_days <= 3:
+            resolution_time_distribution['1-3_days'] += 1
+        elif resolution_days <= 7:
+            resolution_time_distribution['3-7_days'] += 1
+        elif resolution_days <= 14:
+            resolution_time_distribution['7-14_days'] += 1
+        else:
+            resolution_time_distribution['14+_days'] += 1
     
     # Monthly trends (current year: January to December)
     monthly_trends = []
     current_year = datetime.now().year
+    # Tickets per date since the previous December (January compares with it below)
+    per_date = _count_per_date(queryset, since=datetime(current_year - 1, 12, 1).date())
     
     # Month names in French
     month_names = [
@@ -282,77 +375,60 @@ def get_ticket_analytics(request):
         else:
             month_end = datetime(current_year, month_num + 1, 1) - timedelta(days=1)
         
-        count = queryset.filter(created_at__date__range=[month_start.date(), month_end.date()]).count()
+        count = _sum_dates(per_date, month_start.date(), month_end.date())
         monthly_trends.append({
             'month': month_names[month_num - 1],  # Use French month name
             'count': count
         })
-        print(f"Month {month_names[month_num - 1]} {current_year}: {count} tickets")
     
     # Calculate month-over-month comparisons
     current_month = datetime.now().month
     current_year = datetime.now().year
     
     # Current month data
-    current_month_start = datetime(current_year, current_month, 1)
+    current_month_start = timezone.make_aware(datetime(current_year, current_month, 1))
     if current_month == 12:
-        current_month_end = datetime(current_year + 1, 1, 1) - timedelta(days=1)
+        current_month_end = timezone.make_aware(datetime(current_year + 1, 1, 1)) - timedelta(days=1)
     else:
-        current_month_end = datetime(current_year, current_month + 1, 1) - timedelta(days=1)
+        current_month_end = timezone.make_aware(datetime(current_year, current_month + 1, 1)) - timedelta(days=1)
     
     # Previous month data
     if current_month == 1:
-        prev_month_start = datetime(current_year - 1, 12, 1)
-        prev_month_end = datetime(current_year, 1, 1) - timedelta(days=1)
+        prev_month_start = timezone.make_aware(datetime(current_year - 1, 12, 1))
+        prev_month_end = timezone.make_aware(datetime(current_year, 1, 1)) - timedelta(days=1)
     else:
-        prev_month_start = datetime(current_year, current_month - 1, 1)
-        prev_month_end = datetime(current_year, current_month, 1) - timedelta(days=1)
+        prev_month_start = timezone.make_aware(datetime(current_year, current_month - 1, 1))
+        prev_month_end = timezone.make_aware(datetime(current_year, current_month, 1)) - timedelta(days=1)
     
     # Current month metrics
     current_month_tickets = queryset.filter(created_at__date__range=[current_month_start.date(), current_month_end.date()])
-    current_month_closed = current_month_tickets.filter(status='closed').count()
-    current_month_total = current_month_tickets.count()
+    prev_month_tickets = queryset.filter(created_at__date__range=[prev_month_start.date(), prev_month_end.date()])
+    closed_per_month = queryset.filter(status='closed').aggregate(
+        current=Count('pk', distinct=True, filter=Q(created_at__date__range=[current_month_start.date(), current_month_end.date()])),
+        previous=Count('pk', distinct=True, filter=Q(created_at__date__range=[prev_month_start.date(), prev_month_end.date()])),
+    )
+    current_month_closed = closed_per_month['current']
+    current_month_total = _sum_dates(per_date, current_month_start.date(), current_month_end.date())
     current_month_resolution_rate = (current_month_closed / current_month_total * 100) if current_month_total > 0 else 0
     
     # Previous month metrics
-    prev_month_tickets = queryset.filter(created_at__date__range=[prev_month_start.date(), prev_month_end.date()])
-    prev_month_closed = prev_month_tickets.filter(status='closed').count()
-    prev_month_total = prev_month_tickets.count()
+    prev_month_closed = closed_per_month['previous']
+    prev_month_total = _sum_dates(per_date, prev_month_start.date(), prev_month_end.date())
     prev_month_resolution_rate = (prev_month_closed / prev_month_total * 100) if prev_month_total > 0 else 0
     
     # Calculate resolution time for current and previous month
-    current_month_resolution_time = 0
-    current_closed_with_times = current_month_tickets.filter(status='closed', closed_at__isnull=False)
-    if current_closed_with_times.exists():
-        total_hours = sum((ticket.closed_at - ticket.created_at).total_seconds() / 3600 for ticket in current_closed_with_times)
-        current_month_resolution_time = total_hours / current_closed_with_times.count()
-    
-    prev_month_resolution_time = 0
-    prev_closed_with_times = prev_month_tickets.filter(status='closed', closed_at__isnull=False)
-    if prev_closed_with_times.exists():
-        total_hours = sum((ticket.closed_at - ticket.created_at).total_seconds() / 3600 for ticket in prev_closed_with_times)
-        prev_month_resolution_time = total_hours / prev_closed_with_times.count()
+    current_month_resolution_time = _mean_hours(current_month_tickets.filter(status='closed', closed_at__isnull=False), 'closed_at')
+    prev_month_resolution_time = _mean_hours(prev_month_tickets.filter(status='closed', closed_at__isnull=False), 'closed_at')
     
     # Calculate first response time for current and previous month
-    current_month_frt = 0
     current_frt_tickets = current_month_tickets.filter(events__event_type__in=['claimed', 'technician_added']).distinct()
-    if current_frt_tickets.exists():
-        total_frt = 0
-        for ticket in current_frt_tickets:
-            first_response_event = ticket.events.filter(event_type__in=['claimed', 'technician_added']).order_by('created_at').first()
-            if first_response_event:
-                total_frt += (first_response_event.created_at - ticket.created_at).total_seconds() / 3600
-        current_month_frt = total_frt / current_frt_tickets.count()
-    
-    prev_month_frt = 0
+    current_month_frt = _mean_hours(
+        current_frt_tickets.annotate(first_response_at=_first_event_at('claimed', 'technician_added')), 'first_response_at'
+    )
     prev_frt_tickets = prev_month_tickets.filter(events__event_type__in=['claimed', 'technician_added']).distinct()
-    if prev_frt_tickets.exists():
-        total_frt = 0
-        for ticket in prev_frt_tickets:
-            first_response_event = ticket.events.filter(event_type__in=['claimed', 'technician_added']).order_by('created_at').first()
-            if first_response_event:
-                total_frt += (first_response_event.created_at - ticket.created_at).total_seconds() / 3600
-        prev_month_frt = total_frt / prev_frt_tickets.count()
+    prev_month_frt = _mean_hours(
+        prev_frt_tickets.annotate(first_response_at=_first_event_at('claimed', 'technician_added')), 'first_response_at'
+    )
     
     # Calculate percentage changes
     resolution_rate_change = current_month_resolution_rate - prev_month_resolution_rate
@@ -367,17 +443,13 @@ def get_ticket_analytics(request):
     total_tickets_change = 0
     avg_tickets_per_employee_change = 0
     
-    # Current month total tickets
-    current_month_tickets = queryset.filter(
-        created_at__gte=current_month_start,
-        created_at__lte=current_month_end
-    ).count()
-    
-    # Previous month total tickets
-    prev_month_tickets_count = queryset.filter(
-        created_at__gte=prev_month_start,
-        created_at__lte=prev_month_end
-    ).count()
+    # Current and previous month total tickets
+    month_totals = queryset.aggregate(
+        current=Count('pk', distinct=True, filter=Q(created_at__gte=current_month_start, created_at__lte=current_month_end)),
+        previous=Count('pk', distinct=True, filter=Q(created_at__gte=prev_month_start, created_at__lte=prev_month_end)),
+    )
+    current_month_tickets = month_totals['current']
+    prev_month_tickets_count = month_totals['previous']
     
     if prev_month_tickets_count > 0:
         total_tickets_change = ((current_month_tickets - prev_month_tickets_count) / prev_month_tickets_count) * 100
@@ -559,7 +631,7 @@ def get_sla_tracking(request):
     sla_compliant = 0
     total_resolution_time = 0
     
-    for ticket in queryset:
+    for ticket in _scan(queryset, 'created_at', 'closed_at', 'priority'):
         if ticket.closed_at and ticket.created_at:
             resolution_time = (ticket.closed_at - ticket.created_at).total_seconds() / 3600  # hours
             total_resolution_time += resolution_time
@@ -782,31 +854,41 @@ def get_employee_statistics(request):
     current_year = datetime.now().year
     
     # Current month data
-    current_month_start = datetime(current_year, current_month, 1)
+    current_month_start = timezone.make_aware(datetime(current_year, current_month, 1))
     if current_month == 12:
-        current_month_end = datetime(current_year + 1, 1, 1) - timedelta(days=1)
+        current_month_end = timezone.make_aware(datetime(current_year + 1, 1, 1)) - timedelta(days=1)
     else:
-        current_month_end = datetime(current_year, current_month + 1, 1) - timedelta(days=1)
+        current_month_end = timezone.make_aware(datetime(current_year, current_month + 1, 1)) - timedelta(days=1)
     
     # Previous month data
     if current_month == 1:
-        prev_month_start = datetime(current_year - 1, 12, 1)
-        prev_month_end = datetime(current_year, 1, 1) - timedelta(days=1)
+        prev_month_start = timezone.make_aware(datetime(current_year - 1, 12, 1))
+        prev_month_end = timezone.make_aware(datetime(current_year, 1, 1)) - timedelta(days=1)
     else:
-        prev_month_start = datetime(current_year, current_month - 1, 1)
-        prev_month_end = datetime(current_year, current_month, 1) - timedelta(days=1)
-    
+        prev_month_start = timezone.make_aware(datetime(current_year, current_month - 1, 1))
+        prev_month_end = timezone.make_aware(datetime(current_year, current_month, 1)) - timedelta(days=1)
+    
+    # The top employees' tickets in one scan rather than a handful of queries per employee
+    tickets_by_employee = {emp_data['requester__id']: [] for emp_data in top_employees}
+    for ticket in _scan(
+        queryset.filter(requester__id__in=tickets_by_employee), 'requester_id', 'status', 'created_at', 'closed_at'
+    ):
+        tickets_by_employee[ticket.requester_id].append(ticket)
+
     for emp_data in top_employees:
         emp_id = emp_data['requester__id']
-        emp_tickets = queryset.filter(requester__id=emp_id)
-        closed_tickets = emp_tickets.filter(status='closed')
-        
+        emp_tickets = tickets_by_employee[emp_id]
+        closed_tickets = [ticket for ticket in emp_tickets if ticket.status == 'closed']
+        created_dates = [timezone.localdate(ticket.created_at) for ticket in emp_tickets]
+
         # Calculate current month tickets for this employee
-        current_month_tickets = emp_tickets.filter(created_at__date__range=[current_month_start.date(), current_month_end.date()]).count()
-        
+        current_month_tickets = sum(
+            1 for date in created_dates if current_month_start.date() <= date <= current_month_end.date()
+        )
+
         # Calculate previous month tickets for this employee
-        prev_month_tickets = emp_tickets.filter(created_at__date__range=[prev_month_start.date(), prev_month_end.date()]).count()
-        
+        prev_month_tickets = sum(1 for date in created_dates if prev_month_start.date() <= date <= prev_month_end.date())
+
         # Calculate evolution percentage
         evolution_percentage = 0
         if prev_month_tickets > 0:
@@ -816,21 +898,21 @@ def get_employee_statistics(request):
         
         # Calculate average resolution time for this employee's tickets
         avg_resolution_time = 0
-        if closed_tickets.exists():
+        if closed_tickets:
             total_hours = 0
             for ticket in closed_tickets:
                 if ticket.closed_at and ticket.created_at:
                     resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
                     total_hours += resolution_hours
-            avg_resolution_time = total_hours / closed_tickets.count()
-        
+            avg_resolution_time = total_hours / len(closed_tickets)
+
         employee_performance.append({
             'employee_id': emp_id,
             'first_name': emp_data['requester__first_name'],
             'last_name': emp_data['requester__last_name'],
             'group': emp_data['requester__group'],
             'tickets_created': emp_data['tickets_created'],
-            'tickets_closed': closed_tickets.count(),
+            'tickets_closed': len(closed_tickets),
             'avg_resolution_time': round(avg_resolution_time, 1),
             'evolution_percentage': round(evolution_percentage, 1)
         })
@@ -877,14 +959,10 @@ def get_employee_statistics(request):
     else:  # 'all' or any other value
         # For 'all' time filter, calculate based on actual data range
         try:
-            if queryset.exists():
-                first_ticket = queryset.order_by('created_at').first()
-                last_ticket = queryset.order_by('-created_at').first()
-                if first_ticket and last_ticket:
-                    time_diff = last_ticket.created_at - first_ticket.created_at
-                    total_hours = max(time_diff.total_seconds() / 3600, 1)  # At least 1 hour
-                else:
-                    total_hours = 1
+            created_range = queryset.aggregate(first=Min('created_at'), last=Max('created_at'))
+            if created_range['first'] and created_range['last']:
+                time_diff = created_range['last'] - created_range['first']
+                total_hours = max(time_diff.total_seconds() / 3600, 1)  # At least 1 hour
             else:
                 total_hours = 1
         except Exception:
@@ -899,35 +977,10 @@ def get_employee_statistics(request):
     total_employees = User.objects.filter(role='employee').count()
     avg_tickets_per_employee = (total_tickets / total_employees) if total_employees > 0 else 0
     
-    # 3. Average resolution time by employee creator
-    avg_resolution_by_creator = 0
-    closed_tickets = queryset.filter(status='closed', closed_at__isnull=False)
-    if closed_tickets.exists():
-        total_resolution_hours = 0
-        for ticket in closed_tickets:
-            resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-            total_resolution_hours += resolution_hours
-        avg_resolution_by_creator = total_resolution_hours / closed_tickets.count()
-    
+    # 3. Average resolution time by employee creator and
     # 4. SLA On-Time Closure Rate for tickets created by employees
-    sla_on_time_rate = 0
-    closed_tickets_for_sla = queryset.filter(status='closed')
-    if closed_tickets_for_sla.exists():
-        sla_compliant_tickets = 0
-        total_closed_for_sla = closed_tickets_for_sla.count()
-        
-        for ticket in closed_tickets_for_sla:
-            if ticket.closed_at and ticket.created_at:
-                resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-                # Define SLA targets based on priority (same as main SLA tracking)
-                sla_targets = {'P1': 2, 'P2': 4, 'P3': 8, 'P4': 24}
-                sla_target = sla_targets.get(ticket.priority, 24)
-                
-                if resolution_hours <= sla_target:
-                    sla_compliant_tickets += 1
-        
-        sla_on_time_rate = (sla_compliant_tickets / total_closed_for_sla * 100) if total_closed_for_sla > 0 else 0
-    
+    avg_resolution_by_creator, sla_on_time_rate, _ = _closure_stats(queryset.filter(status='closed'))
+
     # Calculate month-over-month changes for Employee Statistics
     tickets_per_hour_change = 0
     sla_on_time_rate_change = 0
@@ -974,33 +1027,12 @@ def get_employee_statistics(request):
         if prev_month_tickets_per_hour > 0:
             tickets_per_hour_change = ((tickets_per_hour - prev_month_tickets_per_hour) / prev_month_tickets_per_hour) * 100
     
-    # SLA on-time rate change
-    prev_month_closed_tickets = prev_month_queryset.filter(status='closed')
-    if prev_month_closed_tickets.exists():
-        prev_month_sla_compliant = 0
-        prev_month_total_closed = prev_month_closed_tickets.count()
-        
-        for ticket in prev_month_closed_tickets:
-            if ticket.closed_at and ticket.created_at:
-                resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-                # Use same SLA targets as main calculation
-                sla_targets = {'P1': 2, 'P2': 4, 'P3': 8, 'P4': 24}
-                sla_target = sla_targets.get(ticket.priority, 24)
-                
-                if resolution_hours <= sla_target:
-                    prev_month_sla_compliant += 1
-        
-        prev_month_sla_rate = (prev_month_sla_compliant / prev_month_total_closed * 100) if prev_month_total_closed > 0 else 0
+    # SLA on-time rate and average resolution by creator changes
+    prev_month_avg_resolution, prev_month_sla_rate, prev_month_total_closed = _closure_stats(
+        prev_month_queryset.filter(status='closed')
+    )
+    if prev_month_total_closed:
         sla_on_time_rate_change = sla_on_time_rate - prev_month_sla_rate
-    
-    # Average resolution by creator change
-    prev_month_closed_for_resolution = prev_month_queryset.filter(status='closed')
-    if prev_month_closed_for_resolution.exists():
-        prev_month_total_resolution_hours = 0
-        for ticket in prev_month_closed_for_resolution:
-            resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-            prev_month_total_resolution_hours += resolution_hours
-        prev_month_avg_resolution = prev_month_total_resolution_hours / prev_month_closed_for_resolution.count()
         avg_resolution_by_creator_change = prev_month_avg_resolution - avg_resolution_by_creator  # Negative is good (faster)
     
     # Employee Performance Chart Data
@@ -1019,77 +1051,69 @@ def get_employee_statistics(request):
                      'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
             employee_chart_data['labels'] = months
             
-            created_data = []
-            closed_data = []
-            
+            months_range = []
             for i in range(1, 13):
-                month_start = datetime(current_year, i, 1)
+                month_start = timezone.make_aware(datetime(current_year, i, 1))
                 if i == 12:
-                    month_end = datetime(current_year + 1, 1, 1) - timedelta(days=1)
+                    month_end = timezone.make_aware(datetime(current_year + 1, 1, 1)) - timedelta(days=1)
                 else:
-                    month_end = datetime(current_year, i + 1, 1) - timedelta(days=1)
+                    month_end = timezone.make_aware(datetime(current_year, i + 1, 1)) - timedelta(days=1)
+                months_range.append((month_start, month_end))
+            
+            # Apply all filters except time
+            month_queryset = Ticket.objects.all()
+            if status_filter == 'open':
+                month_queryset = month_queryset.filter(status='open')
+            elif status_filter == 'closed':
+                month_queryset = month_queryset.filter(status='closed')
+            elif status_filter == 'reopened':
+                month_queryset = month_queryset.filter(events__event_type='reopened').distinct()
+            
+            if priority_filter in ['P1', 'P2', 'P3', 'P4']:
+                month_queryset = month_queryset.filter(priority=priority_filter)
+            
+            if type_filter in ['Network', 'Hardware', 'Software']:
+                month_queryset = month_queryset.filter(type=type_filter)
+            
+            if group_filter != 'all':
+                month_queryset = month_queryset.filter(requester__group=group_filter)
+            
+            # Count created and closed tickets for each month
+            created_data = _count_per_period(month_queryset, 'created_at', months_range)
+            closed_data = _count_per_period(month_queryset, 'closed_at', months_range)
+        else:
+            # Use the filtered period
+            if time_filter == 'today':
+                period_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                period_end = datetime.now()
+                employee_chart_data['labels'] = [f"{i}h" for i in range(24)]
+                
+                hours_range = []
+                for hour in range(24):
+                    hour_start = period_start + timedelta(hours=hour)
+                    hour_end = hour_start + timedelta(hours=1)
+                    hours_range.append((hour_start, hour_end))
                 
-                # Apply all filters except time
-                month_queryset = Ticket.objects.all()
+                # Apply filters
+                hour_queryset = Ticket.objects.all()
                 if status_filter == 'open':
-                    month_queryset = month_queryset.filter(status='open')
+                    hour_queryset = hour_queryset.filter(status='open')
                 elif status_filter == 'closed':
-                    month_queryset = month_queryset.filter(status='closed')
+                    hour_queryset = hour_queryset.filter(status='closed')
                 elif status_filter == 'reopened':
-                    month_queryset = month_queryset.filter(events__event_type='reopened').distinct()
+                    hour_queryset = hour_queryset.filter(events__event_type='reopened').distinct()
                 
                 if priority_filter in ['P1', 'P2', 'P3', 'P4']:
-                    month_queryset = month_queryset.filter(priority=priority_filter)
+                    hour_queryset = hour_queryset.filter(priority=priority_filter)
                 
                 if type_filter in ['Network', 'Hardware', 'Software']:
-                    month_queryset = month_queryset.filter(type=type_filter)
+                    hour_queryset = hour_queryset.filter(type=type_filter)
                 
                 if group_filter != 'all':
-                    month_queryset = month_queryset.filter(requester__group=group_filter)
-                
-                # Count created and closed tickets for this month
-                created_count = month_queryset.filter(created_at__gte=month_start, created_at__lte=month_end).count()
-                closed_count = month_queryset.filter(closed_at__gte=month_start, closed_at__lte=month_end).count()
-                
-                created_data.append(created_count)
-                closed_data.append(closed_count)
-        else:
-            # Use the filtered period
-            if time_filter == 'today':
-                period_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                period_end = datetime.now()
-                employee_chart_data['labels'] = [f"{i}h" for i in range(24)]
-                
-                created_data = []
-                closed_data = []
+                    hour_queryset = hour_queryset.filter(requester__group=group_filter)
                 
-                for hour in range(24):
-                    hour_start = period_start + timedelta(hours=hour)
-                    hour_end = hour_start + timedelta(hours=1)
-                    
-                    # Apply filters
-                    hour_queryset = Ticket.objects.all()
-                    if status_filter == 'open':
-                        hour_queryset = hour_queryset.filter(status='open')
-                    elif status_filter == 'closed':
-                        hour_queryset = hour_queryset.filter(status='closed')
-                    elif status_filter == 'reopened':
-                        hour_queryset = hour_queryset.filter(events__event_type='reopened').distinct()
-                    
-                    if priority_filter in ['P1', 'P2', 'P3', 'P4']:
-                        hour_queryset = hour_queryset.filter(priority=priority_filter)
-                    
-                    if type_filter in ['Network', 'Hardware', 'Software']:
-                        hour_queryset = hour_queryset.filter(type=type_filter)
-                    
-                    if group_filter != 'all':
-                        hour_queryset = hour_queryset.filter(requester__group=group_filter)
-                    
-                    created_count = hour_queryset.filter(created_at__gte=hour_start, created_at__lte=hour_end).count()
-                    closed_count = hour_queryset.filter(closed_at__gte=hour_start, closed_at__lte=hour_end).count()
-                    
-                    created_data.append(created_count)
-                    closed_data.append(closed_count)
+                created_data = _count_per_period(hour_queryset, 'created_at', hours_range)
+                closed_data = _count_per_period(hour_queryset, 'closed_at', hours_range)
             else:
                 # For other time filters, use the existing queryset logic
                 employee_chart_data['labels'] = ['Période']
@@ -1138,15 +1162,14 @@ def get_employee_statistics(request):
             elif status_filter == 'in_progress':
                 # For in progress status, show tickets that are in progress
                 if time_filter == 'all':
-                    status_data = []
+                    months_range = []
                     for i in range(1, 13):
                         month_start = datetime(current_year, i, 1)
                         month_end = datetime(current_year, i + 1, 1) if i < 12 else datetime(current_year + 1, 1, 1)
-                        in_progress_count = Ticket.objects.filter(
-                            status='in_progress',
-                            created_at__date__range=[month_start, month_end]
-                        ).count()
-                        status_data.append(in_progress_count)
+                        months_range.append((month_start.date(), month_end.date()))
+                    status_data = _count_per_period(
+                        Ticket.objects.filter(status='in_progress'), 'created_at__date', months_range
+                    )
                 else:
                     status_data = [queryset.filter(status='in_progress').count()]
             elif status_filter == 'closed':
@@ -1154,24 +1177,17 @@ def get_employee_statistics(request):
             elif status_filter == 'reopened':
                 # For reopened status, we need to recalculate the data
                 if time_filter == 'all':
-                    status_data = []
-                    for i in range(1, 13):
-                        month_start = datetime(current_year, i, 1)
-                        if i == 12:
-                            month_end = datetime(current_year + 1, 1, 1) - timedelta(days=1)
-                        else:
-                            month_end = datetime(current_year, i + 1, 1) - timedelta(days=1)
-                        
-                        month_queryset = Ticket.objects.all()
-                        if priority_filter in ['P1', 'P2', 'P3', 'P4']:
-                            month_queryset = month_queryset.filter(priority=priority_filter)
-                        if type_filter in ['Network', 'Hardware', 'Software']:
-                            month_queryset = month_queryset.filter(type=type_filter)
-                        if group_filter != 'all':
-                            month_queryset = month_queryset.filter(requester__group=group_filter)
-                        
-                        reopened_count = month_queryset.filter(events__event_type='reopened').distinct().count()
-                        status_data.append(reopened_count)
+                    month_queryset = Ticket.objects.all()
+                    if priority_filter in ['P1', 'P2', 'P3', 'P4']:
+                        month_queryset = month_queryset.filter(priority=priority_filter)
+                    if type_filter in ['Network', 'Hardware', 'Software']:
+                        month_queryset = month_queryset.filter(type=type_filter)
+                    if group_filter != 'all':
+                        month_queryset = month_queryset.filter(requester__group=group_filter)
+                    
+                    # Not restricted to the month: every month shows the same count, counted once
+                    reopened_count = month_queryset.filter(events__event_type='reopened').distinct().count()
+                    status_data = [reopened_count] * 12
                 else:
                     status_data = [queryset.filter(events__event_type='reopened').distinct().count()]
             else:
@@ -1357,47 +1373,62 @@ def get_technician_statistics(request):
         tickets_resolved=Count('id')
     ).order_by('-tickets_resolved')[:10])
     
-    # Technician performance analysis
+    # Technician performance analysis: the top technicians' tickets (claimed or
+    # shared) in one scan, with their additional technicians in one query,
+    # rather than a handful of queries per technician
+    technician_ids = [tech_data['claimed_by__id'] for tech_data in top_technicians]
+    related_tickets = queryset
+    if None not in technician_ids:
+        related_tickets = related_tickets.filter(
+            Q(claimed_by__in=technician_ids) | Q(additional_technicians__in=technician_ids)
+        )
+    related_tickets = related_tickets.values('pk')
+    additional = defaultdict(set)
+    shared = Ticket.additional_technicians.through.objects.filter(ticket__in=related_tickets)
+    for ticket_id, user_id in shared.values_list('ticket_id', 'user_id'):
+        additional[ticket_id].add(user_id)
+    
+    per_technician = {
+        tech_id: {'closed': 0, 'resolution_hours': 0, 'responded': 0, 'response_hours': 0}
+        for tech_id in technician_ids
+    }
+    tech_tickets = Ticket.objects.filter(pk__in=related_tickets).annotate(
+        first_response_at=_first_event_at('claimed', 'technician_added')
+    )
+    for ticket in _scan(tech_tickets, 'claimed_by', 'status', 'created_at', 'closed_at'):
+        for tech_id, figures in per_technician.items():
+            # Tickets grouped without a claiming technician: unclaimed or not shared
+            if tech_id is None:
+                if ticket.claimed_by_id is not None and additional[ticket.pk]:
+                    continue
+            elif ticket.claimed_by_id != tech_id and tech_id not in additional[ticket.pk]:
+                continue
+            if ticket.status == 'closed':
+                figures['closed'] += 1
+                if ticket.closed_at and ticket.created_at:
+                    figures['resolution_hours'] += (ticket.closed_at - ticket.created_at).total_seconds() / 3600
+            # Response time over the tickets with a claimed or technician_added event
+            if ticket.first_response_at:
+                figures['responded'] += 1
+                figures['response_hours'] += (ticket.first_response_at - ticket.created_at).total_seconds() / 3600
+    
     technician_performance = []
     for tech_data in top_technicians:
         tech_id = tech_data['claimed_by__id']
-        tech_tickets = queryset.filter(
-            Q(claimed_by__id=tech_id) | Q(additional_technicians__id=tech_id)
-        ).distinct()
-        closed_tickets = tech_tickets.filter(status='closed')
+        figures = per_technician[tech_id]
         
         # Calculate average resolution time for this technician's tickets
-        avg_resolution_time = 0
-        if closed_tickets.exists():
-            total_hours = 0
-            for ticket in closed_tickets:
-                if ticket.closed_at and ticket.created_at:
-                    resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-                    total_hours += resolution_hours
-            avg_resolution_time = total_hours / closed_tickets.count()
+        avg_resolution_time = figures['resolution_hours'] / figures['closed'] if figures['closed'] else 0
         
         # Calculate average response time
-        avg_response_time = 0
-        tickets_with_response = tech_tickets.filter(
-            events__event_type__in=['claimed', 'technician_added']
-        ).distinct()
-        if tickets_with_response.exists():
-            total_frt_hours = 0
-            for ticket in tickets_with_response:
-                first_response_event = ticket.events.filter(
-                    event_type__in=['claimed', 'technician_added']
-                ).order_by('created_at').first()
-                if first_response_event:
-                    frt_hours = (first_response_event.created_at - ticket.created_at).total_seconds() / 3600
-                    total_frt_hours += frt_hours
-            avg_response_time = total_frt_hours / tickets_with_response.count()
+        avg_response_time = figures['response_hours'] / figures['responded'] if figures['responded'] else 0
         
         technician_performance.append({
             'technician_id': tech_id,
             'first_name': tech_data['claimed_by__first_name'],
             'last_name': tech_data['claimed_by__last_name'],
             'tickets_resolved': tech_data['tickets_resolved'],
-            'tickets_closed': closed_tickets.count(),
+            'tickets_closed': figures['closed'],
             'avg_resolution_time': round(avg_resolution_time, 1),
             'avg_response_time': round(avg_response_time, 1)
         })
@@ -1470,27 +1501,25 @@ def get_group_statistics(request):
         tickets_created=Count('id')
     ).order_by('-tickets_created')[:10])
     
-    # Group performance analysis
+    # Group performance analysis: closed tickets counted and timed per group in one scan
+    closed_per_group = Counter()
+    hours_per_group = defaultdict(float)
+    closed_tickets = queryset.filter(status='closed').values_list('pk', 'requester__group', 'created_at', 'closed_at')
+    for pk, group_name, created_at, closed_at in closed_tickets.iterator(chunk_size=settings.REPORT_SCAN_CHUNK_SIZE):
+        closed_per_group[group_name] += 1
+        if closed_at and created_at:
+            hours_per_group[group_name] += (closed_at - created_at).total_seconds() / 3600
+    
     group_performance = []
     for group_data in top_groups:
         group_name = group_data['requester__group']
-        group_tickets = queryset.filter(requester__group=group_name)
-        closed_tickets = group_tickets.filter(status='closed')
-        
-        # Calculate average resolution time for this group's tickets
-        avg_resolution_time = 0
-        if closed_tickets.exists():
-            total_hours = 0
-            for ticket in closed_tickets:
-                if ticket.closed_at and ticket.created_at:
-                    resolution_hours = (ticket.closed_at - ticket.created_at).total_seconds() / 3600
-                    total_hours += resolution_hours
-            avg_resolution_time = total_hours / closed_tickets.count()
+        tickets_closed = closed_per_group[group_name]
+        avg_resolution_time = hours_per_group[group_name] / tickets_closed if tickets_closed else 0
         
         group_performance.append({
             'group_name': group_name,
             'tickets_created': group_data['tickets_created'],
-            'tickets_closed': closed_tickets.count(),
+            'tickets_closed': tickets_closed,
             'avg_resolution_time': round(avg_resolution_time, 1)
         })
     
@@ -1571,12 +1600,12 @@ def get_performance_statistics(request):
         total_frt_hours = 0
         frt_data = []
         
-        for ticket in tickets_with_response:
-            first_response_event = ticket.events.filter(
-                event_type__in=['claimed', 'technician_added']
-            ).order_by('created_at').first()
-            if first_response_event:
-                frt_hours = (first_response_event.created_at - ticket.created_at).total_seconds() / 3600
+        tickets_with_times = tickets_with_response.annotate(
+            first_response_at=_first_event_at('claimed', 'technician_added')
+        )
+        for ticket in _scan(tickets_with_times, 'id', 'created_at', 'priority'):
+            if ticket.first_response_at:
+                frt_hours = (ticket.first_response_at - ticket.created_at).total_seconds() / 3600
                 total_frt_hours += frt_hours
                 frt_data.append({
                     'ticket_id': str(ticket.id),
@@ -1690,11 +1719,14 @@ def get_trends_statistics(request):
     if group_filter != 'all':
         queryset = queryset.filter(requester__group=group_filter)
     
+    # Tickets per date back to the first month charted, summed into days, weeks and months below
+    per_date = _count_per_date(queryset, since=(now.replace(day=1) - timedelta(days=30*11)).date())
+    
     # Daily trends (last 30 days)
     daily_trends = []
     for i in range(30):
         date = now.date() - timedelta(days=i)
-        count = queryset.filter(created_at__date=date).count()
+        count = per_date[date]
         daily_trends.append({
             'date': date.strftime('%Y-%m-%d'),
             'count': count
@@ -1706,7 +1738,7 @@ def get_trends_statistics(request):
     for i in range(12):
         week_start = now.date() - timedelta(weeks=i+1)
         week_end = now.date() - timedelta(weeks=i)
-        count = queryset.filter(created_at__date__range=[week_start, week_end]).count()
+        count = _sum_dates(per_date, week_start, week_end)
         weekly_trends.append({
             'week': f"Week {12-i}",
             'count': count
@@ -1718,7 +1750,7 @@ def get_trends_statistics(request):
     for i in range(12):
         month_start = now.replace(day=1) - timedelta(days=30*i)
         month_end = month_start + timedelta(days=30)
-        count = queryset.filter(created_at__date__range=[month_start.date(), month_end.date()]).count()
+        count = _sum_dates(per_date, month_start.date(), month_end.date())
         monthly_trends.append({
             'month': month_start.strftime('%Y-%m'),
             'count': count
@@ -1726,11 +1758,15 @@ def get_trends_statistics(request):
     monthly_trends.reverse()
     
     # Growth rate calculation
-    current_period = queryset.filter(created_at__gte=now - timedelta(days=30)).count()
-    previous_period = queryset.filter(
-        created_at__gte=now - timedelta(days=60),
-        created_at__lt=now - timedelta(days=30)
-    ).count()
+    periods = queryset.aggregate(
+        current=Count('pk', distinct=True, filter=Q(created_at__gte=now - timedelta(days=30))),
+        previous=Count('pk', distinct=True, filter=Q(
+            created_at__gte=now - timedelta(days=60),
+            created_at__lt=now - timedelta(days=30),
+        )),
+    )
+    current_period = periods['current']
+    previous_period = periods['previous']
     
     growth_rate = 0
     if previous_period > 0:
@@ -1816,10 +1852,9 @@ def get_workload_statistics(request):
     workload_data = []
     total_active_tickets = 0
     
+    active_per_technician = queryset.count_per_technician()
     for technician in technicians:
-        active_tickets = queryset.filter(
-            Q(claimed_by=technician) | Q(additional_technicians=technician)
-        ).distinct().count()
+        active_tickets = active_per_technician.get(technician.id, 0)
         
         total_active_tickets += active_tickets
         
@@ -1841,11 +1876,12 @@ def get_workload_statistics(request):
     # Overload alerts
     overload_alerts = [w for w in workload_data if w['active_tickets'] >= 10]
     
-    # Workload trends (last 7 days)
+    # Workload trends (last 7 days), counted per day in one grouped query
+    created_per_date = _count_per_date(queryset, since=now.date() - timedelta(days=6))
     workload_trends = []
     for i in range(7):
         date = now.date() - timedelta(days=i)
-        daily_workload = queryset.filter(created_at__date=date).count()
+        daily_workload = created_per_date[date]
         workload_trends.append({
             'date': date.strftime('%Y-%m-%d'),
             'workload': daily_workload
@@ -1864,80 +1900,239 @@ def get_workload_statistics(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_system_statistics(request):
-    """Get system performance statistics"""
+    """System performance statistics from the runtime metrics of all workers (reports/metrics.py)"""
     if request.user.role != 'admin':
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Get filter parameters
-    time_filter = request.GET.get('time_filter', 'all')
-    system_component = request.GET.get('system_component', 'all')
-    metric_type = request.GET.get('metric_type', 'all')
+    import os
+    import shutil
+    from datetime import timezone as dt_timezone
+    from .metrics import EndpointStats, metrics, total_memory
+    from .models import MetricRollup, MetricWindow
     
-    # Mock system performance data (in real implementation, this would come from monitoring systems)
+    time_filter = request.GET.get('time_filter', 'all')
     now = timezone.now()
+    window_size = settings.METRICS_WINDOW_SECONDS
+    
+    # Period of the per-endpoint table (charts have fixed ranges); default last 24 hours
+    period_starts = {
+        'today': timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0),
+        'week': now - timedelta(days=7),
+        'month': now - timedelta(days=30),
+        'quarter': now - timedelta(days=90),
+        'year': now - timedelta(days=365),
+    }
+    period_start = period_starts.get(time_filter, now - timedelta(hours=24))
+    day_ago = now - timedelta(hours=24)
+    hour_ago = now - timedelta(hours=1)
+    recent = now - timedelta(seconds=window_size * 3)
+    
+    hourly = {}
+    daily = {}
+    endpoints = {}
+    last_hour = EndpointStats()
+    last_day = EndpointStats()
+    latest_samples = {}  # worker -> (started_at, cpu_percent, rss_bytes)
+    
+    def next_hour(moment):
+        """First hour at or after ``moment``: the rollups cover the whole hours of a rolling period"""
+        hour = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return hour if hour == moment else hour + timedelta(hours=1)
+    
+    day_boundary = next_hour(day_ago)
+    period_boundary = next_hour(period_start)
+    
+    def merged(stats_by_view):
+        totals = EndpointStats()
+        for stats in stats_by_view.values():
+            totals.merge(stats)
+        return totals
+    
+    def add_hour(hour, stats_by_view):
+        """An hour of stored windows (or the window in progress)"""
+        totals = merged(stats_by_view)
+        local = timezone.localtime(hour)
+        hourly.setdefault(local.replace(minute=0, second=0, microsecond=0), EndpointStats()).merge(totals)
+        daily.setdefault(local.date(), EndpointStats()).merge(totals)
+        if hour >= day_boundary:
+            last_day.merge(totals)
+        if hour >= period_boundary:
+            for view, stats in stats_by_view.items():
+                endpoints.setdefault(view, EndpointStats()).merge(stats)
+        return totals
+    
+    def add_window(started_at, worker, cpu_percent, rss_bytes, stats_by_view):
+        """A stored window, where its hour's rollup is too coarse"""
+        totals = merged(stats_by_view)
+        if day_ago <= started_at < day_boundary:
+            last_day.merge(totals)
+        if period_start <= started_at < period_boundary:
+            for view, stats in stats_by_view.items():
+                endpoints.setdefault(view, EndpointStats()).merge(stats)
+        if started_at >= hour_ago:
+            last_hour.merge(totals)
+        if started_at >= recent and cpu_percent is not None:
+            if worker not in latest_samples or latest_samples[worker][0] < started_at:
+                latest_samples[worker] = (started_at, cpu_percent, rss_bytes)
+    
+    rollups = MetricRollup.objects.filter(
+        hour__gte=min(period_start, now - timedelta(days=30))
+    ).order_by().values_list('hour', 'endpoints')
+    for hour, stats_by_view in rollups.iterator(chunk_size=settings.REPORT_SCAN_CHUNK_SIZE):
+        add_hour(hour, {view: EndpointStats.from_row(row) for view, row in stats_by_view.items()})
+    # Single windows: the last hour, and the partial first hour of the rolling periods
+    windows = MetricWindow.objects.filter(
+        Q(started_at__gte=hour_ago)
+        | Q(started_at__gte=day_ago, started_at__lt=day_boundary)
+        | Q(started_at__gte=period_start, started_at__lt=period_boundary)
+    ).order_by().values_list('started_at', 'worker', 'cpu_percent', 'rss_bytes', 'endpoints')
+    for started_at, worker, cpu_percent, rss_bytes, stats_by_view in windows.iterator(chunk_size=settings.REPORT_SCAN_CHUNK_SIZE):
+        add_window(started_at, worker, cpu_percent, rss_bytes, {
+            view: EndpointStats.from_row(row) for view, row in stats_by_view.items()
+        })
+    # Plus the window in progress in this worker
+    current_start, current = metrics.current_window()
+    current_start = datetime.fromtimestamp(current_start, dt_timezone.utc)
+    last_hour.merge(add_hour(current_start, current))
+    windows_up = MetricWindow.objects.filter(started_at__gte=day_ago).aggregate(
+        first=Min('started_at'), count=Count('started_at', distinct=True),
+    )
+    
+    def rounded(value, digits=1):
+        return round(value, digits) if value is not None else None
     
-    # System response time (mock data)
+    def percentage(part, whole):
+        return round(part / whole * 100, 2) if whole else None
+    
+    # Response times: last 24 hours, hourly
     response_times = []
-    for i in range(24):  # Last 24 hours
-        hour = now - timedelta(hours=i)
-        avg_response_time = 150 + (i % 5) * 20  # Mock data: 150-250ms
+    current_hour = timezone.localtime(now).replace(minute=0, second=0, microsecond=0)
+    for i in range(23, -1, -1):
+        hour = current_hour - timedelta(hours=i)
+        stats = hourly.get(hour, EndpointStats())
         response_times.append({
             'hour': hour.strftime('%H:00'),
-            'response_time': avg_response_time
+            'response_time': rounded(stats.latency.mean()),
+            'p50': rounded(stats.latency.percentile(50)),
+            'p95': rounded(stats.latency.percentile(95)),
+            'p99': rounded(stats.latency.percentile(99)),
+            'requests': stats.latency.count,
         })
-    response_times.reverse()
     
-    # Uptime (mock data)
-    uptime_percentage = 99.8
+    # Uptime: share of the windows of the last 24 hours (since metrics began) in which a worker was running
+    observed_since = max(windows_up['first'] or current_start, day_ago)
+    expected = max(1, int((now - observed_since).total_seconds() // window_size) + 1)
+    # The window in progress has not been stored by anyone yet
+    uptime_percentage = round(min(100.0, (windows_up['count'] + 1) / expected * 100), 2)
     
-    # Error rates (mock data)
+    # Error rates (5xx): last 7 days
     error_rates = []
-    for i in range(7):  # Last 7 days
-        date = now.date() - timedelta(days=i)
-        error_rate = 0.1 + (i % 3) * 0.05  # Mock data: 0.1-0.2%
+    today = timezone.localdate(now)
+    for i in range(6, -1, -1):
+        date = today - timedelta(days=i)
+        stats = daily.get(date, EndpointStats())
+        requests = stats.latency.count
         error_rates.append({
             'date': date.strftime('%Y-%m-%d'),
-            'error_rate': error_rate
+            'error_rate': percentage(stats.errors, requests),
+            'requests': requests,
+            'errors': stats.errors,
         })
-    error_rates.reverse()
     
-    # Resource usage (mock data)
+    # Resource usage: latest sample of each worker that is still reporting
+    cpu_count = os.cpu_count() or 1
+    rss_total = sum(sample[2] or 0 for sample in latest_samples.values())
+    memory = total_memory()
+    try:
+        disk = shutil.disk_usage(settings.MEDIA_ROOT)
+        disk_usage = percentage(disk.used, disk.total)
+    except OSError:
+        disk_usage = None
     resource_usage = {
-        'cpu_usage': 45.2,
-        'memory_usage': 67.8,
-        'disk_usage': 23.1,
-        'network_usage': 12.5
+        'cpu_usage': rounded(sum(sample[1] for sample in latest_samples.values()) / cpu_count) if latest_samples else None,
+        'memory_usage': percentage(rss_total, memory) if latest_samples and memory else None,
+        'disk_usage': disk_usage,
+        'rss_bytes': rss_total if latest_samples else None,
+        'workers': len(latest_samples),
     }
     
-    # Performance trends (mock data)
+    # Performance trends: last 30 days; the score is the Apdex (METRICS_APDEX_MS) in %
     performance_trends = []
-    for i in range(30):  # Last 30 days
-        date = now.date() - timedelta(days=i)
-        performance_score = 85 + (i % 10) * 1.5  # Mock data: 85-100
+    for i in range(29, -1, -1):
+        date = today - timedelta(days=i)
+        stats = daily.get(date, EndpointStats())
+        apdex = stats.latency.apdex(settings.METRICS_APDEX_MS, stats.errors)
         performance_trends.append({
             'date': date.strftime('%Y-%m-%d'),
-            'performance_score': round(performance_score, 1)
+            'performance_score': rounded(apdex * 100 if apdex is not None else None),
+            'p95': rounded(stats.latency.percentile(95)),
+            'requests': stats.latency.count,
         })
-    performance_trends.reverse()
     
-    # System health metrics
+    # Health over the last hour: request Apdex, and SQL-time Apdex at a fifth of the target
+    api_apdex = last_hour.latency.apdex(settings.METRICS_APDEX_MS, last_hour.errors)
+    database_apdex = last_hour.db.apdex(settings.METRICS_APDEX_MS / 5)
+    known = [value for value in (api_apdex, database_apdex) if value is not None]
     system_health = {
-        'overall_health': 92.5,
-        'database_health': 95.2,
-        'api_health': 89.7,
-        'frontend_health': 94.1
+        # The weakest component sets the overall health
+        'overall_health': rounded(min(known) * 100) if known else None,
+        'database_health': rounded(database_apdex * 100 if database_apdex is not None else None),
+        'api_health': rounded(api_apdex * 100 if api_apdex is not None else None),
     }
     
+    endpoint_rows = []
+    for view, stats in sorted(endpoints.items(), key=lambda item: item[1].latency.count, reverse=True)[:20]:
+        requests = stats.latency.count
+        endpoint_rows.append({
+            'view': view,
+            'requests': requests,
+            'errors': stats.errors,
+            'error_rate': percentage(stats.errors, requests),
+            'p50': rounded(stats.latency.percentile(50)),
+            'p95': rounded(stats.latency.percentile(95)),
+            'p99': rounded(stats.latency.percentile(99)),
+            'avg_db_time': rounded(stats.db.mean()),
+            'queries_per_request': rounded(stats.queries / requests if requests else None),
+        })
+    
+    day_requests = last_day.latency.count
     return Response({
         'response_times': response_times,
+        'average_response_time': rounded(last_day.latency.mean()),
         'uptime_percentage': uptime_percentage,
         'error_rates': error_rates,
         'resource_usage': resource_usage,
         'performance_trends': performance_trends,
-        'system_health': system_health
+        'system_health': system_health,
+        'endpoints': endpoint_rows,
+        'database': {
+            'queries': last_day.queries,
+            'queries_per_request': rounded(last_day.queries / day_requests if day_requests else None),
+            'avg_db_time': rounded(last_day.db.mean()),
+            'p95_db_time': rounded(last_day.db.percentile(95)),
+        },
+        'process': {
+            'worker': metrics.worker,
+            'uptime_seconds': int(time.time() - metrics.started_at),
+        },
     })
 
 
+@require_GET
+def prometheus_metrics(request):
+    """Prometheus exposition of this worker's runtime metrics, for METRICS_TOKEN bearers"""
+    from .metrics import metrics
+    
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        # No token configured: closed, except in development and to listed scrapers
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_employees_list(request):
@@ -1962,4 +2157,140 @@ def get_technicians_list(request):
     technicians = User.objects.filter(role='technician').values('id', 'first_name', 'last_name')
     return Response({
         'technicians': list(technicians)
-    })
\ No newline at end of file
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_storage_usage(request):
+    """Attachment storage usage: totals, deduplication/compression savings, tiers, largest tickets and uploaders"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    from django.conf import settings
+    from django.db.models import Sum
+    from tickets.models import AttachmentBlob, TicketAttachment, TicketClosureReportAttachment
+    
+    limit = _limit_param(request, 10, 100)
+    if limit is None:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Ticket attachments come from the maintained counters, not a scan of the attachments table
+    ticket_totals = Ticket.objects.aggregate(count=Sum('attachment_count'), bytes=Sum('attachment_bytes'))
+    report_totals = TicketClosureReportAttachment.objects.aggregate(count=Count('id'), bytes=Sum('size_bytes'))
+    blob_totals = AttachmentBlob.objects.aggregate(count=Count('sha256'), bytes=Sum('stored_size'))
+    tiers = AttachmentBlob.objects.values('tier', 'encoding').annotate(
+        count=Count('sha256'), original_bytes=Sum('size_bytes'), stored_bytes=Sum('stored_size')
+    ).order_by('tier', 'encoding')
+    legacy_bytes = (
+        (TicketAttachment.objects.filter(blob__isnull=True).aggregate(bytes=Sum('size_bytes'))['bytes'] or 0)
+        + (TicketClosureReportAttachment.objects.filter(blob__isnull=True).aggregate(bytes=Sum('size_bytes'))['bytes'] or 0)
+    )
+    
+    logical_bytes = (ticket_totals['bytes'] or 0) + (report_totals['bytes'] or 0)
+    stored_bytes = (blob_totals['bytes'] or 0) + legacy_bytes
+    
+    top_tickets = Ticket.objects.filter(attachment_count__gt=0).order_by('-attachment_bytes').values(
+        'id', 'short_id', 'subject', 'status', 'attachment_count', 'attachment_bytes'
+    )[:limit]
+    
+    # Uploads by user across both attachment kinds
+    uploaders = {}
+    for model in (TicketAttachment, TicketClosureReportAttachment):
+        rows = model.objects.values('uploaded_by', 'uploaded_by__email', 'uploaded_by__role').annotate(
+            count=Count('id'), bytes=Sum('size_bytes')
+        )
+        for row in rows:
+            entry = uploaders.setdefault(row['uploaded_by'], {
+                'user_id': row['uploaded_by'],
+                'email': row['uploaded_by__email'],
+                'role': row['uploaded_by__role'],
+                'count': 0,
+                'bytes': 0,
+            })
+            entry['count'] += row['count']
+            entry['bytes'] += row['bytes'] or 0
+    top_uploaders = sorted(uploaders.values(), key=lambda entry: entry['bytes'], reverse=True)[:limit]
+    
+    by_mime_type = TicketAttachment.objects.values('mime_type').annotate(
+        count=Count('id'), bytes=Sum('size_bytes')
+    ).order_by('-bytes')
+    
+    return Response({
+        'totals': {
+            'ticket_attachments': ticket_totals['count'] or 0,
+            'closure_report_attachments': report_totals['count'] or 0,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'saved_bytes': max(logical_bytes - stored_bytes, 0),
+            'unique_blobs': blob_totals['count'] or 0,
+            'legacy_bytes': legacy_bytes,
+        },
+        'quota': {
+            'max_attachments_per_ticket': settings.MAX_ATTACHMENTS_PER_TICKET,
+            'max_bytes_per_ticket': settings.MAX_ATTACHMENT_BYTES_PER_TICKET,
+            'tickets_at_attachment_limit': Ticket.objects.filter(
+                attachment_count__gte=settings.MAX_ATTACHMENTS_PER_TICKET
+            ).count(),
+        },
+        'tiers': list(tiers),
+        'top_tickets': list(top_tickets),
+        'top_uploaders': top_uploaders,
+        'by_mime_type': list(by_mime_type),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_request_profiles(request):
+    """Recent request profiles (reports/profiling.py), newest first, without their stacks"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    from .models import RequestProfile
+    
+    limit = _limit_param(request, 50, settings.PROFILING_KEEP)
+    if limit is None:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    profiles = RequestProfile.objects.select_related('requested_by').defer('stacks')[:limit]
+    return Response({
+        'profiles': [
+            {
+                'id': profile.id,
+                'created_at': profile.created_at,
+                'trigger': profile.trigger,
+                'requested_by': profile.requested_by.email if profile.requested_by else None,
+                'method': profile.method,
+                'path': profile.path,
+                'view': profile.view,
+                'params': profile.params,
+                'status_code': profile.status_code,
+                'duration_ms': profile.duration_ms,
+                'sql_ms': profile.sql_ms,
+                'queries': profile.queries,
+                'sampled_from_ms': profile.sampled_from_ms,
+                'interval_ms': profile.interval_ms,
+                'samples': profile.samples,
+            }
+            for profile in profiles
+        ],
+        'slow_threshold_ms': settings.PROFILING_SLOW_MS or None,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_request_profile(request, profile_id):
+    """Stacks of one profile in the folded format (flamegraph.pl, speedscope, inferno)"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    from .models import RequestProfile
+    
+    try:
+        profile = RequestProfile.objects.get(id=profile_id)
+    except RequestProfile.DoesNotExist:
+        return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    response = HttpResponse(profile.stacks, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.folded"'
+    return response
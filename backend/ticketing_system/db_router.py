@@ -0,0 +1,142 @@
+"""
+Read-replica routing.
+
+Reads are sent to a replica only inside requests that ReplicaRoutingMiddleware
+(ticketing_system/middleware.py) marked as read-only: GET/HEAD requests to the
+reports, the admin dashboard/activity views and list endpoints. Everything else,
+including every write and every read inside a transaction, uses 'default'.
+
+Two rules keep replica lag from showing:
+
+- staleness tolerance: a replica lagging more than READ_REPLICA_MAX_LAG seconds
+  (measured at most every READ_REPLICA_LAG_CHECK_INTERVAL) is skipped; with no
+  usable replica the request reads from the primary.
+- read-your-writes: after a user's successful mutation, their requests stay on
+  the primary for as long as a usable replica may still be missing it.
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_KEY = 'db:primary-until:{}'
+
+LAG_QUERY = {
+    'postgresql': (
+        'SELECT CASE WHEN NOT pg_is_in_recovery() '
+        'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+    ),
+}
+
+
+class RoutingState:
+    """Per-request routing decision, held in ``request_routing``"""
+
+    def __init__(self):
+        self.alias = None  # replica serving this request's reads, if any
+
+
+request_routing = contextvars.ContextVar('request_routing', default=None)
+
+
+def sticky_seconds():
+    """How long a user's reads stay on the primary after they wrote"""
+    return settings.READ_REPLICA_MAX_LAG + settings.READ_REPLICA_LAG_CHECK_INTERVAL
+
+
+def mark_write(user_id):
+    cache.set(STICKY_KEY.format(user_id), time.time() + sticky_seconds(), timeout=int(sticky_seconds()) + 1)
+
+
+def recently_wrote(user_id):
+    return cache.get(STICKY_KEY.format(user_id), 0) > time.time()
+
+
+class ReplicaPool:
+    """Round-robin over the replicas whose measured lag is within tolerance"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lag = {}
+        self._next_check = 0.0
+        self._counter = itertools.count()
+
+    def choose(self):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        self._refresh()
+        usable = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self._lag.get(alias, float('inf')) <= settings.READ_REPLICA_MAX_LAG
+        ]
+        if not usable:
+            return None
+        return usable[next(self._counter) % len(usable)]
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + settings.READ_REPLICA_LAG_CHECK_INTERVAL
+            self._lag = {alias: self.measure_lag(alias) for alias in settings.DATABASE_REPLICAS}
+        finally:
+            self._lock.release()
+
+    def measure_lag(self, alias):
+        """Replication lag of ``alias`` in seconds (infinite if unreachable)"""
+        connection = connections[alias]
+        query = LAG_QUERY.get(connection.vendor)
+        if query is None:
+            # No way to ask (e.g. a SQLite copy): trust it
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError as exc:
+            logger.warning('Replica %s unavailable: %s', alias, exc)
+            connection.close()
+            return float('inf')
+
+    def lag(self):
+        return dict(self._lag)
+
+
+replicas = ReplicaPool()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = request_routing.get()
+        if state is None or state.alias is None:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Read inside a write transaction: must see its own changes
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = request_routing.get()
+        if state is not None:
+            # Later reads of this request must see the write
+            state.alias = None
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
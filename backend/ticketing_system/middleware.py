@@ -0,0 +1,265 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware
+from rest_framework.mixins import ListModelMixin
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from reports.metrics import metrics as runtime_metrics
+from reports.profiling import sampler, save_profile
+from users.authentication import CachedJWTAuthentication
+
+from .db_router import RoutingState, mark_write, recently_wrote, replicas, request_routing
+
+request_logger = logging.getLogger('ticketing_system.requests')
+profiling_logger = logging.getLogger('reports.profiling')
+
+
+class FileAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves attachment downloads alone: re-compressing a
+    streamed file drops Content-Length, breaks 206 byte ranges and burns CPU on
+    media that is already compressed (or stored compressed, see tickets/tiering.py).
+    """
+
+    def process_response(self, request, response):
+        if (
+            isinstance(response, FileResponse)
+            or response.status_code == 206
+            or response.has_header('X-Accel-Redirect')
+            or response.has_header('X-Sendfile')
+        ):
+            return response
+        return super().process_response(request, response)
+
+
+def _token_user_id(request):
+    """User id of the request's bearer token, verified but without a database query"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of read-only requests to a replica (ticketing_system/db_router.py):
+    GET/HEAD requests to views of READ_REPLICA_VIEW_MODULES, to READ_REPLICA_VIEWS
+    and to DRF list endpoints, unless the user wrote recently. Successful
+    mutations pin the user to the primary for a while.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        request._replica_routing = state
+        reset_token = request_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_routing.reset(reset_token)
+
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            user_id = _token_user_id(request)
+            if user_id is not None:
+                mark_write(user_id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD'):
+            return None
+        if not self._reads_only(view_func):
+            return None
+        user_id = _token_user_id(request)
+        if user_id is None or recently_wrote(user_id):
+            return None
+        request._replica_routing.alias = replicas.choose()
+        return None
+
+    @staticmethod
+    def _reads_only(view_func):
+        # as_view() keeps the module; @api_view names its wrapper class after the function
+        view_class = getattr(view_func, 'view_class', None)
+        name = view_class.__name__ if view_class is not None else view_func.__name__
+        if view_func.__module__ in settings.READ_REPLICA_VIEW_MODULES:
+            return True
+        if f'{view_func.__module__}.{name}' in settings.READ_REPLICA_VIEWS:
+            return True
+        return view_class is not None and issubclass(view_class, ListModelMixin)
+
+
+# Statements that differ only in the length of an IN (...) list are the same query
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class RequestMetrics:
+    """SQL and timing figures of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[_IN_LIST.sub('IN (...)', sql)] += 1
+
+    def duplicates(self):
+        """``[(sql, count)]`` of the statements run more than once, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records per request the number of SQL queries, their total time, repeated
+    statements (the N+1 signature), response rendering (serialization) time and
+    total time. Figures are sent in a Server-Timing header (SERVER_TIMING) and
+    logged as JSON on the 'ticketing_system.requests' logger: at INFO for every
+    request, at WARNING with the repeated SQL when a REQUEST_METRICS_* threshold
+    is exceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request._request_metrics = metrics
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.record_query))
+            response = self.get_response(request)
+        metrics.total_time = time.perf_counter() - started
+
+        if settings.SERVER_TIMING:
+            response.headers['Server-Timing'] = (
+                f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'render;dur={metrics.render_time * 1000:.1f}, '
+                f'total;dur={metrics.total_time * 1000:.1f}'
+            )
+        self.log(request, response, metrics)
+        match = request.resolver_match
+        runtime_metrics.observe_request(
+            match.view_name if match else None,
+            request.method,
+            response.status_code,
+            metrics.total_time,
+            metrics.sql_time,
+            metrics.queries,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON) right after this hook
+        metrics = request._request_metrics
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def log(self, request, response, metrics):
+        duplicates = metrics.duplicates()
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 1),
+            'render_ms': round(metrics.render_time * 1000, 1),
+            'total_ms': round(metrics.total_time * 1000, 1),
+            'duplicate_queries': sum(count - 1 for sql, count in duplicates),
+        }
+        offending = (
+            metrics.queries > settings.REQUEST_METRICS_QUERY_THRESHOLD
+            or (duplicates and duplicates[0][1] > settings.REQUEST_METRICS_DUPLICATE_THRESHOLD)
+            or metrics.total_time * 1000 > settings.REQUEST_METRICS_SLOW_MS
+        )
+        if offending:
+            record['duplicated_sql'] = [{'count': count, 'sql': sql} for sql, count in duplicates[:10]]
+            request_logger.warning(json.dumps(record))
+        elif request_logger.isEnabledFor(logging.INFO):
+            request_logger.info(json.dumps(record))
+
+
+class ProfilingMiddleware:
+    """
+    Samples the stacks of a request (reports/profiling.py) when an admin asks
+    for it with ``?profile=1`` or ``X-Profile-Request: 1``, or once it runs
+    longer than PROFILING_SLOW_MS, and stores the profile. The response of a
+    profiled request carries the stored profile's id in X-Profile-Id.
+    Outermost, so that its own queries are not counted in the request's.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = self._requesting_admin(request)
+        if user is not None:
+            trigger, delay = 'requested', 0.0
+        elif settings.PROFILING_SLOW_MS:
+            trigger, delay = 'slow', settings.PROFILING_SLOW_MS / 1000
+        else:
+            return self.get_response(request)
+
+        capture = sampler.start(ProfilingMiddleware.__call__.__code__, delay)
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop(capture)
+
+        if capture.samples or trigger == 'requested':
+            try:
+                profile = save_profile(capture, request, response, trigger, user)
+            except Exception as e:
+                profiling_logger.error(f"Storing the profile of {request.path} failed: {str(e)}")
+            else:
+                response.headers['X-Profile-Id'] = str(profile.id)
+        return response
+
+    @staticmethod
+    def _requesting_admin(request):
+        """The admin who asked for a profile of this request, None otherwise"""
+        if request.GET.get('profile') != '1' and request.headers.get('X-Profile-Request') != '1':
+            return None
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except Exception:
+            return None
+        if authenticated is None or authenticated[0].role != 'admin':
+            return None
+        return authenticated[0]
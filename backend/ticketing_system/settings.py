@@ -1,6 +1,8 @@
 import os
+import sys
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,15 +34,18 @@ INSTALLED_APPS = [
 
 # Response compression middleware
 MIDDLEWARE = [
+    'ticketing_system.middleware.ProfilingMiddleware',  # Stack profiles of slow or admin-requested requests
+    'ticketing_system.middleware.QueryInstrumentationMiddleware',  # Query counts, Server-Timing, request logs
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.middleware.gzip.GZipMiddleware',  # Add compression
+    'ticketing_system.middleware.FileAwareGZipMiddleware',  # Add compression (skips file downloads)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ticketing_system.middleware.ReplicaRoutingMiddleware',  # Read-only views read from replicas
 ]
 
 ROOT_URLCONF = 'ticketing_system.urls'
@@ -65,13 +70,93 @@ WSGI_APPLICATION = 'ticketing_system.wsgi.application'
 ASGI_APPLICATION = 'ticketing_system.asgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# DB_ENGINE selects the profile: 'sqlite' (default, single server) or 'postgres'.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+# SQLite tuned for concurrent writers (ticketing_system/sqlite3/base.py): WAL so
+# readers and the writer do not block each other, IMMEDIATE transactions so
+# writers wait on the busy timeout instead of failing with "database is locked",
+# and persistent connections. Compare profiles with `manage.py bench_sqlite_writes`.
+SQLITE_OPTIONS = {
+    'timeout': 20,  # busy timeout (seconds)
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'  # durable at checkpoints; safe with WAL
+        'PRAGMA mmap_size=268435456;'  # 256MB
+        'PRAGMA cache_size=-65536;'  # 64MB
+        'PRAGMA temp_store=MEMORY'
+    ),
 }
 
+if DB_ENGINE == 'postgres':
+    # Persistent connections per worker; put PgBouncer in front for pooling
+    # across workers. In transaction pooling mode server-side cursors do not
+    # survive between transactions: set DB_DISABLE_SERVER_SIDE_CURSORS=True.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='ticketing'),
+            'USER': config('DB_USER', default='ticketing'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default=5432, cast=int),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+                'application_name': 'ticketing_system',
+            },
+        }
+    }
+    # Read replicas: same credentials, one alias per DB_REPLICA_HOSTS entry (host or host:port)
+    for index, replica in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+        replica_host, _, replica_port = replica.partition(':')
+        DATABASES[f'replica_{index}'] = dict(
+            DATABASES['default'],
+            HOST=replica_host,
+            PORT=int(replica_port) if replica_port else DATABASES['default']['PORT'],
+            TEST={'MIRROR': 'default'},
+        )
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'ticketing_system.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgres', not {DB_ENGINE!r}")
+
+# Read-replica routing (ticketing_system/db_router.py)
+DATABASE_ROUTERS = ['ticketing_system.db_router.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+# Replicas lagging more than this (seconds) are skipped; users who just wrote stay on the primary
+READ_REPLICA_MAX_LAG = config('READ_REPLICA_MAX_LAG', default=5, cast=float)
+READ_REPLICA_LAG_CHECK_INTERVAL = config('READ_REPLICA_LAG_CHECK_INTERVAL', default=2, cast=float)
+READ_REPLICA_VIEW_MODULES = ['reports.views']
+READ_REPLICA_VIEWS = ['users.views.admin_dashboard_stats', 'users.views.recent_activity']
+
+# Rows fetched per round trip by the long report scans (server-side cursors on PostgreSQL)
+REPORT_SCAN_CHUNK_SIZE = config('REPORT_SCAN_CHUNK_SIZE', default=2000, cast=int)
+
+# Password hashing: PBKDF2 with a configurable work factor (users/hashers.py).
+# Benchmark with `manage.py bench_login` before changing it; existing hashes
+# are re-encoded on each user's next login, which also revokes that user's
+# older tokens (CHECK_REVOKE_TOKEN).
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=720000, cast=int)
+PASSWORD_HASHERS = [
+    'users.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,7 +202,7 @@ AUTHENTICATION_BACKENDS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -132,6 +217,90 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Tokens carry a hash of the password: changing it revokes them, and it
+    # versions the authenticated-user cache (users/authentication.py)
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+# Seconds between batched last_login/last_logout writes (users/activity.py); 0 writes immediately
+AUTH_TIMESTAMP_FLUSH_INTERVAL = config('AUTH_TIMESTAMP_FLUSH_INTERVAL', default=5, cast=int)
+
+# Per-process cache of authenticated users (seconds / entries)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+
+# Token revocation (users/revocation.py): in-memory in every worker, synced
+# through the default cache at most every AUTH_REVOCATION_SYNC_INTERVAL seconds
+AUTH_REVOCATION_SYNC_INTERVAL = config('AUTH_REVOCATION_SYNC_INTERVAL', default=1, cast=float)
+AUTH_REVOCATION_BLOOM_CAPACITY = 100000
+
+# Cache shared by all workers, e.g. redis://localhost:6379/1. Without it each
+# worker has a private local-memory cache and revocations stay in that worker.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Request instrumentation (ticketing_system/middleware.py). Requests above a
+# threshold are logged at WARNING with their repeated SQL; set
+# REQUEST_LOG_LEVEL=INFO to log every request.
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)
+REQUEST_METRICS_QUERY_THRESHOLD = config('REQUEST_METRICS_QUERY_THRESHOLD', default=30, cast=int)
+REQUEST_METRICS_DUPLICATE_THRESHOLD = config('REQUEST_METRICS_DUPLICATE_THRESHOLD', default=5, cast=int)
+REQUEST_METRICS_SLOW_MS = config('REQUEST_METRICS_SLOW_MS', default=1000, cast=int)
+
+# Query health report served by /api/performance-stats/ (tickets/query_health.py):
+# kept this long in the cache, or refreshed by ``manage.py query_health --store``
+QUERY_HEALTH_REPORT_TTL = config('QUERY_HEALTH_REPORT_TTL', default=3600, cast=int)
+
+# Runtime metrics (reports/metrics.py): per-endpoint latency histograms in
+# windows of METRICS_WINDOW_SECONDS, stored per worker for METRICS_RETENTION_DAYS.
+# /metrics serves them in Prometheus format to scrapers sending METRICS_TOKEN as
+# a Bearer token. Without a token it only answers in DEBUG or to the addresses in
+# METRICS_ALLOWED_IPS (REMOTE_ADDR: behind a local proxy every client is 127.0.0.1).
+METRICS_WINDOW_SECONDS = config('METRICS_WINDOW_SECONDS', default=60, cast=int)
+METRICS_RING_SIZE = 60
+METRICS_PERSIST = config('METRICS_PERSIST', default=True, cast=bool)
+METRICS_RETENTION_DAYS = config('METRICS_RETENTION_DAYS', default=30, cast=int)
+METRICS_APDEX_MS = config('METRICS_APDEX_MS', default=500, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+# Request profiling (reports/profiling.py): admins add ?profile=1 or an
+# X-Profile-Request: 1 header; with PROFILING_SLOW_MS set, any request running
+# longer is profiled from that point on (0 disables). The newest
+# PROFILING_KEEP profiles are kept, listed at /api/reports/profiles/.
+PROFILING_SLOW_MS = config('PROFILING_SLOW_MS', default=0, cast=int)
+PROFILING_INTERVAL_MS = config('PROFILING_INTERVAL_MS', default=5, cast=float)
+PROFILING_MAX_SAMPLES = 20000
+PROFILING_KEEP = config('PROFILING_KEEP', default=100, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'ticketing_system.requests': {
+            'handlers': ['console'],
+            # The query budget tests run over-threshold requests on purpose: keep their output clean
+            'level': 'CRITICAL' if sys.argv[1:2] == ['test'] else config('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
 # CORS settings
@@ -164,19 +333,106 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'upload-offset',
+    'upload-checksum',
 ]
 
 # Channels configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# Without REDIS_URL the in-process layer is used, which only fans out to sockets
+# connected to the same worker. Set REDIS_URL (comma separated for sharding) to
+# run several ASGI workers behind a shared Redis-protocol server.
+REDIS_URL = config('REDIS_URL', default='', cast=Csv())
+CHANNEL_LAYER_BACKEND = config('CHANNEL_LAYER_BACKEND', default='pubsub' if REDIS_URL else 'memory')
+
+if CHANNEL_LAYER_BACKEND == 'pubsub':
+    # Pure PUBLISH/SUBSCRIBE fan-out: lowest latency, no message persistence
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': REDIS_URL,
+                'prefix': config('CHANNEL_LAYER_PREFIX', default='ticketing'),
+            },
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == 'redis':
+    # Sorted-set based layer with per-channel capacity and expiry (requires a real Redis)
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': REDIS_URL,
+                'prefix': config('CHANNEL_LAYER_PREFIX', default='ticketing'),
+                'capacity': config('CHANNEL_LAYER_CAPACITY', default=1000, cast=int),
+                'expiry': config('CHANNEL_LAYER_EXPIRY', default=60, cast=int),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Chat write-behind: broadcast immediately and persist TicketMessage rows in
+# small bulk_create batches (bounded by size and time) instead of one INSERT each
+CHAT_WRITE_BEHIND = config('CHAT_WRITE_BEHIND', default=False, cast=bool)
+CHAT_WRITE_BEHIND_BATCH_SIZE = 50
+CHAT_WRITE_BEHIND_FLUSH_INTERVAL = 0.05  # seconds
+CHAT_WRITE_BEHIND_MAX_QUEUE = 1000  # enqueue waits when full (backpressure)
+
+# Chat reconnect replay: per-ticket in-memory ring buffer, then a
+# (ticket, created_at) range query when the buffer does not cover the gap
+CHAT_HISTORY_BUFFER_SIZE = 200
+CHAT_REPLAY_LIMIT = 500
 
 # File upload settings
 MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100MB (increased for video files)
 ALLOWED_FILE_TYPES = ['jpg', 'jpeg', 'png', 'pdf', 'txt', 'log', 'docx', 'xlsx', 'mp4', 'avi', 'mov', 'wmv', 'flv', 'webm', 'mkv']
 MAX_ATTACHMENTS_PER_TICKET = 5
+MAX_ATTACHMENT_BYTES_PER_TICKET = 500 * 1024 * 1024  # 500MB, enforced with Ticket.attachment_bytes
+
+# Resumable chunked uploads (tickets/uploads.py)
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # Recommended chunk size returned to clients
+UPLOAD_CHUNK_MAX_SIZE = 16 * 1024 * 1024  # Larger PUT bodies are rejected
+UPLOAD_SESSION_TTL_HOURS = 24  # Idle pending sessions are expired by cleanup_upload_sessions
+
+# Attachment downloads (tickets/downloads.py): signed, permission-checked URLs
+# with Range/ETag support. Set ATTACHMENT_SENDFILE to 'x-accel-redirect' (nginx)
+# or 'x-sendfile' (Apache/lighttpd) to let the front-end server stream the bytes.
+ATTACHMENT_URL_MAX_AGE = config('ATTACHMENT_URL_MAX_AGE', default=3600, cast=int)  # seconds
+ATTACHMENT_SENDFILE = config('ATTACHMENT_SENDFILE', default='')
+ATTACHMENT_SENDFILE_PREFIX = config('ATTACHMENT_SENDFILE_PREFIX', default='/protected-media/')  # nginx internal location
+
+# Attachment thumbnails / previews (tickets/previews.py), generated in a
+# background thread pool and stored beside the blob
+ATTACHMENT_PREVIEWS = config('ATTACHMENT_PREVIEWS', default=True, cast=bool)
+ATTACHMENT_PREVIEW_WORKERS = 2
+ATTACHMENT_THUMBNAIL_SIZE = 480  # px, longest side (ticket page cards)
+ATTACHMENT_PREVIEW_SIZE = 1280  # px, longest side (video posters, PDF first page)
+
+# Attachment storage tiering (tickets/tiering.py, manage.py tier_attachments):
+# text attachments are compressed in place, blobs only referenced by tickets
+# closed for ATTACHMENT_ARCHIVE_AFTER_DAYS move to the archive storage backend
+ATTACHMENT_ARCHIVE_ROOT = config('ATTACHMENT_ARCHIVE_ROOT', default=os.path.join(BASE_DIR, 'archive'))
+ATTACHMENT_ARCHIVE_AFTER_DAYS = 365
+ATTACHMENT_COMPRESSIBLE_TYPES = ['txt', 'log']
+ATTACHMENT_COMPRESSION = config('ATTACHMENT_COMPRESSION', default='zstd')  # gzip when zstandard is not installed
+ATTACHMENT_COMPRESS_MIN_SIZE = 4 * 1024  # smaller files are left alone
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'attachment_archive': {
+        'BACKEND': config('ATTACHMENT_ARCHIVE_BACKEND', default='django.core.files.storage.FileSystemStorage'),
+        'OPTIONS': {'location': ATTACHMENT_ARCHIVE_ROOT},
+    },
+}
 
 # Priority mapping configuration
 PRIORITY_MAPPING = {
@@ -0,0 +1,41 @@
+"""
+SQLite backend tuned for several concurrent writers.
+
+Stock Django 5.0 opens SQLite in rollback-journal mode and starts transactions
+with a deferred ``BEGIN``. A transaction that reads first (every ticket
+transition snapshots before it saves) and then writes must upgrade its lock;
+when another connection got there first the upgrade fails at once with
+"database is locked", whatever the timeout.
+
+This backend, selected with ENGINE 'ticketing_system.sqlite3', accepts the two
+options Django 5.1 added for this, so it can be dropped on upgrade:
+
+- ``init_command``: ``;``-separated statements run on every new connection
+  (the PRAGMAs in settings.DATABASES)
+- ``transaction_mode``: ``'IMMEDIATE'`` takes the write lock when the atomic
+  block starts, so concurrent writers queue on the busy timeout
+  (``timeout``) instead of failing
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.init_command = kwargs.pop('init_command', '')
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.init_command.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
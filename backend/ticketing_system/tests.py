@@ -0,0 +1,68 @@
+from importlib import import_module
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reports.views import _scan
+from tickets.models import Ticket
+from users.models import User
+
+from .db_router import ReplicaPool, RoutingState, request_routing
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL profile only (DB_ENGINE=postgres)')
+class PostgresProfileTests(TransactionTestCase):
+    """
+    What only runs on the PostgreSQL profile; the CI 'postgres' job runs these
+    with DB_REPLICA_HOSTS pointing at the primary, a test mirror of 'default'.
+    """
+
+    databases = '__all__'
+
+    def test_postgres_indexes_exist(self):
+        migration = import_module('tickets.migrations.0016_postgres_indexes')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename LIKE 'tickets_%%'")
+            existing = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual({name for name, definition in migration.POSTGRES_INDEXES}, existing)
+
+    def test_report_scans_use_server_side_cursors(self):
+        cursors = []
+        chunked_cursor = connection.chunked_cursor
+
+        def recording_chunked_cursor():
+            cursors.append(chunked_cursor())
+            return cursors[-1]
+
+        with mock.patch.object(connection, 'chunked_cursor', recording_chunked_cursor):
+            list(_scan(Ticket.objects.all(), 'id', 'created_at'))
+        self.assertEqual(len(cursors), 1)
+        # psycopg names server-side cursors; client-side ones have no name
+        self.assertTrue(getattr(cursors[0].cursor, 'name', None))
+
+    @skipUnless(settings.DATABASE_REPLICAS, 'needs DB_REPLICA_HOSTS')
+    def test_replica_lag_query(self):
+        # A primary is not in recovery: no lag
+        self.assertEqual(ReplicaPool().measure_lag(settings.DATABASE_REPLICAS[0]), 0.0)
+
+    @skipUnless(settings.DATABASE_REPLICAS, 'needs DB_REPLICA_HOSTS')
+    def test_read_only_requests_read_from_the_replica(self):
+        alias = settings.DATABASE_REPLICAS[0]
+        state = RoutingState()
+        state.alias = alias
+        reset_token = request_routing.set(state)
+        try:
+            self.assertEqual(router.db_for_read(Ticket), alias)
+        finally:
+            request_routing.reset(reset_token)
+
+        admin = User.objects.create_user('replica.admin@example.com', password='motdepasse-solide-42', role='admin')
+        access = RefreshToken.for_user(admin).access_token
+        with CaptureQueriesContext(connections[alias]) as replica_queries:
+            response = self.client.get('/api/reports/technicians-list/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
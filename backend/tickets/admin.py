@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Ticket, TicketAttachment, TicketEvent, TicketMessage
+from .models import AttachmentBlob, Ticket, TicketAttachment, TicketEvent, TicketMessage
 
 
 @admin.register(Ticket)
@@ -9,6 +9,7 @@ class TicketAdmin(admin.ModelAdmin):
     search_fields = ('short_id', 'subject', 'description', 'requester__email', 'assigned_to__email')
     readonly_fields = ('short_id', 'priority', 'created_at', 'updated_at', 'closed_at')
     ordering = ('-priority', '-created_at')
+    filter_horizontal = ('additional_technicians',)
     
     fieldsets = (
         ('Basic Information', {
@@ -18,13 +19,28 @@ class TicketAdmin(admin.ModelAdmin):
             'fields': ('status',)
         }),
         ('Assignment', {
-            'fields': ('requester', 'assigned_to')
+            'fields': ('requester', 'assigned_to', 'claimed_by', 'additional_technicians')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'closed_at'),
             'classes': ('collapse',)
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        # Edits made here move the dashboard counters like the API transitions do.
+        # The admin saves in a transaction: lock the row for the snapshot, and publish
+        # in save_related, once the additional technicians are saved too.
+        from .live_updates import live_updates
+        form.dashboard_before = (
+            live_updates.snapshot(Ticket.objects.select_for_update().get(pk=obj.pk)) if change else None
+        )
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        from .live_updates import live_updates
+        super().save_related(request, form, formsets, change)
+        live_updates.ticket_changed(form.instance, 'updated' if change else 'created', request.user, form.dashboard_before)
 
 
 @admin.register(TicketAttachment)
@@ -32,10 +48,18 @@ class TicketAttachmentAdmin(admin.ModelAdmin):
     list_display = ('file_name', 'ticket', 'mime_type', 'size_bytes', 'uploaded_by', 'created_at')
     list_filter = ('mime_type', 'created_at')
     search_fields = ('file_name', 'ticket__short_id', 'uploaded_by__email')
-    readonly_fields = ('id', 'created_at')
+    readonly_fields = ('id', 'blob', 'created_at')
     ordering = ('-created_at',)
 
 
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size_bytes', 'ref_count', 'created_at')
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'size_bytes', 'file', 'ref_count', 'created_at')
+    ordering = ('-ref_count',)
+
+
 @admin.register(TicketEvent)
 class TicketEventAdmin(admin.ModelAdmin):
     list_display = ('ticket', 'event_type', 'actor', 'from_value', 'to_value', 'created_at')
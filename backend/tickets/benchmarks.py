@@ -0,0 +1,279 @@
+"""
+Microbenchmarks of the hot paths (``manage.py bench_hot_paths``).
+
+Each benchmark prepares its inputs outside the timed region and returns the
+callable to time with the number of units it processes, so results read as
+"ms per serialized row" or "ms per call". Every run records the median and
+minimum of several samples and the number of SQL queries, and is compared
+with a JSON baseline: a minimum (the sample least disturbed by the rest of the
+machine) slower than the baseline by more than the threshold and by more than
+NOISE_FLOOR_MS, or any additional query, is a regression. Query counts do not depend on the machine, timings do, so
+baselines are only compared when recorded on the same dataset and database.
+
+The suite runs against a temporary database seeded by tickets/seeding.py with
+a fixed random seed.
+"""
+
+import json
+import math
+import platform
+import statistics
+import time
+
+import django
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.models import User
+
+from .email_service import email_service
+from .models import Ticket, TicketClosureReport, TicketEvent
+from .serializers import TicketListSerializer, TicketSerializer
+from .views import TicketDetailView, TicketListView
+
+DEFAULT_THRESHOLD = 0.2
+# Slowdowns smaller than this (per unit) are measurement noise
+NOISE_FLOOR_MS = 0.05
+# Fast benchmarks are looped so each sample lasts at least this long
+MIN_SAMPLE_MS = 50
+
+SERIALIZED_ROWS = 200
+REPORT_PARAMS = {'time_filter': 'month'}
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register ``prepare(env) -> (run, units)`` under ``name``"""
+    def register(prepare):
+        BENCHMARKS.append((name, prepare))
+        return prepare
+    return register
+
+
+class Environment:
+    """Sample users and a request factory shared by the benchmarks"""
+
+    def __init__(self):
+        self.factory = APIRequestFactory()
+        self.users = {
+            role: User.objects.filter(role=role, email__startswith='seed.').order_by('email').first()
+            for role in ('admin', 'technician', 'employee')
+        }
+        self.ticket = (
+            Ticket.objects.filter(status='closed', claimed_by__isnull=False, closure_reports__isnull=False)
+            .order_by('short_id').first()
+        )
+
+    def view(self, view_class, role, params=None, **kwargs):
+        """A DRF view instance set up as for a GET by the sample user of ``role``"""
+        request = self.factory.get('/', params or {})
+        force_authenticate(request, user=self.users[role])
+        view = view_class()
+        view.setup(request, **kwargs)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        return view
+
+
+# Serializers
+
+@benchmark('serializer.ticket_list')
+def _ticket_list_serializer(env):
+    view = env.view(TicketListView, 'admin')
+    tickets = list(view.get_queryset()[:SERIALIZED_ROWS])
+    context = view.get_serializer_context()
+    return lambda: TicketListSerializer(tickets, many=True, context=context).data, len(tickets)
+
+
+@benchmark('serializer.ticket_detail')
+def _ticket_detail_serializer(env):
+    view = env.view(TicketDetailView, 'admin')
+    tickets = list(view.get_queryset().order_by('-created_at')[:SERIALIZED_ROWS // 4])
+    context = view.get_serializer_context()
+    return lambda: TicketSerializer(tickets, many=True, context=context).data, len(tickets)
+
+
+# Querysets: first page of the ticket list, as each role sees it
+
+def _ticket_list_queryset(role, params, env):
+    def run():
+        view = env.view(TicketListView, role, params)
+        return list(view.get_queryset()[:20])
+    return run, 1
+
+
+for _role, _params in (
+    ('admin', {}),
+    ('technician', {}),
+    ('technician', {'filter': 'unassigned'}),
+    ('employee', {}),
+):
+    _suffix = f".{_params['filter']}" if _params else ''
+    benchmark(f'queryset.ticket_list.{_role}{_suffix}')(
+        lambda env, role=_role, params=_params: _ticket_list_queryset(role, params, env)
+    )
+
+
+# Report views: every URL of reports/urls.py without arguments, as the admin
+
+def _report_view(view_func, env):
+    def run():
+        request = env.factory.get('/', REPORT_PARAMS)
+        force_authenticate(request, user=env.users['admin'])
+        response = view_func(request)
+        if response.status_code != 200:
+            raise RuntimeError(f'{view_func.__name__} returned {response.status_code}')
+        return response
+    return run, 1
+
+
+def _register_reports():
+    from reports import urls as report_urls
+    for pattern in report_urls.urlpatterns:
+        # Downloads of one stored object (profiles/<int:profile_id>/) have nothing to look up here
+        if pattern.pattern.converters:
+            continue
+        benchmark(f'report.{pattern.name}')(
+            lambda env, view_func=pattern.callback: _report_view(view_func, env)
+        )
+
+
+_register_reports()
+
+
+# Ticket.save(): short id generation and priority lookup, rolled back
+
+@benchmark('model.ticket_save')
+def _ticket_save(env):
+    requester = env.users['employee']
+
+    def run():
+        with transaction.atomic():
+            Ticket(subject='Benchmark', type='Software', description='Benchmark', requester=requester).save()
+            transaction.set_rollback(True)
+    return run, 1
+
+
+# Email notifications: template rendering and message building (locmem backend)
+
+def _email(notify, env):
+    ticket = env.ticket
+    event = TicketEvent.objects.filter(ticket=ticket).order_by('created_at').last()
+    technician = env.users['technician']
+    closure_report = TicketClosureReport.objects.filter(ticket=ticket).first()
+    calls = {
+        'ticket_created': lambda: email_service.notify_ticket_created(ticket),
+        'ticket_claimed': lambda: email_service.notify_ticket_claimed(ticket, event),
+        'ticket_closed': lambda: email_service.notify_ticket_closed(ticket, event),
+        'ticket_reopened': lambda: email_service.notify_ticket_reopened(ticket, event),
+        'technician_added': lambda: email_service.notify_technician_added(ticket, event, technician),
+        'admin_closure_report': lambda: email_service.notify_admin_closure_report(ticket, closure_report),
+        'admin_user_changed': lambda: email_service.notify_admin_user_changed(
+            technician, {'phone': {'old': '0600000000', 'new': '0611111111'}}
+        ),
+    }
+    return calls[notify], 1
+
+
+for _notify in (
+    'ticket_created', 'ticket_claimed', 'ticket_closed', 'ticket_reopened',
+    'technician_added', 'admin_closure_report', 'admin_user_changed',
+):
+    benchmark(f'email.{_notify}')(lambda env, notify=_notify: _email(notify, env))
+
+
+def measure(run, units, repeat):
+    """
+    Warm up once (counting queries), then time ``repeat`` samples of
+    enough calls to last MIN_SAMPLE_MS each
+    """
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(count):
+        run()
+    loops = max(1, math.ceil(MIN_SAMPLE_MS / max((time.perf_counter() - started) * 1000, 1e-3)))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        samples.append((time.perf_counter() - started) * 1000 / loops / units)
+    return {
+        'median_ms': round(statistics.median(samples), 4),
+        'min_ms': round(min(samples), 4),
+        'units': units,
+        'queries': len(queries),
+    }
+
+
+def run_benchmarks(repeat=5, only=None, names=None, progress=None):
+    """
+    ``{name: result}`` for every benchmark (``only``: name prefixes to run,
+    ``names``: exact names to run)
+    """
+    env = Environment()
+    if None in env.users.values() or env.ticket is None:
+        raise RuntimeError('The database has no seeded data to benchmark')
+    results = {}
+    for name, prepare in BENCHMARKS:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        if names is not None and name not in names:
+            continue
+        run, units = prepare(env)
+        results[name] = measure(run, units, repeat)
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def environment_info(tickets):
+    return {
+        'tickets': tickets,
+        'database': connection.vendor,
+        'database_version': '.'.join(str(part) for part in connection.Database.sqlite_version_info)
+        if connection.vendor == 'sqlite' else None,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+    }
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path, info, results, threshold=DEFAULT_THRESHOLD):
+    with open(path, 'w') as baseline:
+        json.dump({'environment': info, 'threshold': threshold, 'benchmarks': results}, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
+
+
+def compare(baseline, results, threshold=None):
+    """
+    ``{name: (change ratio or None, regressions)}`` against ``baseline``;
+    ``regressions`` lists what got worse beyond the threshold.
+    """
+    threshold = baseline.get('threshold', DEFAULT_THRESHOLD) if threshold is None else threshold
+    comparison = {}
+    for name, result in results.items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            comparison[name] = (None, [])
+            continue
+        regressions = []
+        change = result['min_ms'] / reference['min_ms'] - 1 if reference['min_ms'] else None
+        slower_by = result['min_ms'] - reference['min_ms']
+        if change is not None and change > threshold and slower_by > NOISE_FLOOR_MS:
+            regressions.append(f"{change:+.0%} time ({reference['min_ms']:.3f} -> {result['min_ms']:.3f} ms)")
+        if result['queries'] > reference['queries']:
+            regressions.append(f"{reference['queries']} -> {result['queries']} queries")
+        comparison[name] = (change, regressions)
+    return comparison
@@ -0,0 +1,161 @@
+"""
+Content-addressed storage for attachment files.
+
+Every file is hashed while it is streamed to disk and stored once under
+``blobs/<aa>/<bb>/<sha256>``. Attachments (ticket and closure report) point
+their ``storage_url`` at the shared blob and hold a reference on it; the
+blob file is deleted when the last reference goes away.
+
+tickets/tiering.py may later compress a blob (``encoding``) or move it to the
+archive storage (``tier``); always read blobs through ``open_blob()``.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import uuid
+
+from django.core.files.storage import default_storage, storages
+from django.db import transaction
+from django.db.models import F
+
+from .models import AttachmentBlob, TicketAttachment, attachment_blob_path
+from .quotas import reserve_attachment_quota
+from .previews import schedule_previews, delete_previews
+from .uploads import STREAM_BLOCK_SIZE
+
+try:
+    import zstandard
+except ImportError:  # optional: tiering falls back to gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+def blob_storage(blob):
+    """Storage backend holding the blob's file for its current tier"""
+    return storages['attachment_archive'] if blob.tier == 'archive' else default_storage
+
+
+class _GzipReader(gzip.GzipFile):
+    """GzipFile that also closes the underlying storage file"""
+
+    def close(self):
+        fileobj = self.fileobj
+        super().close()
+        if fileobj is not None:
+            fileobj.close()
+
+
+def open_blob(blob, decompress=True):
+    """Open the blob for reading, decompressing on the fly unless ``decompress`` is False"""
+    fileobj = blob_storage(blob).open(blob.file.name, 'rb')
+    if not decompress or not blob.encoding:
+        return fileobj
+    if blob.encoding == 'gzip':
+        return _GzipReader(fileobj=fileobj, mode='rb')
+    if blob.encoding == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=True)
+    fileobj.close()
+    raise ValueError(f'Unknown blob encoding {blob.encoding}')
+
+
+def _temp_path():
+    path = default_storage.path(f'blobs/tmp/{uuid.uuid4()}.tmp')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _adopt(temp_path, sha256, size):
+    """Move a fully written temp file into the store, or drop it if the content exists"""
+    name = attachment_blob_path(sha256)
+    final_path = default_storage.path(name)
+
+    with transaction.atomic():
+        blob, created = AttachmentBlob.objects.select_for_update().get_or_create(
+            sha256=sha256,
+            defaults={'size_bytes': size, 'stored_size': size, 'file': name, 'ref_count': 1}
+        )
+        if not created:
+            AttachmentBlob.objects.filter(pk=sha256).update(ref_count=F('ref_count') + 1)
+            blob.ref_count += 1
+
+        if created or not blob_storage(blob).exists(blob.file.name):
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+            if not created:
+                # The stored copy was lost: the new upload becomes the hot, uncompressed copy
+                AttachmentBlob.objects.filter(pk=sha256).update(file=name, tier='hot', encoding='', stored_size=size)
+                blob.file.name, blob.tier, blob.encoding, blob.stored_size = name, 'hot', '', size
+        else:
+            os.remove(temp_path)
+
+    return blob
+
+
+def store_uploaded_file(uploaded_file):
+    """Store a Django UploadedFile, hashing it while it is written. Returns the blob."""
+    temp_path = _temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as destination:
+            for chunk in uploaded_file.chunks(STREAM_BLOCK_SIZE):
+                destination.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        return _adopt(temp_path, digest.hexdigest(), size)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def store_file_path(path, sha256=None):
+    """
+    Move an existing file (e.g. a finished chunked upload) into the store.
+    ``sha256`` may be passed when the caller has already verified it.
+    """
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(STREAM_BLOCK_SIZE), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+    return _adopt(path, sha256, os.path.getsize(path))
+
+
+def release_blob(sha256):
+    """Drop one reference; delete the file and row when none remain"""
+    with transaction.atomic():
+        AttachmentBlob.objects.filter(pk=sha256, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        blob = AttachmentBlob.objects.select_for_update().filter(pk=sha256, ref_count__lte=0).first()
+        if blob is None:
+            return
+        # Remove the file before the row is gone so a concurrent upload of the
+        # same content recreates both rather than losing its file
+        try:
+            blob_storage(blob).delete(blob.file.name)
+            delete_previews(blob)
+        except OSError as e:
+            logger.error(f"Failed to delete blob {sha256}: {str(e)}")
+        blob.delete()
+
+
+def create_attachment(model, blob, **fields):
+    """
+    Create a TicketAttachment / TicketClosureReportAttachment backed by ``blob``.
+    Ticket attachments take their quota in the same transaction (ValidationError when full).
+    """
+    attachment = model(blob=blob, storage_url=blob.file.name, size_bytes=blob.size_bytes, **fields)
+    try:
+        with transaction.atomic():
+            if isinstance(attachment, TicketAttachment):
+                reserve_attachment_quota(attachment.ticket_id, attachment.size_bytes)
+            attachment.save(force_insert=True)
+    except Exception:
+        release_blob(blob.sha256)
+        raise
+    schedule_previews(blob, attachment.mime_type)
+    return attachment
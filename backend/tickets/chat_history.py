@@ -0,0 +1,145 @@
+"""
+Bounded in-memory chat history used to replay missed messages on reconnect.
+
+Each process keeps a ring buffer per ticket group, fed by the consumers it
+hosts. A buffer only knows about messages broadcast while at least one local
+socket was in the group, so it records when that coverage started and is
+dropped when the last local socket leaves. Gaps it cannot cover fall back to
+an indexed (ticket, created_at) range query.
+"""
+
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TicketMessage
+
+
+class ChatHistoryBuffer:
+    def __init__(self, size):
+        self.entries = deque(maxlen=size)
+        self.ids = set()
+        # Every message broadcast after this instant is in the buffer (until evicted)
+        self.covered_since = timezone.now()
+        self.members = 0
+
+    def append(self, event):
+        message_id = event['message_id']
+        if message_id in self.ids:
+            return
+        if len(self.entries) == self.entries.maxlen:
+            self.ids.discard(self.entries[0]['message_id'])
+        self.entries.append(event)
+        self.ids.add(message_id)
+
+    def since_id(self, message_id):
+        """Messages after ``message_id``, or None if the buffer cannot tell"""
+        if message_id not in self.ids:
+            return None
+        entries = list(self.entries)
+        for index, entry in enumerate(entries):
+            if entry['message_id'] == message_id:
+                return entries[index + 1:]
+        return None
+
+    def since_timestamp(self, since):
+        """Messages after ``since``, or None if the gap predates the buffer"""
+        if since < self.covered_since:
+            return None
+        entries = list(self.entries)
+        # An evicted message newer than the cursor would leave a hole
+        if len(entries) == self.entries.maxlen and _parse(entries[0]['timestamp']) > since:
+            return None
+        return [entry for entry in entries if _parse(entry['timestamp']) > since]
+
+
+_buffers = {}
+
+
+def join(group):
+    buffer = _buffers.get(group)
+    if buffer is None:
+        buffer = ChatHistoryBuffer(getattr(settings, 'CHAT_HISTORY_BUFFER_SIZE', 200))
+        _buffers[group] = buffer
+    buffer.members += 1
+    return buffer
+
+
+def leave(group):
+    buffer = _buffers.get(group)
+    if buffer is not None:
+        buffer.members -= 1
+        if buffer.members <= 0:
+            # Nobody local is listening any more, so coverage would have gaps
+            del _buffers[group]
+
+
+def record(group, event):
+    buffer = _buffers.get(group)
+    if buffer is not None:
+        buffer.append(event)
+
+
+def _parse(value):
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_cursor(since):
+    """A cursor is either a message id or an ISO-8601 timestamp"""
+    try:
+        return None, _parse(since)
+    except ValueError:
+        return since, None
+
+
+def missed_from_buffer(group, since):
+    buffer = _buffers.get(group)
+    if buffer is None:
+        return None
+    message_id, timestamp = parse_cursor(since)
+    if message_id is not None:
+        return buffer.since_id(message_id)
+    return buffer.since_timestamp(timestamp)
+
+
+def missed_from_database(ticket_id, since, limit):
+    """
+    Range query on the (ticket, created_at) index.
+    Returns ``(events, complete)``; ``complete`` is False when the cursor is
+    unknown or more than ``limit`` messages were missed.
+    """
+    message_id, timestamp = parse_cursor(since)
+    queryset = TicketMessage.objects.filter(ticket_id=ticket_id)
+
+    if message_id is not None:
+        try:
+            timestamp = queryset.filter(id=message_id).values_list('created_at', flat=True).first()
+        except Exception:
+            timestamp = None
+        if timestamp is None:
+            return [], False
+        # Same-microsecond neighbours are re-sent; clients de-duplicate on message_id
+        queryset = queryset.filter(created_at__gte=timestamp).exclude(id=message_id)
+    else:
+        queryset = queryset.filter(created_at__gt=timestamp)
+
+    rows = list(
+        queryset.order_by('created_at').values('id', 'sender_id', 'message_text', 'created_at')[:limit + 1]
+    )
+    events = [
+        {
+            'message_id': str(row['id']),
+            'message': row['message_text'],
+            'user_id': str(row['sender_id']),
+            'timestamp': row['created_at'].isoformat(),
+        }
+        for row in rows[:limit]
+    ]
+    return events, len(rows) <= limit
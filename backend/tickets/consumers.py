@@ -1,75 +1,217 @@
 import json
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from . import chat_history
+from .live_updates import role_group_name, user_group_name
 from .models import Ticket, TicketMessage
+from .write_behind import get_write_buffer
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Application close codes (4000-4999 are reserved for applications)
+CLOSE_UNAUTHENTICATED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
 
 class TicketChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.ticket_id = self.scope['url_route']['kwargs']['ticket_id']
         self.room_group_name = f'ticket_{self.ticket_id}'
-        
+        self.joined = False
+        self.write_behind = getattr(settings, 'CHAT_WRITE_BEHIND', False)
+        self.replayed_ids = set()
+
+        # Authenticate once: scope['user'] is resolved from the JWT by JWTAuthMiddleware
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+
+        # Load the ticket and decide access once for the lifetime of the connection
+        self.ticket = await self.get_ticket()
+        if self.ticket is None:
+            await self.close(code=CLOSE_NOT_FOUND)
+            return
+
+        self.can_post = self.user.is_technician or self.ticket.requester_id == self.user.id
+        if not (self.can_post or self.user.is_admin):
+            await self.close(code=CLOSE_FORBIDDEN)
+            return
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
+        self.joined = True
+        chat_history.join(self.room_group_name)
+
         await self.accept()
-    
+
+        # Resume: stream only the messages missed since the client's cursor
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        if query.get('since'):
+            await self.replay_missed(query['since'][0])
+
     async def disconnect(self, close_code):
+        # Make sure everything this socket sent is persisted before it goes away
+        if self.write_behind:
+            failed = await get_write_buffer().flush()
+            if failed:
+                logger.error(f"{failed} chat messages could not be persisted before {self.channel_name} disconnected")
+
         # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
-    
+        if self.joined:
+            chat_history.leave(self.room_group_name)
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
         message_type = text_data_json.get('type', 'message')
-        
+
         if message_type == 'message':
+            if not self.can_post:
+                await self.send(text_data=json.dumps({
+                    'type': 'error',
+                    'error': 'You are not allowed to post on this ticket'
+                }))
+                return
+
             message_text = text_data_json['message']
-            user_id = text_data_json['user_id']
-            
-            # Save message to database
-            await self.save_message(message_text, user_id)
-            
+
+            if self.write_behind:
+                # Persisted later in a batch, with the broadcast created_at;
+                # waits only if the buffer is full.
+                message = TicketMessage(
+                    ticket=self.ticket,
+                    sender=self.user,
+                    message_text=message_text,
+                    created_at=timezone.now()
+                )
+                await get_write_buffer().enqueue(message)
+            else:
+                # Save message to database (a single INSERT, user and ticket are cached)
+                message = await self.save_message(message_text)
+
             # Send message to room group
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
                     'type': 'chat_message',
+                    'message_id': str(message.id),
                     'message': message_text,
-                    'user_id': user_id,
-                    'timestamp': text_data_json.get('timestamp')
+                    'user_id': str(self.user.id),
+                    'timestamp': message.created_at.isoformat()
                 }
             )
-    
+
+    async def replay_missed(self, since):
+        limit = getattr(settings, 'CHAT_REPLAY_LIMIT', 500)
+        complete = True
+
+        events = chat_history.missed_from_buffer(self.room_group_name, since)
+        if events is None:
+            # Buffer does not cover the gap: indexed range query instead
+            if self.write_behind:
+                await get_write_buffer().flush()
+            events, complete = await database_sync_to_async(chat_history.missed_from_database)(
+                self.ticket.id, since, limit
+            )
+        elif len(events) > limit:
+            events, complete = events[:limit], False
+
+        for event in events:
+            self.replayed_ids.add(event['message_id'])
+            await self.send(text_data=json.dumps({
+                'type': 'chat_message',
+                'message_id': event['message_id'],
+                'message': event['message'],
+                'user_id': event['user_id'],
+                'timestamp': event['timestamp'],
+                'replay': True
+            }))
+
+        # complete=False: cursor unknown or too far behind, reload the full history
+        await self.send(text_data=json.dumps({
+            'type': 'replay_complete',
+            'count': len(events),
+            'complete': complete
+        }))
+
     async def chat_message(self, event):
+        chat_history.record(self.room_group_name, event)
+
+        # Already delivered during replay
+        if event['message_id'] in self.replayed_ids:
+            self.replayed_ids.discard(event['message_id'])
+            return
+
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'type': 'chat_message',
+            'message_id': event['message_id'],
             'message': event['message'],
             'user_id': event['user_id'],
             'timestamp': event['timestamp']
         }))
-    
+
     @database_sync_to_async
-    def save_message(self, message_text, user_id):
+    def get_ticket(self):
         try:
-            user = User.objects.get(id=user_id)
-            ticket = Ticket.objects.get(id=self.ticket_id)
-            
-            # Check if user has access to this ticket
-            if user.is_technician or ticket.requester == user:
-                TicketMessage.objects.create(
-                    ticket=ticket,
-                    sender=user,
-                    message_text=message_text
-                )
-        except (User.DoesNotExist, Ticket.DoesNotExist):
-            pass 
\ No newline at end of file
+            return Ticket.objects.only('id', 'requester_id').get(id=self.ticket_id)
+        except (Ticket.DoesNotExist, ValidationError):
+            return None
+
+    @database_sync_to_async
+    def save_message(self, message_text):
+        return TicketMessage.objects.create(
+            ticket=self.ticket,
+            sender=self.user,
+            message_text=message_text
+        )
+
+
+class DashboardConsumer(AsyncWebsocketConsumer):
+    """
+    Per-user live feed of ticket lifecycle events and dashboard counter deltas.
+    Clients load the dashboard once over HTTP, then apply the pushed deltas.
+    """
+
+    async def connect(self):
+        self.groups_joined = []
+
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+
+        for group in (user_group_name(self.user.id), role_group_name(self.user.role)):
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_joined.append(group)
+
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        for group in self.groups_joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def ticket_update(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'ticket_update',
+            'event': event['event'],
+            'ticket': event['ticket'],
+            'actor_id': event['actor_id'],
+            'deltas': event['deltas'],
+        }))
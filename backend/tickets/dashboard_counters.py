@@ -0,0 +1,209 @@
+"""
+Incrementally maintained dashboard counters.
+
+A ticket contributes to the counters of several scopes, the same audiences
+that receive live updates:
+
+- ``admin``: totals by status, priority and type
+- ``technicians`` / ``employees``: system-wide counts every technician /
+  employee sees (unclaimed and unassigned open tickets)
+- ``technician:<id>``: tickets the technician claimed or was added to
+- ``requester:<id>``: tickets the user created
+
+Every lifecycle transition stores ``contribution(after) - contribution(before)``
+in the same transaction as the change (LiveUpdateService.ticket_changed), so
+the dashboards read a few indexed rows instead of counting tickets. Ticket
+deletions are handled by signals; changes that bypass the transitions (bulk
+updates, deleted users) are repaired by ``reconcile()`` /
+``manage.py reconcile_dashboard_counters``.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+
+from .models import DashboardCounter, Ticket, TicketEvent
+
+ADMIN = 'admin'
+TECHNICIANS = 'technicians'
+EMPLOYEES = 'employees'
+
+
+def technician_scope(user_id):
+    return f'technician:{user_id}'
+
+
+def requester_scope(user_id):
+    return f'requester:{user_id}'
+
+
+def contributions(state):
+    """
+    ``{scope: {name: value}}`` one ticket adds to the dashboards
+    (``state`` as returned by LiveUpdateService.snapshot, None for no ticket).
+    Names match the /api/auth/dashboard/ payloads; dotted names are nested.
+    """
+    if state is None:
+        return {}
+    status = state['status']
+    scopes = {
+        ADMIN: {
+            'total_tickets': 1,
+            'open_tickets': int(status == 'open'),
+            'closed_tickets': int(status == 'closed'),
+            f"tickets_by_priority.{state['priority']}": 1,
+            f"tickets_by_type.{state['type']}": 1,
+        },
+        TECHNICIANS: {
+            'unassigned_tickets': int(status == 'open' and state['claimed_by_id'] is None),
+            'total_open_tickets': int(status == 'open'),
+        },
+        EMPLOYEES: {
+            'unassigned_tickets': int(status == 'open' and state['assigned_to_id'] is None),
+        },
+        requester_scope(state['requester_id']): {
+            'total_tickets': 1,
+            'opened_tickets': int(status == 'open'),
+            'in_progress_tickets': int(status == 'in_progress'),
+            'closed_tickets': int(status == 'closed'),
+            'reopened_tickets': int(status == 'reopened'),
+            'my_unassigned_tickets': int(status == 'open' and state['claimed_by_id'] is None),
+        },
+    }
+    for technician_id in state['technician_ids']:
+        scopes[technician_scope(technician_id)] = {
+            'my_open_tickets': int(status == 'open'),
+            'in_progress_tickets': int(status == 'in_progress'),
+            'closed_tickets': int(status == 'closed'),
+            'reopened_tickets': int(state['reopened']),
+        }
+    return scopes
+
+
+def counter_deltas(before, after):
+    """``{scope: {name: change}}`` between two snapshots, without zero changes"""
+    old, new = contributions(before), contributions(after)
+    deltas = {}
+    for scope in old.keys() | new.keys():
+        old_counters, new_counters = old.get(scope, {}), new.get(scope, {})
+        changes = {}
+        for name in old_counters.keys() | new_counters.keys():
+            change = new_counters.get(name, 0) - old_counters.get(name, 0)
+            if change:
+                changes[name] = change
+        if changes:
+            deltas[scope] = changes
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Add ``deltas`` to the stored counters, atomically with the caller's change.
+    One UPDATE adds every change (a CASE per counter); counters never touched
+    before are created first, which only happens once per counter.
+    """
+    changes = [
+        (scope, name, change)
+        for scope, counter_changes in deltas.items()
+        for name, change in counter_changes.items()
+        if change
+    ]
+    if not changes:
+        return
+    with transaction.atomic():
+        if _add_changes(changes) < len(changes):
+            existing = set(
+                DashboardCounter.objects.filter(_matching(changes)).values_list('scope', 'name')
+            )
+            missing = [(scope, name, change) for scope, name, change in changes if (scope, name) not in existing]
+            DashboardCounter.objects.bulk_create(
+                [DashboardCounter(scope=scope, name=name) for scope, name, change in missing], ignore_conflicts=True
+            )
+            _add_changes(missing)
+
+
+def _matching(changes):
+    condition = Q()
+    for scope, name, change in changes:
+        condition |= Q(scope=scope, name=name)
+    return condition
+
+
+def _add_changes(changes):
+    """Add ``[(scope, name, change)]`` in one UPDATE; returns the number of counters found"""
+    change_of_row = Case(
+        *[When(scope=scope, name=name, then=Value(change)) for scope, name, change in changes],
+        default=Value(0),
+    )
+    return DashboardCounter.objects.filter(_matching(changes)).update(value=F('value') + change_of_row)
+
+
+def read_counters(*scopes):
+    """
+    Stored counters of ``scopes`` (which must not share names) in one query,
+    nested like the API payloads. Counters never touched are absent.
+    """
+    values = {}
+    for name, value in DashboardCounter.objects.filter(scope__in=scopes).values_list('name', 'value'):
+        section, _, key = name.rpartition('.')
+        (values.setdefault(section, {}) if section else values)[key] = value
+    return values
+
+
+def compute_counters():
+    """Counters recounted from the tickets: ``{(scope, name): value}``"""
+    technician_ids = defaultdict(set)
+    links = Ticket.additional_technicians.through.objects.values_list('ticket_id', 'user_id')
+    for ticket_id, user_id in links.iterator():
+        technician_ids[ticket_id].add(user_id)
+    reopened = set(
+        TicketEvent.objects.filter(event_type='reopened').values_list('ticket_id', flat=True).distinct()
+    )
+
+    totals = defaultdict(int)
+    rows = Ticket.objects.values(
+        'id', 'status', 'priority', 'type', 'requester_id', 'assigned_to_id', 'claimed_by_id'
+    )
+    for row in rows.iterator():
+        technicians = set(technician_ids.get(row['id'], ()))
+        if row['claimed_by_id']:
+            technicians.add(row['claimed_by_id'])
+        state = dict(row, technician_ids=technicians, reopened=row['id'] in reopened)
+        for scope, counters in contributions(state).items():
+            for name, value in counters.items():
+                totals[(scope, name)] += value
+    return totals
+
+
+def reconcile(dry_run=False):
+    """
+    Recount everything and fix the stored counters that drifted.
+    Returns ``{(scope, name): (stored, actual)}`` for each difference.
+    """
+    with transaction.atomic():
+        actual = compute_counters()
+        stored = {
+            (scope, name): (pk, value)
+            for pk, scope, name, value in DashboardCounter.objects.values_list('pk', 'scope', 'name', 'value')
+        }
+        drift = {}
+        for key in stored.keys() | actual.keys():
+            stored_value = stored[key][1] if key in stored else 0
+            if stored_value != actual.get(key, 0):
+                drift[key] = (stored_value, actual.get(key, 0))
+        if dry_run:
+            return drift
+
+        # Scopes of deleted users and counters that no ticket contributes to
+        obsolete = [pk for key, (pk, value) in stored.items() if key not in actual]
+        DashboardCounter.objects.filter(pk__in=obsolete).delete()
+        for key, (stored_value, value) in drift.items():
+            if key in stored and key in actual:
+                DashboardCounter.objects.filter(pk=stored[key][0]).update(value=value)
+        DashboardCounter.objects.bulk_create([
+            DashboardCounter(scope=scope, name=name, value=value)
+            for (scope, name), value in actual.items()
+            if (scope, name) not in stored
+        ])
+    return drift
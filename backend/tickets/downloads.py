@@ -0,0 +1,262 @@
+"""
+Attachment download serving.
+
+Attachments are served by a permission-checked view instead of Django's
+development static view. Browsers load them from <img>/<video> tags and
+window.open(), which cannot send the JWT header, so the serializers hand out
+short-lived signed URLs. The expiry is rounded to ATTACHMENT_URL_MAX_AGE
+buckets so the URL (and the browser cache entry) stays stable between refetches.
+
+Responses carry a strong ETag (the blob SHA-256 when available) and honour
+Range / If-Range, so video seeking only transfers the requested bytes. With
+ATTACHMENT_SENDFILE set, the bytes are streamed by nginx (X-Accel-Redirect) or
+Apache/lighttpd (X-Sendfile) and never occupy a Python worker.
+
+``?variant=thumbnail|preview`` serves the derivatives from tickets/previews.py.
+Blobs compressed by tickets/tiering.py are decompressed while streaming, or
+sent as stored (Content-Encoding) when the client accepts that encoding.
+"""
+
+import mimetypes
+import os
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from .blob_store import blob_storage, open_blob
+from .models import TicketClosureReportAttachment
+from .previews import VARIANTS
+from .uploads import STREAM_BLOCK_SIZE
+
+_signer = signing.Signer(salt='tickets.attachment-download')
+
+
+def _kind(attachment):
+    return 'closure_report' if isinstance(attachment, TicketClosureReportAttachment) else 'ticket'
+
+
+def _signed_value(attachment, expires, variant):
+    value = f'{_kind(attachment)}:{attachment.id}:{expires}'
+    return f'{value}:{variant}' if variant else value
+
+
+def signed_download_url(request, attachment, variant=None):
+    """
+    Download URL valid for at least ATTACHMENT_URL_MAX_AGE seconds.
+    ``variant`` selects a derivative ('thumbnail' or 'preview') instead of the original.
+    """
+    max_age = settings.ATTACHMENT_URL_MAX_AGE
+    expires = (int(time.time()) // max_age + 2) * max_age
+    name = 'download_closure_report_attachment' if _kind(attachment) == 'closure_report' else 'download_attachment'
+    url = reverse(name, kwargs={'attachment_id': attachment.id})
+    params = {'expires': expires, 'signature': _signer.signature(_signed_value(attachment, expires, variant))}
+    if variant:
+        params['variant'] = variant
+    url = f'{url}?{urlencode(params)}'
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def preview_urls(request, attachment):
+    """``(thumbnail_url, preview_url)``, or Nones until the derivatives exist"""
+    blob = attachment.blob
+    if blob is None or blob.preview_status != 'ready':
+        return None, None
+    return (
+        signed_download_url(request, attachment, 'thumbnail'),
+        signed_download_url(request, attachment, 'preview'),
+    )
+
+
+def has_valid_signature(request, attachment):
+    expires = request.GET.get('expires', '')
+    signature = request.GET.get('signature', '')
+    if not expires.isdigit() or not signature or int(expires) < time.time():
+        return False
+    expected = _signer.signature(_signed_value(attachment, expires, request.GET.get('variant')))
+    return signing.constant_time_compare(signature, expected)
+
+
+def parse_range(header, size):
+    """
+    Parse a single ``bytes=`` range. Returns ``(start, end)`` (inclusive),
+    ``None`` to serve the whole file, or ``False`` if it cannot be satisfied.
+    Multiple ranges are answered with the whole file, which RFC 9110 allows.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first == '':
+            suffix = int(last)
+            if suffix <= 0:
+                return False
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if last and start > end:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        # Strong comparison only: a weak validator never matches
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+class RangeFile:
+    """Read at most ``length`` bytes of ``file`` from ``start``"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _accepts_encoding(request, encoding):
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        token, _, params = part.partition(';')
+        if token.strip().lower() != encoding:
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def serve_attachment(request, attachment):
+    variant = request.GET.get('variant')
+    blob = attachment.blob if attachment.blob_id else None
+    encoding = ''
+    if variant in VARIANTS:
+        if blob is None or not getattr(blob, variant):
+            return HttpResponse(status=404)
+        storage, name = default_storage, getattr(blob, variant).name
+        content_type = 'image/jpeg'
+        file_name = f'{os.path.splitext(attachment.file_name)[0]}.{variant}.jpg'
+    else:
+        variant = None
+        content_type = attachment.mime_type or mimetypes.guess_type(attachment.file_name)[0] or 'application/octet-stream'
+        file_name = attachment.file_name
+        if blob is not None:
+            # Compressed and/or archived by tickets/tiering.py
+            storage, name, encoding = blob_storage(blob), blob.file.name, blob.encoding
+        else:
+            storage, name = default_storage, attachment.storage_url.name
+
+    try:
+        if blob is not None and variant is None:
+            if not storage.exists(name):
+                return HttpResponse(status=404)
+            size = blob.size_bytes
+            last_modified = int(blob.created_at.timestamp())
+        else:
+            size = storage.size(name)
+            last_modified = int(storage.get_modified_time(name).timestamp())
+    except OSError:
+        return HttpResponse(status=404)
+
+    # A stored gzip/zstd blob is sent as-is to clients that accept that encoding
+    passthrough = bool(encoding) and 'HTTP_RANGE' not in request.META and _accepts_encoding(request, encoding)
+    if blob is None:
+        etag = f'"{last_modified:x}-{size:x}"'
+    elif variant:
+        etag = f'"{blob.sha256}-{variant}"'
+    elif passthrough:
+        etag = f'"{blob.sha256}-{encoding}"'
+    else:
+        etag = f'"{blob.sha256}"'
+
+    # 304 Not Modified / 412 Precondition Failed
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response.headers['ETag'] = etag
+        return response
+
+    as_attachment = request.GET.get('download') == '1'
+
+    if settings.ATTACHMENT_SENDFILE and storage is default_storage and not encoding:
+        # The front-end server handles Range itself and streams from disk
+        response = HttpResponse(content_type=content_type)
+        if settings.ATTACHMENT_SENDFILE == 'x-accel-redirect':
+            response.headers['X-Accel-Redirect'] = quote(
+                settings.ATTACHMENT_SENDFILE_PREFIX.rstrip('/') + '/' + name
+            )
+        else:
+            response.headers['X-Sendfile'] = storage.path(name)
+        disposition = 'attachment' if as_attachment else 'inline'
+        response.headers['Content-Disposition'] = f"{disposition}; filename*=utf-8''{quote(file_name)}"
+    elif passthrough:
+        response = FileResponse(
+            open_blob(blob, decompress=False),
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=file_name
+        )
+        response.headers['Content-Encoding'] = encoding
+        response.block_size = STREAM_BLOCK_SIZE
+    else:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if byte_range is not None and not _if_range_matches(request, etag, last_modified):
+            byte_range = None
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+
+        handle = open_blob(blob) if encoding else storage.open(name, 'rb')
+        if byte_range is None and not encoding:
+            response = FileResponse(handle, content_type=content_type, as_attachment=as_attachment, filename=file_name)
+        else:
+            # Bounded reader: also keeps FileResponse from seeking to the end of a decompressing stream
+            start, end = byte_range or (0, size - 1)
+            response = FileResponse(
+                RangeFile(handle, start, end - start + 1),
+                status=200 if byte_range is None else 206,
+                content_type=content_type,
+                as_attachment=as_attachment,
+                filename=file_name
+            )
+            response.headers['Content-Length'] = end - start + 1
+            if byte_range is not None:
+                response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.block_size = STREAM_BLOCK_SIZE
+
+    if blob is not None and blob.encoding and not variant:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -231,25 +231,12 @@ class EmailNotificationService:
             'closure_report': closure_report
         }
         
-        # Préparer la pièce jointe du rapport
-        attachments = []
-        if closure_report and closure_report.report_file:
-            try:
-                if os.path.exists(closure_report.report_file.path):
-                    attachments.append((
-                        f"rapport_fermeture_{ticket.short_id}.pdf",
-                        closure_report.report_file.read(),
-                        "application/pdf"
-                    ))
-            except Exception as e:
-                logger.error(f"Failed to attach closure report: {str(e)}")
-        
+        # Le rapport est dans le corps du message (pas de fichier de rapport stocké)
         return self.send_email(
             subject=subject,
             template_name='admin_closure_report.html',
             context=context,
-            recipient_list=[admin_email],
-            attachments=attachments
+            recipient_list=[admin_email]
         )
     
     def send_monthly_report(self, stats_data, month_name, year):
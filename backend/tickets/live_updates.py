@@ -0,0 +1,139 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from .dashboard_counters import ADMIN, EMPLOYEES, TECHNICIANS, apply_deltas, counter_deltas
+from .models import TicketEvent
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id):
+    return f'user_{user_id}'
+
+
+def role_group_name(role):
+    return f'role_{role}'
+
+
+def _add_delta(deltas, key, before, after):
+    change = after - before
+    if change:
+        if '.' in key:
+            section, name = key.split('.', 1)
+            deltas.setdefault(section, {})[name] = change
+        else:
+            deltas[key] = change
+
+
+class LiveUpdateService:
+    """
+    Pushes ticket lifecycle events and dashboard counter deltas over WebSockets.
+
+    Every connected dashboard joins ``user_<id>`` and ``role_<role>`` groups
+    (see DashboardConsumer). Counters are described as the contribution of a
+    single ticket to each audience's dashboard (tickets/dashboard_counters.py);
+    the delta sent on a transition is ``contribution(after) - contribution(before)``,
+    so the keys match the payloads of /api/auth/dashboard/ and
+    /api/auth/admin/dashboard-stats/ and clients can add them in place. The
+    same deltas update the stored DashboardCounter rows.
+    """
+
+    def snapshot(self, ticket):
+        """Capture the fields that drive dashboard counters before a change"""
+        return {
+            'status': ticket.status,
+            'priority': ticket.priority,
+            'type': ticket.type,
+            'requester_id': ticket.requester_id,
+            'assigned_to_id': ticket.assigned_to_id,
+            'claimed_by_id': ticket.claimed_by_id,
+            'technician_ids': self._technician_ids(ticket),
+            'reopened': TicketEvent.objects.filter(ticket=ticket, event_type='reopened').exists(),
+        }
+
+    def _technician_ids(self, ticket):
+        ids = set(ticket.additional_technicians.values_list('id', flat=True))
+        if ticket.claimed_by_id:
+            ids.add(ticket.claimed_by_id)
+        return ids
+
+    def compute_deltas(self, before, after):
+        """Return ``{group_name: deltas}`` for every audience affected by the change"""
+        return self._group_deltas(counter_deltas(before, after))
+
+    def _group_deltas(self, scoped_deltas):
+        groups = {
+            ADMIN: role_group_name('admin'),
+            TECHNICIANS: role_group_name('technician'),
+            EMPLOYEES: role_group_name('employee'),
+        }
+        audiences = {}
+        for scope, changes in scoped_deltas.items():
+            # technician:<id> and requester:<id> both go to that user's group
+            group = groups.get(scope) or user_group_name(scope.split(':', 1)[1])
+            deltas = audiences.setdefault(group, {})
+            for key, change in changes.items():
+                _add_delta(deltas, key, 0, change)
+        return audiences
+
+    def ticket_changed(self, ticket, event_type, actor, before=None):
+        """
+        Publish a lifecycle event once the surrounding transaction commits.
+        ``before`` is the snapshot taken before the change (None for creation).
+        """
+        after = self.snapshot(ticket)
+        scoped_deltas = counter_deltas(before, after)
+        # Stored dashboard counters change in the same transaction as the ticket
+        apply_deltas(scoped_deltas)
+        audiences = self._group_deltas(scoped_deltas)
+        # The requester, involved technicians and admins always see the event itself
+        always = {role_group_name('admin'), user_group_name(after['requester_id'])}
+        always |= {user_group_name(technician_id) for technician_id in after['technician_ids']}
+
+        payload = {
+            'event': event_type,
+            'ticket': {
+                'id': str(ticket.id),
+                'short_id': ticket.short_id,
+                'subject': ticket.subject,
+                'status': ticket.status,
+                'priority': ticket.priority,
+                'type': ticket.type,
+            },
+            'actor_id': str(actor.id) if actor else None,
+        }
+        messages = {
+            group: dict(payload, deltas=deltas)
+            for group, deltas in audiences.items()
+            if deltas or group in always
+        }
+        transaction.on_commit(lambda: self._publish(messages))
+
+    def _publish(self, messages):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        for group, message in messages.items():
+            try:
+                async_to_sync(channel_layer.group_send)(group, dict(message, type='ticket_update'))
+            except Exception as e:
+                logger.error(f"Failed to push live update to {group}: {str(e)}")
+
+    def ticket_created(self, ticket, actor):
+        self.ticket_changed(ticket, 'created', actor)
+
+    def ticket_claimed(self, ticket, actor, before):
+        self.ticket_changed(ticket, 'claimed', actor, before)
+
+    def technician_added(self, ticket, actor, before):
+        self.ticket_changed(ticket, 'technician_added', actor, before)
+
+    def ticket_closed(self, ticket, actor, before):
+        self.ticket_changed(ticket, 'closed', actor, before)
+
+    def ticket_reopened(self, ticket, actor, before):
+        self.ticket_changed(ticket, 'reopened', actor, before)
+
+
+live_updates = LiveUpdateService()
@@ -0,0 +1,250 @@
+"""
+Scripted load test against a running server (``manage.py load_test``).
+
+Virtual users log in with the accounts created by ``seed_data`` and loop over
+the scenario of their role until the run ends:
+
+- employee: create a ticket, then load the dashboard and the ticket list
+- technician: list the unclaimed tickets, claim one, open it and close it
+  with a closure report
+- admin: load the statistics page (the report endpoints it queries)
+
+Every request is timed and recorded under its endpoint (path template), and
+the report gives throughput, error counts and latency percentiles per
+endpoint. Claims lost to another technician (400 "already claimed") are
+expected under concurrency and counted apart from errors.
+
+Requests go through urllib, so the load generator needs nothing beyond the
+standard library and can run from any machine with the project checked out.
+"""
+
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from .seeding import SEED_EMAIL, SEED_PASSWORD
+
+# Query string of the statistics page (app/statistics/page.tsx)
+STATS_PARAMS = {'time_filter': 'month'}
+STATS_ENDPOINTS = [
+    '/api/reports/ticket-analytics/',
+    '/api/reports/user-performance/',
+    '/api/reports/sla-tracking/',
+    '/api/reports/quality-metrics/',
+    '/api/reports/technician-statistics/',
+    '/api/reports/group-statistics/',
+    '/api/reports/workload-statistics/',
+    '/api/reports/system-statistics/',
+]
+
+# Log in again before the access token (1 hour) expires in long runs
+RELOGIN_AFTER = 50 * 60
+
+SCENARIOS = {
+    'employee': 'employee_create',
+    'technician': 'technician_claim_close',
+    'admin': 'admin_stats',
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint, shared by the virtual users"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.scenarios = {}
+
+    def record(self, endpoint, seconds, outcome):
+        with self._lock:
+            entry = self.samples.setdefault(endpoint, {'latencies': [], 'errors': 0, 'conflicts': 0})
+            entry['latencies'].append(seconds * 1000)
+            if outcome == 'error':
+                entry['errors'] += 1
+            elif outcome == 'conflict':
+                entry['conflicts'] += 1
+
+    def scenario_done(self, name):
+        with self._lock:
+            self.scenarios[name] = self.scenarios.get(name, 0) + 1
+
+    def report(self, duration):
+        endpoints = []
+        for endpoint, entry in sorted(self.samples.items()):
+            latencies = entry['latencies']
+            endpoints.append({
+                'endpoint': endpoint,
+                'requests': len(latencies),
+                'errors': entry['errors'],
+                'conflicts': entry['conflicts'],
+                'throughput': round(len(latencies) / duration, 2),
+                'p50_ms': round(statistics.median(latencies), 1),
+                'p95_ms': round(_percentile(latencies, 95), 1),
+                'p99_ms': round(_percentile(latencies, 99), 1),
+                'max_ms': round(max(latencies), 1),
+            })
+        requests = sum(endpoint['requests'] for endpoint in endpoints)
+        return {
+            'duration_s': round(duration, 1),
+            'requests': requests,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints),
+            'throughput': round(requests / duration, 2),
+            'scenarios': dict(self.scenarios),
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+    def __init__(self, base_url, email, password, recorder, rng, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, endpoint=None, body=None, params=None, expect=(200, 201), conflict=()):
+        """
+        Send one request and record it under ``endpoint`` (defaults to ``path``).
+        Returns ``(status, decoded JSON or None)``; status 0 means no response.
+        """
+        url = self.base_url + path + (f'?{urlencode(params)}' if params else '')
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, data=data, headers=headers, method=method), timeout=self.timeout) as response:
+                status, payload = response.status, response.read()
+        except HTTPError as exc:
+            status, payload = exc.code, exc.read()
+        except (URLError, OSError):
+            status, payload = 0, b''
+        elapsed = time.perf_counter() - started
+
+        outcome = 'ok' if status in expect else 'conflict' if status in conflict else 'error'
+        self.recorder.record(f'{method} {endpoint or path}', elapsed, outcome)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def login(self):
+        self.token = None
+        status, data = self.request(
+            'POST', '/api/auth/login/', body={'email': self.email, 'password': self.password}, expect=(200,)
+        )
+        self.token = data.get('access') if status == 200 and data else None
+        return self.token is not None
+
+    # Scenarios
+
+    def employee_create(self):
+        ticket_type = self.rng.choice(['Software', 'Hardware', 'Network'])
+        self.request('POST', '/api/tickets/', body={
+            'subject': f'Load test {ticket_type.lower()} issue',
+            'type': ticket_type,
+            'description': '<p>Ticket created by the load test</p>',
+        }, expect=(201,))
+        self.request('GET', '/api/auth/dashboard/')
+        self.request('GET', '/api/tickets/')
+
+    def technician_claim_close(self):
+        status, data = self.request(
+            'GET', '/api/tickets/', endpoint='/api/tickets/?filter=unassigned',
+            params={'filter': 'unassigned', 'status': 'open'}
+        )
+        candidates = (data or {}).get('results', []) if isinstance(data, dict) else []
+        if not candidates:
+            return
+        ticket_id = self.rng.choice(candidates)['id']
+        status, _ = self.request(
+            'POST', f'/api/tickets/{ticket_id}/accept/', endpoint='/api/tickets/{id}/accept/',
+            expect=(200,), conflict=(400,)
+        )
+        if status != 200:
+            return
+        self.request('GET', f'/api/tickets/{ticket_id}/', endpoint='/api/tickets/{id}/')
+        self.request(
+            'POST', f'/api/tickets/{ticket_id}/closure-report/', endpoint='/api/tickets/{id}/closure-report/',
+            body={
+                'problem_type': 'software',
+                'problem_subtype': 'Application métier',
+                'root_cause': 'Load test',
+                'solution_applied': 'Load test',
+                'replaced_parts': [],
+            },
+            expect=(201,),
+        )
+
+    def admin_stats(self):
+        self.request('GET', '/api/auth/admin/dashboard-stats/')
+        for path in STATS_ENDPOINTS:
+            self.request('GET', path, params=STATS_PARAMS)
+
+    def run(self, scenario, deadline, think_time):
+        action = getattr(self, scenario)
+        logged_in = None
+        while time.monotonic() < deadline:
+            if logged_in is None or time.monotonic() - logged_in > RELOGIN_AFTER:
+                if not self.login():
+                    return
+                logged_in = time.monotonic()
+            action()
+            self.recorder.scenario_done(scenario)
+            if think_time:
+                time.sleep(self.rng.uniform(0, 2 * think_time))
+
+
+def run_load_test(base_url, users, mix, duration, accounts, password=SEED_PASSWORD,
+                  think_time=0.0, ramp_up=0.0, seed=None):
+    """
+    Run ``users`` virtual users for ``duration`` seconds. ``mix`` maps each
+    role to its share of the users; ``accounts`` to the number of seeded
+    accounts of that role to log in with. Returns the report.
+    """
+    rng = random.Random(seed)
+    recorder = Recorder()
+    roles = [role for role in mix if mix[role] > 0]
+    # Every role in the mix gets at least one user, the rest are drawn by share
+    assigned = roles[:users] + rng.choices(roles, [mix[role] for role in roles], k=max(users - len(roles), 0))
+    seen = {role: 0 for role in roles}
+    virtual_users = []
+    for role in assigned:
+        account = seen[role] % max(accounts[role], 1)
+        seen[role] += 1
+        virtual_users.append((role, VirtualUser(
+            base_url, SEED_EMAIL.format(role=role, index=account), password, recorder, random.Random(rng.random())
+        )))
+
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+
+    def start(index):
+        role, user = virtual_users[index]
+        time.sleep(ramp_up * index / max(users, 1))
+        user.run(SCENARIOS[role], deadline, think_time)
+
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(start, range(users)))
+    return recorder.report(time.monotonic() - started)
@@ -0,0 +1,191 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.redis_standin import start_in_thread
+
+GROUP_NAME = 'bench_fanout'
+
+
+def _build_layer(backend, url):
+    if backend == 'redis':
+        from channels_redis.core import RedisChannelLayer
+        return RedisChannelLayer(hosts=[url], prefix='bench')
+    from channels_redis.pubsub import RedisPubSubChannelLayer
+    return RedisPubSubChannelLayer(hosts=[url], prefix='bench')
+
+
+def _worker(backend, url, expected, ready, results):
+    """Subscribe one consumer to the group and record per-message fan-out latency"""
+
+    async def run():
+        layer = _build_layer(backend, url)
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP_NAME, channel)
+        ready.set()
+
+        latencies = []
+        sequence = []
+        while len(sequence) < expected:
+            message = await layer.receive(channel)
+            if message['type'] == 'bench.stop':
+                break
+            latencies.append(time.time() - message['sent_at'])
+            sequence.append(message['seq'])
+        finished_at = time.time()
+
+        await layer.group_discard(GROUP_NAME, channel)
+        await layer.flush()
+        return latencies, sequence, finished_at
+
+    latencies, sequence, finished_at = asyncio.run(run())
+    in_order = sequence == sorted(sequence)
+    results.put({
+        'pid': os.getpid(),
+        'received': len(sequence),
+        'in_order': in_order,
+        'latencies': latencies,
+        'finished_at': finished_at,
+    })
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Verify and benchmark channel layer group fan-out across several worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of subscriber processes (default: 4)',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=2000,
+            help='Messages published to the group (default: 2000)',
+        )
+        parser.add_argument(
+            '--payload',
+            type=int,
+            default=256,
+            help='Message body size in bytes (default: 256)',
+        )
+        parser.add_argument(
+            '--redis-url',
+            help='Benchmark against this server instead of the local stand-in',
+        )
+        parser.add_argument(
+            '--backend',
+            choices=['pubsub', 'redis'],
+            default='pubsub',
+            help='Channel layer implementation; "redis" needs a real Redis server',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        total = options['messages']
+        backend = options['backend']
+        url = options['redis_url']
+
+        stop_server = None
+        if not url:
+            if backend == 'redis':
+                raise CommandError('The "redis" backend uses Lua scripts and needs --redis-url')
+            server, stop_server = start_in_thread()
+            url = server.url
+            self.stdout.write(f'Started Redis stand-in on {url}')
+
+        try:
+            report = self.run_benchmark(backend, url, workers, total, options['payload'])
+        finally:
+            if stop_server:
+                stop_server()
+
+        self.stdout.write(f"Backend: {backend} ({url})")
+        self.stdout.write(f"Workers: {workers}, messages: {total}, payload: {options['payload']} bytes")
+        self.stdout.write(f"Publish rate: {report['publish_rate']:.0f} msg/s")
+        self.stdout.write(f"Delivery rate: {report['delivery_rate']:.0f} deliveries/s")
+        self.stdout.write(
+            f"Fan-out latency: p50={report['p50']:.2f}ms p95={report['p95']:.2f}ms "
+            f"p99={report['p99']:.2f}ms max={report['max']:.2f}ms"
+        )
+
+        failures = [r for r in report['results'] if r['received'] != total or not r['in_order']]
+        if failures:
+            for result in failures:
+                self.stdout.write(self.style.ERROR(
+                    f"Worker {result['pid']}: received {result['received']}/{total}, "
+                    f"in order: {result['in_order']}"
+                ))
+            raise CommandError('Fan-out check failed: not every worker received every message')
+
+        self.stdout.write(self.style.SUCCESS(f'All {workers} workers received all {total} messages in order'))
+
+    def run_benchmark(self, backend, url, workers, total, payload_size):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = []
+        ready_events = []
+        for _ in range(workers):
+            ready = context.Event()
+            process = context.Process(target=_worker, args=(backend, url, total, ready, results))
+            process.start()
+            processes.append(process)
+            ready_events.append(ready)
+
+        for ready in ready_events:
+            if not ready.wait(timeout=30):
+                raise CommandError('Worker did not subscribe within 30s')
+        # SUBSCRIBE is acknowledged asynchronously by the receiver task
+        time.sleep(0.5)
+
+        payload = 'x' * payload_size
+
+        async def publish():
+            layer = _build_layer(backend, url)
+            started = time.time()
+            for seq in range(total):
+                await layer.group_send(GROUP_NAME, {
+                    'type': 'bench.message',
+                    'seq': seq,
+                    'sent_at': time.time(),
+                    'payload': payload,
+                })
+            published = time.time()
+            await asyncio.sleep(2)
+            await layer.group_send(GROUP_NAME, {'type': 'bench.stop'})
+            await layer.flush()
+            return started, published
+
+        started, published = asyncio.run(publish())
+
+        collected = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(timeout=10)
+
+        latencies = [latency * 1000 for result in collected for latency in result['latencies']]
+        delivered = sum(result['received'] for result in collected)
+        finished = max(result['finished_at'] for result in collected)
+
+        return {
+            'results': collected,
+            'publish_rate': total / max(published - started, 1e-9),
+            'delivery_rate': delivered / max(finished - started, 1e-9),
+            'p50': statistics.median(latencies) if latencies else 0.0,
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'max': max(latencies) if latencies else 0.0,
+        }
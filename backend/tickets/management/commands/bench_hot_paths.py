@@ -0,0 +1,162 @@
+import json
+import os
+
+from django.conf import settings
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from tickets.benchmarks import (
+    BENCHMARKS, DEFAULT_THRESHOLD, compare, environment_info, load_baseline, run_benchmarks, save_baseline,
+)
+from tickets.seeding import seed
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+# Fixed so every run benchmarks the same dataset
+DATASET_SEED = 1
+# Times a suspected regression is measured again before it is reported
+RECHECKS = 2
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark serializers, ticket list querysets, reports, Ticket.save() and emails against a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tickets',
+            type=int,
+            default=2000,
+            help='Tickets in the seeded temporary database (default: 2000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed samples per benchmark (default: 5)',
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            help='Run the benchmarks whose name starts with this prefix, repeatable (e.g. report., serializer.)',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=DEFAULT_BASELINE,
+            help='Baseline JSON file (default: benchmarks/baseline.json)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help=f'Allowed slowdown before a regression, as a ratio (default: from the baseline, else {DEFAULT_THRESHOLD})',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results as the new baseline instead of failing on regressions',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='PATH',
+            help='Also write the results as JSON to PATH',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the benchmarks and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, prepare in BENCHMARKS:
+                self.stdout.write(name)
+            return
+        if options['tickets'] < 1 or options['repeat'] < 1:
+            raise CommandError('--tickets and --repeat must be positive')
+
+        baseline_path = options['baseline']
+        baseline = load_baseline(baseline_path) if os.path.exists(baseline_path) else None
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            self.stdout.write(f"Seeding {options['tickets']} tickets into a temporary database...")
+            seed(
+                tickets=options['tickets'],
+                employees=max(options['tickets'] // 20, 1),
+                technicians=10,
+                admins=2,
+                seed=DATASET_SEED,
+            )
+            info = environment_info(options['tickets'])
+
+            def progress(name, result):
+                self.stdout.write(
+                    f"  {name:<45} {result['median_ms']:10.3f} ms/{'row' if result['units'] > 1 else 'call'}"
+                    f"  (min {result['min_ms']:.3f})  {result['queries']:>4} queries"
+                )
+                mail.outbox = []
+
+            try:
+                results = run_benchmarks(repeat=options['repeat'], only=options['only'], progress=progress)
+                threshold = options['threshold']
+                if baseline and not options['update_baseline']:
+                    recorded = baseline.get('environment', {})
+                    if (recorded.get('tickets'), recorded.get('database')) != (info['tickets'], info['database']):
+                        self.stdout.write(self.style.WARNING(
+                            f"Baseline recorded on {recorded.get('tickets')} tickets / {recorded.get('database')}; "
+                            f"timings are not comparable, checking query counts only"
+                        ))
+                        threshold = float('inf')
+                    # A slowdown must show up again before it counts
+                    for _ in range(RECHECKS):
+                        suspects = {
+                            name for name, (change, problems) in compare(baseline, results, threshold).items()
+                            if problems
+                        }
+                        if not suspects:
+                            break
+                        self.stdout.write(f'Measuring {len(suspects)} suspected regressions again...')
+                        for name, result in run_benchmarks(repeat=options['repeat'], names=suspects).items():
+                            result['min_ms'] = min(result['min_ms'], results[name]['min_ms'])
+                            results[name] = result
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump({'environment': info, 'benchmarks': results}, output, indent=2, sort_keys=True)
+
+        if options['update_baseline']:
+            if options['only'] and baseline:
+                # Partial run: keep the other benchmarks' baselines
+                results = dict(baseline['benchmarks'], **results)
+            os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+            save_baseline(baseline_path, info, results, threshold=options['threshold'] or DEFAULT_THRESHOLD)
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        if not baseline:
+            self.stdout.write(self.style.WARNING(
+                f'No baseline at {baseline_path}; record one with --update-baseline'
+            ))
+            return
+
+        regressions = 0
+        self.stdout.write('Compared with the baseline:')
+        for name, (change, problems) in compare(baseline, results, threshold).items():
+            if change is None and not problems:
+                self.stdout.write(f'  {name:<45} (new)')
+                continue
+            line = f'  {name:<45} {change:+7.1%}' if change is not None else f'  {name:<45}'
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(f"{line}  REGRESSION: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'{regressions} benchmarks regressed')
+        self.stdout.write(self.style.SUCCESS('No regression against the baseline'))
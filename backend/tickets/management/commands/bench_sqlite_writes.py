@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.utils import ConnectionHandler
+
+ALIAS = 'bench'
+
+# The tuned profile is the one in settings.DATABASES (ticketing_system/sqlite3)
+PROFILES = {
+    'stock': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {},
+    },
+    'wal-deferred': {
+        'ENGINE': 'ticketing_system.sqlite3',
+        'OPTIONS': {
+            option: value for option, value in settings.SQLITE_OPTIONS.items() if option != 'transaction_mode'
+        },
+    },
+    'tuned': {
+        'ENGINE': 'ticketing_system.sqlite3',
+        'OPTIONS': settings.SQLITE_OPTIONS,
+    },
+}
+
+
+def _connect(profile, path):
+    """Register a connection to ``path`` under ALIAS in this process"""
+    database = dict(PROFILES[profile], NAME=path)
+    # ConnectionHandler insists on a 'default' alias
+    handler = ConnectionHandler({'default': dict(database), ALIAS: database})
+    connections[ALIAS] = handler[ALIAS]
+    return connections[ALIAS]
+
+
+def _worker(profile, path, transactions, start, results):
+    """
+    Run ticket-transition-shaped transactions: read the row first
+    (the live-update snapshot), then update it and append an event
+    """
+    connection = _connect(profile, path)
+    latencies = []
+    locked = 0
+    start.wait()
+    for i in range(transactions):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=ALIAS):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT value FROM bench_counter WHERE id = %s', [i % 10])
+                    cursor.fetchone()
+                    cursor.execute('UPDATE bench_counter SET value = value + 1 WHERE id = %s', [i % 10])
+                    cursor.execute('INSERT INTO bench_event (pid, created_at) VALUES (%s, %s)', [os.getpid(), time.time()])
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    results.put({'latencies': latencies, 'locked': locked})
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent SQLite writers with the stock and tuned connection profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Writer processes (default: 8)',
+        )
+        parser.add_argument(
+            '--transactions',
+            type=int,
+            default=200,
+            help='Transactions per writer (default: 200)',
+        )
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=sorted(PROFILES),
+            help='Profile to run, repeatable (default: all)',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['transactions'] < 1:
+            raise CommandError('--workers and --transactions must be positive')
+
+        self.stdout.write(
+            f"{options['workers']} writers x {options['transactions']} transactions "
+            f"(read, update, insert) on a temporary database"
+        )
+        for profile in options['profile'] or list(PROFILES):
+            report = self.run_profile(profile, options['workers'], options['transactions'])
+            line = (
+                f"  {profile:<13} {report['rate']:8.1f} tx/s  "
+                f"p50={report['p50']:.1f}ms p95={report['p95']:.1f}ms  "
+                f"locked errors: {report['locked']}"
+            )
+            self.stdout.write(self.style.WARNING(line) if report['locked'] else line)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def run_profile(self, profile, workers, transactions):
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, 'bench.sqlite3')
+        try:
+            connection = _connect(profile, path)
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TABLE bench_counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+                cursor.execute('CREATE TABLE bench_event (id INTEGER PRIMARY KEY, pid INTEGER, created_at REAL)')
+                for i in range(10):
+                    cursor.execute('INSERT INTO bench_counter (id, value) VALUES (%s, 0)', [i])
+            connection.close()
+
+            context = multiprocessing.get_context('fork')
+            start = context.Event()
+            results = context.Queue()
+            processes = [
+                context.Process(target=_worker, args=(profile, path, transactions, start, results))
+                for _ in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            started = time.perf_counter()
+            start.set()
+            reports = [results.get() for _ in processes]
+            duration = time.perf_counter() - started
+            for process in processes:
+                process.join()
+        finally:
+            for name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, name))
+            os.rmdir(temp_dir)
+
+        latencies = [latency for report in reports for latency in report['latencies']]
+        return {
+            'rate': len(latencies) / max(duration, 1e-9),
+            'p50': statistics.median(latencies) if latencies else 0.0,
+            'p95': _percentile(latencies, 95),
+            'locked': sum(report['locked'] for report in reports),
+        }
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tickets.models import UploadSession
+from tickets.uploads import discard_partial
+
+
+class Command(BaseCommand):
+    help = 'Abort idle chunked upload sessions and delete their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24),
+            help='Abort pending sessions idle for longer than this many hours',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale_sessions = UploadSession.objects.filter(status='pending', updated_at__lt=cutoff)
+
+        freed_bytes = 0
+        count = 0
+        for session in stale_sessions.iterator():
+            freed_bytes += session.received_bytes
+            discard_partial(session.partial_path)
+            count += 1
+
+        stale_sessions.update(status='aborted')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Aborted {count} idle upload sessions, freed {freed_bytes / (1024*1024):.1f} MB.'
+            )
+        )
@@ -0,0 +1,62 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.blob_store import store_file_path
+from tickets.models import AttachmentBlob, TicketAttachment, TicketClosureReportAttachment
+from tickets.uploads import file_sha256
+
+
+class Command(BaseCommand):
+    help = 'Move legacy attachment files into the content-addressed blob store and drop duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hash existing files and report the savings without moving anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        seen = set()
+        migrated = 0
+        missing = 0
+        saved_bytes = 0
+
+        for model in (TicketAttachment, TicketClosureReportAttachment):
+            for attachment in model.objects.filter(blob__isnull=True).iterator():
+                if not attachment.storage_url:
+                    missing += 1
+                    continue
+                path = attachment.storage_url.path
+                if not os.path.exists(path):
+                    self.stdout.write(self.style.WARNING(f'Missing file for {model.__name__} {attachment.id}: {path}'))
+                    missing += 1
+                    continue
+
+                size = os.path.getsize(path)
+                if dry_run:
+                    sha256 = file_sha256(path)
+                    if sha256 in seen or AttachmentBlob.objects.filter(pk=sha256).exists():
+                        saved_bytes += size
+                    seen.add(sha256)
+                    migrated += 1
+                    continue
+
+                with transaction.atomic():
+                    blob = store_file_path(path)
+                    if blob.ref_count > 1:
+                        # Content was already stored: the legacy copy has just been removed
+                        saved_bytes += size
+                    model.objects.filter(pk=attachment.pk).update(blob=blob, storage_url=blob.file.name)
+                migrated += 1
+
+        verb = 'Would migrate' if dry_run else 'Migrated'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {migrated} attachments ({missing} missing files), '
+                f'saved {saved_bytes / (1024*1024):.1f} MB through deduplication.'
+            )
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import AttachmentBlob, TicketAttachment, TicketClosureReportAttachment
+from tickets.previews import generate_previews
+
+
+class Command(BaseCommand):
+    help = 'Generate missing attachment thumbnails and previews (e.g. after dedup_attachments)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry blobs whose previous attempt failed or was unsupported (e.g. after installing ffmpeg)',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            AttachmentBlob.objects.filter(preview_status__in=['failed', 'unsupported']).update(preview_status='pending')
+
+        results = {}
+        for sha256 in AttachmentBlob.objects.filter(preview_status='pending').values_list('sha256', flat=True).iterator():
+            mime_type = (
+                TicketAttachment.objects.filter(blob_id=sha256).values_list('mime_type', flat=True).first()
+                or TicketClosureReportAttachment.objects.filter(blob_id=sha256).values_list('mime_type', flat=True).first()
+                or ''
+            )
+            try:
+                generate_previews(sha256, mime_type)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'Blob {sha256}: {str(e)}'))
+                AttachmentBlob.objects.filter(pk=sha256).update(preview_status='failed')
+            status = AttachmentBlob.objects.filter(pk=sha256).values_list('preview_status', flat=True).first()
+            results[status] = results.get(status, 0) + 1
+
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(results.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Previews: {summary}.'))
@@ -0,0 +1,147 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.load_test import SCENARIOS, run_load_test
+from tickets.seeding import SEED_PASSWORD
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        role, _, share = part.partition('=')
+        role = role.strip()
+        if role not in SCENARIOS:
+            raise CommandError(f"Unknown role '{role}' in --mix (expected {', '.join(SCENARIOS)})")
+        try:
+            mix[role] = float(share or 1)
+        except ValueError:
+            raise CommandError(f"Invalid share '{share}' in --mix")
+    if not any(share > 0 for share in mix.values()):
+        raise CommandError('--mix needs at least one role with a positive share')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Run the scripted load-test scenarios against a running server (accounts from seed_data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://localhost:8000',
+            help='Base URL of the server under test (default: http://localhost:8000)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Concurrent virtual users (default: 20)',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=60,
+            help='Seconds of full load, after the ramp-up (default: 60)',
+        )
+        parser.add_argument(
+            '--ramp-up',
+            type=float,
+            default=0,
+            help='Seconds over which the virtual users are started (default: 0)',
+        )
+        parser.add_argument(
+            '--mix',
+            default='employee=6,technician=3,admin=1',
+            help='Share of virtual users per role (default: employee=6,technician=3,admin=1)',
+        )
+        parser.add_argument(
+            '--think-time',
+            type=float,
+            default=0,
+            help='Mean pause between scenario iterations in seconds (default: 0)',
+        )
+        parser.add_argument(
+            '--employees',
+            type=int,
+            default=2000,
+            help='Seeded employee accounts to spread the load over (default: 2000)',
+        )
+        parser.add_argument(
+            '--technicians',
+            type=int,
+            default=40,
+            help='Seeded technician accounts (default: 40)',
+        )
+        parser.add_argument(
+            '--admins',
+            type=int,
+            default=3,
+            help='Seeded admin accounts (default: 3)',
+        )
+        parser.add_argument(
+            '--password',
+            default=SEED_PASSWORD,
+            help=f'Password of the seeded accounts (default: {SEED_PASSWORD})',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed for the user mix and scenario choices',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='PATH',
+            help='Also write the report as JSON to PATH',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['duration'] <= 0:
+            raise CommandError('--users and --duration must be positive')
+        mix = _parse_mix(options['mix'])
+
+        self.stdout.write(
+            f"{options['users']} virtual users for {options['duration']:g}s against {options['url']} "
+            f"(mix: {', '.join(f'{role}={share:g}' for role, share in mix.items())})"
+        )
+        report = run_load_test(
+            base_url=options['url'],
+            users=options['users'],
+            mix=mix,
+            duration=options['duration'],
+            accounts={
+                'employee': options['employees'],
+                'technician': options['technicians'],
+                'admin': options['admins'],
+            },
+            password=options['password'],
+            think_time=options['think_time'],
+            ramp_up=options['ramp_up'],
+            seed=options['seed'],
+        )
+
+        self.stdout.write(
+            f"{'endpoint':<48} {'reqs':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>6}"
+        )
+        for endpoint in report['endpoints']:
+            line = (
+                f"{endpoint['endpoint']:<48} {endpoint['requests']:>6} {endpoint['throughput']:>7.1f} "
+                f"{endpoint['p50_ms']:>6.0f}ms {endpoint['p95_ms']:>6.0f}ms {endpoint['p99_ms']:>6.0f}ms "
+                f"{endpoint['max_ms']:>6.0f}ms {endpoint['errors']:>6}"
+            )
+            if endpoint['conflicts']:
+                line += f"  ({endpoint['conflicts']} lost claims)"
+            self.stdout.write(self.style.WARNING(line) if endpoint['errors'] else line)
+        scenarios = ', '.join(f'{name}: {count}' for name, count in sorted(report['scenarios'].items()))
+        self.stdout.write(f'Scenario iterations: {scenarios or "none"}')
+
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump(report, output, indent=2)
+
+        summary = f"{report['requests']} requests, {report['throughput']:.1f} req/s, {report['errors']} errors"
+        if not report['requests']:
+            raise CommandError('No request completed: is the server running and the data seeded?')
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
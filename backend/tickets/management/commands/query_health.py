@@ -0,0 +1,85 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.query_health import HOT_ENDPOINTS, build_report, store_report
+
+
+class Command(BaseCommand):
+    help = 'Explain the queries of the hottest endpoints and flag full scans and temporary B-trees'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only; runs the statements again)',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=sorted({label for label, *rest in HOT_ENDPOINTS}),
+            help='Endpoint to explain, repeatable (default: all)',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the plan of every statement, not only flagged ones',
+        )
+        parser.add_argument(
+            '--store',
+            action='store_true',
+            help='Also store the report served by /api/performance-stats/ (run it periodically)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the full report as JSON',
+        )
+
+    def handle(self, *args, **options):
+        if options['store']:
+            if options['endpoint']:
+                raise CommandError('--store builds the report of every endpoint: drop --endpoint')
+            report = store_report(analyze=options['analyze'])
+        else:
+            report = build_report(analyze=options['analyze'], only=options['endpoint'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+            return
+
+        self.stdout.write(f"Database: {report['database']}{' (EXPLAIN ANALYZE)' if report['analyze'] else ''}")
+        for endpoint in report['endpoints']:
+            self.stdout.write(
+                f"\n{endpoint['endpoint']} as {endpoint['role']}: {endpoint['queries']} queries "
+                f"({endpoint['distinct_queries']} distinct), {endpoint['duration_ms']:.1f} ms"
+            )
+            for statement in endpoint['statements']:
+                if not statement['severity'] and not options['plans']:
+                    continue
+                line = f"  x{statement['count']} {statement['duration_ms']:.2f} ms  {statement['sql'][:160]}"
+                if statement['severity'] == 'warning':
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+                for step in statement['plan']:
+                    self.stdout.write(f'      {step}')
+        for skipped in report['skipped']:
+            self.stdout.write(f"\nSkipped {skipped['endpoint']} as {skipped['role']}: {skipped['reason']}")
+
+        self.stdout.write('\nTables:')
+        for table in report['tables']:
+            size = f"{table['size_bytes'] / 1024:.0f} KiB" if table['size_bytes'] is not None else '?'
+            self.stdout.write(f"  {table['table']:<45} {table['rows'] if table['rows'] is not None else '?':>9} rows {size:>10}")
+            for index in table['indexes']:
+                index_size = f"{index['size_bytes'] / 1024:.0f} KiB" if index['size_bytes'] is not None else '?'
+                scans = f", {index['scans']} scans" if index['scans'] is not None else ''
+                self.stdout.write(f"      {index['name']} {index_size}{scans}")
+
+        warnings = sum(1 for item in report['flagged'] if item['severity'] == 'warning')
+        notes = len(report['flagged']) - warnings
+        if warnings:
+            self.stdout.write(self.style.WARNING(
+                f'\n{warnings} statements scan large tables, {notes} other notes'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\nNo full scans of large tables ({notes} notes)'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tickets.dashboard_counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount the dashboard counters from the tickets and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the counters that differ',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(dry_run=options['dry_run'])
+        for (scope, name), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f'{scope} {name}: stored {stored}, actual {actual}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Dashboard counters are up to date.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counters differ (dry run, nothing changed).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drift)} counters.'))
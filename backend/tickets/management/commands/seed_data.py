@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.seeding import SEED_EMAIL, SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = 'Seed a realistic synthetic dataset (users, tickets and their history) for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tickets',
+            type=int,
+            default=100000,
+            help='Tickets to create (default: 100000)',
+        )
+        parser.add_argument(
+            '--employees',
+            type=int,
+            default=2000,
+            help='Employee accounts (default: 2000)',
+        )
+        parser.add_argument(
+            '--technicians',
+            type=int,
+            default=40,
+            help='Technician accounts (default: 40)',
+        )
+        parser.add_argument(
+            '--admins',
+            type=int,
+            default=3,
+            help='Admin accounts (default: 3)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Period the tickets are spread over, ending now (default: 365)',
+        )
+        parser.add_argument(
+            '--growth',
+            type=float,
+            default=1.0,
+            help='Ticket volume growth over the period, 1.0 doubles it (default: 1.0)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tickets per bulk insert transaction (default: 5000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed, for a reproducible dataset',
+        )
+        parser.add_argument(
+            '--password',
+            default=SEED_PASSWORD,
+            help=f'Password of the seeded accounts (default: {SEED_PASSWORD})',
+        )
+
+    def handle(self, *args, **options):
+        if options['tickets'] < 0 or options['batch_size'] < 1 or options['days'] < 1:
+            raise CommandError('--tickets, --batch-size and --days must be positive')
+        if options['tickets'] and options['employees'] < 1:
+            raise CommandError('At least one employee is needed to request tickets')
+
+        started = time.perf_counter()
+
+        def progress(done, totals):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  {done}/{options['tickets']} tickets, {totals['events']} events, "
+                f"{totals['messages']} messages ({done / max(elapsed, 1e-9):.0f} tickets/s)"
+            )
+
+        created_users, totals = seed(
+            tickets=options['tickets'],
+            employees=options['employees'],
+            technicians=options['technicians'],
+            admins=options['admins'],
+            days=options['days'],
+            growth=options['growth'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            password=options['password'],
+            progress=progress,
+        )
+
+        self.stdout.write(f'Users created: {created_users}')
+        for name, count in totals.items():
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(f"Accounts: {SEED_EMAIL.format(role='<role>', index='<n>')} / {options['password']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["tickets"]} tickets in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.blob_store import zstandard
+from tickets.tiering import cold_blobs, compressible_blobs, default_algorithm, rewrite_blob
+
+
+class Command(BaseCommand):
+    help = 'Compress text attachments and move attachments of long-closed tickets to the archive storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive-after-days',
+            type=int,
+            default=settings.ATTACHMENT_ARCHIVE_AFTER_DAYS,
+            help='Archive blobs whose tickets have all been closed for longer than this',
+        )
+        parser.add_argument('--algorithm', choices=['zstd', 'gzip'], default=None)
+        parser.add_argument('--no-compress', action='store_true', help='Skip the compression pass')
+        parser.add_argument('--no-archive', action='store_true', help='Skip the archival pass')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be processed')
+
+    def handle(self, *args, **options):
+        algorithm = options['algorithm'] or default_algorithm()
+        if algorithm == 'zstd' and zstandard is None:
+            raise CommandError('zstd requires the zstandard package (pip install zstandard)')
+
+        if not options['no_compress']:
+            candidates = compressible_blobs()
+            if options['dry_run']:
+                self.stdout.write(f'{candidates.count()} blobs would be compressed with {algorithm}.')
+            else:
+                count, skipped, before, after = 0, 0, 0, 0
+                for blob in candidates.iterator():
+                    result = rewrite_blob(blob, encoding=algorithm)
+                    if result:
+                        count += 1
+                        before += result[0]
+                        after += result[1]
+                    elif blob.compression_skipped:
+                        skipped += 1
+                self.stdout.write(self.style.SUCCESS(
+                    f'Compressed {count} blobs with {algorithm}: '
+                    f'{before / (1024*1024):.1f} MB -> {after / (1024*1024):.1f} MB '
+                    f'({skipped} not worth compressing, skipped from now on).'
+                ))
+
+        if not options['no_archive']:
+            candidates = cold_blobs(options['archive_after_days'])
+            if options['dry_run']:
+                self.stdout.write(f'{candidates.count()} blobs would be archived.')
+            else:
+                count, moved = 0, 0
+                for blob in candidates.iterator():
+                    result = rewrite_blob(blob, tier='archive')
+                    if result:
+                        count += 1
+                        moved += result[0]
+                self.stdout.write(self.style.SUCCESS(
+                    f'Archived {count} blobs, {moved / (1024*1024):.1f} MB moved off the media storage.'
+                ))
@@ -0,0 +1,53 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from users.authentication import CachedJWTAuthentication
+
+
+def get_token_from_scope(scope):
+    """
+    Extract the raw access token from a WebSocket handshake.
+
+    Browsers cannot set an Authorization header on a WebSocket, so the token
+    is normally passed as ``?token=<access>``; the header is still honoured
+    for non-browser clients.
+    """
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def get_user_from_token(raw_token):
+    """Validate the token exactly like the HTTP API does and load its user"""
+    authentication = CachedJWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populates scope["user"] from a simplejwt access token.
+    Connections without a token keep whatever user the session middleware set.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = get_token_from_scope(scope)
+        if raw_token:
+            scope['user'] = await get_user_from_token(raw_token)
+        return await super().__call__(scope, receive, send)
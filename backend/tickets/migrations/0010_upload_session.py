@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_update_status_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('attachment', 'Ticket attachment'), ('closure_report', 'Closure report attachment')], default='attachment', max_length=20)),
+                ('file_name', models.CharField(max_length=255)),
+                ('mime_type', models.CharField(max_length=100)),
+                ('total_size', models.BigIntegerField()),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(help_text='Expected SHA-256 of the complete file (hex)', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('complete', 'Complete'), ('aborted', 'Aborted')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='tickets.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_by'], name='tickets_upl_created_c9bcf5_idx'), models.Index(fields=['status', 'updated_at'], name='tickets_upl_status_a3b742_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:58
+
+import django.db.models.deletion
+import tickets.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size_bytes', models.BigIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of attachments using this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ticketattachment',
+            name='storage_url',
+            field=models.FileField(max_length=255, upload_to=tickets.models.ticket_attachment_path),
+        ),
+        migrations.AlterField(
+            model_name='ticketclosurereportattachment',
+            name='storage_url',
+            field=models.FileField(max_length=255, upload_to=tickets.models.closure_report_attachment_path),
+        ),
+        migrations.AddField(
+            model_name='ticketattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ticket_attachments', to='tickets.attachmentblob'),
+        ),
+        migrations.AddField(
+            model_name='ticketclosurereportattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='closure_report_attachments', to='tickets.attachmentblob'),
+        ),
+    ]
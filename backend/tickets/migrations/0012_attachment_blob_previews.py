@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='preview',
+            field=models.FileField(blank=True, max_length=255, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, upload_to=''),
+        ),
+    ]
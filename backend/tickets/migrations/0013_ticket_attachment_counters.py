@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:06
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_attachment_counters(apps, schema_editor):
+    """Initialise the counters from the existing attachments"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketAttachment = apps.get_model('tickets', 'TicketAttachment')
+    
+    totals = TicketAttachment.objects.values('ticket_id').annotate(count=Count('id'), total=Sum('size_bytes'))
+    for row in totals.iterator():
+        Ticket.objects.filter(id=row['ticket_id']).update(
+            attachment_count=row['count'],
+            attachment_bytes=row['total'] or 0
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_attachment_blob_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_bytes',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_attachment_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_stored_size(apps, schema_editor):
+    """Existing blobs are stored uncompressed"""
+    AttachmentBlob = apps.get_model('tickets', 'AttachmentBlob')
+    AttachmentBlob.objects.update(stored_size=F('size_bytes'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_ticket_attachment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='encoding',
+            field=models.CharField(blank=True, default='', help_text="Compression of the stored file ('', 'gzip' or 'zstd')", max_length=10),
+        ),
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='stored_size',
+            field=models.BigIntegerField(blank=True, help_text='Bytes on disk (after compression)', null=True),
+        ),
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('archive', 'Archive')], default='hot', max_length=10),
+        ),
+        migrations.RunPython(fill_stored_size, migrations.RunPython.noop),
+    ]
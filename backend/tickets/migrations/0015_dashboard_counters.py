@@ -0,0 +1,97 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:24
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def contributions(state):
+    """
+    Counters one ticket adds to the dashboards, as tickets/dashboard_counters.py
+    defined them when this migration was written (copied, so later changes
+    to that module do not change what this migration does)
+    """
+    status = state['status']
+    scopes = {
+        'admin': {
+            'total_tickets': 1,
+            'open_tickets': int(status == 'open'),
+            'closed_tickets': int(status == 'closed'),
+            f"tickets_by_priority.{state['priority']}": 1,
+            f"tickets_by_type.{state['type']}": 1,
+        },
+        'technicians': {
+            'unassigned_tickets': int(status == 'open' and state['claimed_by_id'] is None),
+            'total_open_tickets': int(status == 'open'),
+        },
+        'employees': {
+            'unassigned_tickets': int(status == 'open' and state['assigned_to_id'] is None),
+        },
+        f"requester:{state['requester_id']}": {
+            'total_tickets': 1,
+            'opened_tickets': int(status == 'open'),
+            'in_progress_tickets': int(status == 'in_progress'),
+            'closed_tickets': int(status == 'closed'),
+            'reopened_tickets': int(status == 'reopened'),
+            'my_unassigned_tickets': int(status == 'open' and state['claimed_by_id'] is None),
+        },
+    }
+    for technician_id in state['technician_ids']:
+        scopes[f'technician:{technician_id}'] = {
+            'my_open_tickets': int(status == 'open'),
+            'in_progress_tickets': int(status == 'in_progress'),
+            'closed_tickets': int(status == 'closed'),
+            'reopened_tickets': int(state['reopened']),
+        }
+    return scopes
+
+
+def backfill_dashboard_counters(apps, schema_editor):
+    """Initialise the counters from the existing tickets"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketEvent = apps.get_model('tickets', 'TicketEvent')
+    DashboardCounter = apps.get_model('tickets', 'DashboardCounter')
+    
+    technician_ids = defaultdict(set)
+    for ticket_id, user_id in Ticket.additional_technicians.through.objects.values_list('ticket_id', 'user_id'):
+        technician_ids[ticket_id].add(user_id)
+    reopened = set(TicketEvent.objects.filter(event_type='reopened').values_list('ticket_id', flat=True))
+    
+    totals = defaultdict(int)
+    rows = Ticket.objects.values('id', 'status', 'priority', 'type', 'requester_id', 'assigned_to_id', 'claimed_by_id')
+    for row in rows.iterator():
+        technicians = set(technician_ids.get(row['id'], ()))
+        if row['claimed_by_id']:
+            technicians.add(row['claimed_by_id'])
+        state = dict(row, technician_ids=technicians, reopened=row['id'] in reopened)
+        for scope, counters in contributions(state).items():
+            for name, value in counters.items():
+                totals[(scope, name)] += value
+    
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(scope=scope, name=name, value=value) for (scope, name), value in totals.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0014_attachment_blob_tiering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text="'admin', 'technicians', 'employees', 'technician:<id>' ou 'requester:<id>'", max_length=64)),
+                ('name', models.CharField(help_text='Clé du compteur dans la réponse du tableau de bord', max_length=64)),
+                ('value', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'name')},
+            },
+        ),
+        migrations.RunPython(backfill_dashboard_counters, migrations.RunPython.noop),
+    ]
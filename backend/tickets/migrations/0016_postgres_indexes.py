@@ -0,0 +1,55 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:10
+
+from django.db import migrations
+
+# PostgreSQL-only indexes; on other databases this migration does nothing.
+# Built CONCURRENTLY so existing tables stay writable (hence atomic = False).
+POSTGRES_INDEXES = [
+    # Partial indexes: only active tickets, a small and hot fraction of the table
+    (
+        'tickets_ticket_active_idx',
+        "ON tickets_ticket (status, priority, created_at) "
+        "WHERE status IN ('open', 'in_progress', 'reopened')",
+    ),
+    (
+        'tickets_ticket_unclaimed_idx',
+        "ON tickets_ticket (created_at) WHERE status = 'open' AND claimed_by_id IS NULL",
+    ),
+    # BRIN: rows are appended in created_at order, so date-range report scans
+    # are served by an index of a few pages
+    ('tickets_ticket_created_brin', 'ON tickets_ticket USING brin (created_at)'),
+    ('tickets_ticketevent_created_brin', 'ON tickets_ticketevent USING brin (created_at)'),
+    ('tickets_ticketmessage_created_brin', 'ON tickets_ticketmessage USING brin (created_at)'),
+    # Trigram GIN for the ticket list search (SearchFilter's icontains is
+    # UPPER(column::text) LIKE UPPER(%term%))
+    ('tickets_ticket_subject_trgm', 'ON tickets_ticket USING gin (UPPER(subject::text) gin_trgm_ops)'),
+    ('tickets_ticket_description_trgm', 'ON tickets_ticket USING gin (UPPER(description::text) gin_trgm_ops)'),
+    ('tickets_ticket_short_id_trgm', 'ON tickets_ticket USING gin (UPPER(short_id::text) gin_trgm_ops)'),
+]
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}')
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0015_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0016_postgres_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketmessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0017_message_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='compression_skipped',
+            field=models.BooleanField(default=False, help_text='Compression was tried and saved too little'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-19 01:35
+
+import re
+
+from django.db import migrations, models
+
+SHORT_ID = re.compile(r'^INC-(\d+)-\d+$')
+
+
+def number_tickets(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    numbered = []
+    for ticket in Ticket.objects.filter(short_id__startswith='INC-').only('id', 'short_id').iterator(chunk_size=2000):
+        match = SHORT_ID.match(ticket.short_id)
+        if match:
+            ticket.number = int(match.group(1))
+            numbered.append(ticket)
+    Ticket.objects.bulk_update(numbered, ['number'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0018_blob_compression_skipped'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='number',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, help_text="Numéro de l'identifiant court INC-<numéro>-<suffixe>", null=True),
+        ),
+        migrations.RunPython(number_tickets, migrations.RunPython.noop),
+    ]
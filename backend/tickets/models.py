@@ -1,4 +1,7 @@
+from collections import Counter
+
 from django.db import models
+from django.db.models import Count, F, Max, Q
 from django.conf import settings
 from django.utils import timezone
 import uuid
@@ -9,6 +12,36 @@ def ticket_attachment_path(instance, filename):
     return f'tickets/{instance.ticket.id}/attachments/{filename}'
 
 
+class TicketQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Tickets ``user`` may see: every ticket for admins, unclaimed tickets and
+        the ones they claimed or were added to for technicians, their own
+        tickets for employees
+        """
+        if user.role == 'admin':
+            return self
+        if user.role == 'technician':
+            return self.filter(
+                Q(claimed_by__isnull=True) | Q(claimed_by=user) | Q(additional_technicians=user)
+            ).distinct()
+        return self.filter(requester=user)
+
+    def count_per_technician(self):
+        """
+        ``{technician id: tickets}`` counting, for every technician, the tickets
+        of this queryset they claimed or were added to (each ticket once), in
+        grouped queries rather than one query per technician
+        """
+        tickets = self.model.objects.filter(pk__in=self.values('pk'))
+        shared = self.model.additional_technicians.through.objects.filter(ticket__in=tickets)
+        counts = Counter(dict(tickets.filter(claimed_by__isnull=False).values_list('claimed_by').annotate(Count('pk'))))
+        counts.update(dict(shared.values_list('user').annotate(Count('pk'))))
+        # A technician added to a ticket they claimed counts once
+        counts.subtract(dict(shared.filter(ticket__claimed_by=F('user')).values_list('user').annotate(Count('pk'))))
+        return counts
+
+
 class Ticket(models.Model):
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -32,6 +65,10 @@ class Ticket(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     short_id = models.CharField(max_length=20, unique=True, editable=False)
+    number = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, db_index=True,
+        help_text="Numéro de l'identifiant court INC-<numéro>-<suffixe>",
+    )
     subject = models.CharField(max_length=200)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     description = models.TextField(help_text="Description du problème (peut contenir du HTML)")
@@ -68,10 +105,16 @@ class Ticket(models.Model):
         help_text='Additional technicians assigned to this ticket'
     )
     
+    # Maintained by tickets/quotas.py on attachment upload/delete
+    attachment_count = models.PositiveIntegerField(default=0, editable=False)
+    attachment_bytes = models.BigIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     closed_at = models.DateTimeField(null=True, blank=True)
     
+    objects = TicketQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-priority', '-created_at']
         indexes = [
@@ -101,32 +144,13 @@ class Ticket(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.short_id:
-            # Generate short ID like INC-1, INC-2, etc.
-            from django.db import transaction
-            import uuid
-            
-            with transaction.atomic():
-                # Get the highest existing number
-                try:
-                    existing_tickets = Ticket.objects.filter(short_id__regex=r'^INC-\d+$').order_by('-short_id')
-                    if existing_tickets.exists():
-                        last_ticket = existing_tickets.first()
-                        last_number = int(last_ticket.short_id.split('-')[1])
-                        new_number = last_number + 1
-                    else:
-                        new_number = 1
-                    
-                    # Add a small random component to avoid race conditions
-                    import random
-                    random_suffix = random.randint(0, 999)
-                    self.short_id = f"INC-{new_number:04d}-{random_suffix:03d}"
-                    
-                except (ValueError, IndexError, Exception):
-                    # Fallback: use timestamp with random component
-                    import time
-                    timestamp = int(time.time()) % 100000
-                    random_suffix = random.randint(100, 999)
-                    self.short_id = f"INC-{timestamp}-{random_suffix}"
+            # Generate short ID like INC-0001-123: the next number is one MAX() over the number index
+            import random
+            last_number = Ticket.objects.aggregate(last=Max('number'))['last'] or 0
+            self.number = last_number + 1
+            # Add a small random component to avoid race conditions
+            random_suffix = random.randint(0, 999)
+            self.short_id = f"INC-{self.number:04d}-{random_suffix:03d}"
         
         if not self.priority:
             # Auto-assign priority based on requester's group
@@ -137,19 +161,79 @@ class Ticket(models.Model):
         
         super().save(*args, **kwargs)
     
+    def is_visible_to(self, user):
+        """TicketQuerySet.visible_to for this ticket"""
+        if user.role == 'admin':
+            return True
+        if user.role == 'technician':
+            return (
+                self.claimed_by_id is None or self.claimed_by_id == user.id
+                or self.additional_technicians.filter(pk=user.pk).exists()
+            )
+        return self.requester_id == user.id
+
+    def writable_by(self, user):
+        """Admins, the requester and the technicians working on the ticket (claimed or added)"""
+        if user.role == 'admin' or self.requester_id == user.id or self.claimed_by_id == user.id:
+            return True
+        return user.role == 'technician' and self.additional_technicians.filter(pk=user.pk).exists()
+
     def close(self):
         self.status = 'closed'
         self.closed_at = timezone.now()
         self.save()
 
 
+def attachment_blob_path(sha256):
+    return f'blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+class AttachmentBlob(models.Model):
+    """Contenu de fichier unique, adressé par son SHA-256 et partagé entre pièces jointes"""
+    PREVIEW_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+    
+    TIER_CHOICES = [
+        ('hot', 'Hot'),
+        ('archive', 'Archive'),
+    ]
+    
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size_bytes = models.BigIntegerField()
+    file = models.FileField(max_length=255)
+    ref_count = models.PositiveIntegerField(default=0, help_text="Number of attachments using this blob")
+    tier = models.CharField(max_length=10, choices=TIER_CHOICES, default='hot')
+    encoding = models.CharField(max_length=10, blank=True, default='', help_text="Compression of the stored file ('', 'gzip' or 'zstd')")
+    stored_size = models.BigIntegerField(null=True, blank=True, help_text="Bytes on disk (after compression)")
+    compression_skipped = models.BooleanField(default=False, help_text="Compression was tried and saved too little")
+    preview_status = models.CharField(max_length=20, choices=PREVIEW_STATUS_CHOICES, default='pending')
+    thumbnail = models.FileField(max_length=255, blank=True)
+    preview = models.FileField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size_bytes} bytes, {self.ref_count} refs)"
+
+
 class TicketAttachment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='attachments')
     file_name = models.CharField(max_length=255)
     mime_type = models.CharField(max_length=100)
     size_bytes = models.BigIntegerField()
-    storage_url = models.FileField(upload_to=ticket_attachment_path)
+    storage_url = models.FileField(upload_to=ticket_attachment_path, max_length=255)
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='ticket_attachments'
+    )
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -217,7 +301,8 @@ class TicketMessage(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     message_text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: write-behind inserts keep the timestamp that was broadcast
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['created_at']
@@ -330,7 +415,14 @@ class TicketClosureReportAttachment(models.Model):
     file_name = models.CharField(max_length=255)
     mime_type = models.CharField(max_length=100)
     size_bytes = models.BigIntegerField()
-    storage_url = models.FileField(upload_to=closure_report_attachment_path)
+    storage_url = models.FileField(upload_to=closure_report_attachment_path, max_length=255)
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='closure_report_attachments'
+    )
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -355,4 +447,65 @@ class TicketClosureReportAttachment(models.Model):
         # Check file type
         file_ext = os.path.splitext(self.file_name)[1][1:].lower()
         if file_ext not in settings.ALLOWED_FILE_TYPES:
-            raise ValidationError(f'File type {file_ext} is not allowed') 
\ No newline at end of file
+            raise ValidationError(f'File type {file_ext} is not allowed') 
+
+class UploadSession(models.Model):
+    """Téléversement fractionné et reprenable (init → chunks → finalisation)"""
+    
+    TARGET_CHOICES = [
+        ('attachment', 'Ticket attachment'),
+        ('closure_report', 'Closure report attachment'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+        ('aborted', 'Aborted'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='upload_sessions')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, default='attachment')
+    file_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, help_text="Expected SHA-256 of the complete file (hex)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by']),           # For user's uploads
+            models.Index(fields=['status', 'updated_at']), # For expiring stale sessions
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name} ({self.received_bytes}/{self.total_size}) - {self.status}"
+    
+    @property
+    def partial_path(self):
+        """Where received bytes are streamed until finalisation"""
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.id}.part')
+    
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
+
+
+class DashboardCounter(models.Model):
+    """
+    Compteur de tableau de bord maintenu à chaque transition de ticket
+    (voir tickets/dashboard_counters.py ; recalcul : reconcile_dashboard_counters)
+    """
+    scope = models.CharField(max_length=64, help_text="'admin', 'technicians', 'employees', 'technician:<id>' ou 'requester:<id>'")
+    name = models.CharField(max_length=64, help_text="Clé du compteur dans la réponse du tableau de bord")
+    value = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = [('scope', 'name')]
+    
+    def __str__(self):
+        return f"{self.scope} {self.name}={self.value}"
@@ -0,0 +1,166 @@
+"""
+Background thumbnail / preview generation for attachments.
+
+Derivatives are computed once per blob (so a deduplicated file is only
+processed once) in a small thread pool, after the upload transaction has
+committed, and stored beside the original as ``<blob>.thumbnail.jpg`` and
+``<blob>.preview.jpg``.
+
+- images: downscaled with Pillow (JPEG draft mode decodes at reduced size)
+- videos: first frame extracted with ``ffmpeg`` when it is installed
+- PDFs: first page rendered with ``pdftoppm`` (poppler) when it is installed
+
+Files of other types, or whose tool is missing, are marked ``unsupported`` and
+the pages fall back to the original file.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import AttachmentBlob
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = ('thumbnail', 'preview')
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ATTACHMENT_PREVIEW_WORKERS,
+            thread_name_prefix='attachment-previews'
+        )
+    return _executor
+
+
+def variant_path(blob, variant):
+    return f'{blob.file.name}.{variant}.jpg'
+
+
+def schedule_previews(blob, mime_type):
+    """Queue derivative generation for ``blob`` once the current transaction commits"""
+    if not settings.ATTACHMENT_PREVIEWS or blob.preview_status != 'pending':
+        return
+    sha256 = blob.sha256
+    transaction.on_commit(lambda: _get_executor().submit(_run, sha256, mime_type))
+
+
+def _run(sha256, mime_type):
+    close_old_connections()
+    try:
+        generate_previews(sha256, mime_type)
+    except Exception as e:
+        logger.error(f"Preview generation failed for blob {sha256}: {str(e)}")
+        AttachmentBlob.objects.filter(pk=sha256).update(preview_status='failed')
+    finally:
+        close_old_connections()
+
+
+def _render_video_frame(path):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-i', path, '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+        capture_output=True,
+        timeout=60,
+        check=True,
+    )
+    return _open_bytes(result.stdout)
+
+
+def _render_pdf_page(path):
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'page')
+        subprocess.run(
+            [pdftoppm, '-png', '-singlefile', '-f', '1', '-l', '1',
+             '-scale-to', str(settings.ATTACHMENT_PREVIEW_SIZE), path, root],
+            capture_output=True,
+            timeout=60,
+            check=True,
+        )
+        with Image.open(root + '.png') as image:
+            return image.copy()
+
+
+def _open_bytes(data):
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def _render_source(path, mime_type):
+    if mime_type.startswith('image/'):
+        image = Image.open(path)
+        # Let the JPEG decoder scale down while decoding instead of after
+        size = settings.ATTACHMENT_PREVIEW_SIZE
+        image.draft('RGB', (size, size))
+        image.load()
+        return image
+    if mime_type.startswith('video/'):
+        return _render_video_frame(path)
+    if mime_type == 'application/pdf':
+        return _render_pdf_page(path)
+    return None
+
+
+def generate_previews(sha256, mime_type):
+    # Claim the blob so concurrent uploads of the same content do the work once
+    if not AttachmentBlob.objects.filter(pk=sha256, preview_status='pending').update(preview_status='processing'):
+        return
+    blob = AttachmentBlob.objects.get(pk=sha256)
+    if blob.encoding:
+        # Only text types are compressed by tiering, and those have no preview
+        AttachmentBlob.objects.filter(pk=sha256).update(preview_status='unsupported')
+        return
+
+    from .blob_store import blob_storage
+    source = _render_source(blob_storage(blob).path(blob.file.name), mime_type or '')
+    if source is None:
+        AttachmentBlob.objects.filter(pk=sha256).update(preview_status='unsupported')
+        return
+
+    sizes = {
+        'thumbnail': settings.ATTACHMENT_THUMBNAIL_SIZE,
+        'preview': settings.ATTACHMENT_PREVIEW_SIZE,
+    }
+    names = {}
+    with source:
+        # Phone screenshots/photos carry their rotation in EXIF
+        rgb = ImageOps.exif_transpose(source)
+        if rgb.mode not in ('RGB', 'L'):
+            rgb = rgb.convert('RGB')
+        for variant in VARIANTS:
+            image = rgb.copy()
+            image.thumbnail((sizes[variant], sizes[variant]))
+            name = variant_path(blob, variant)
+            path = default_storage.path(name)
+            temp_path = f'{path}.tmp'
+            image.save(temp_path, 'JPEG', quality=80, optimize=True)
+            os.replace(temp_path, path)
+            names[variant] = name
+
+    AttachmentBlob.objects.filter(pk=sha256).update(preview_status='ready', **names)
+
+
+def delete_previews(blob):
+    for variant in VARIANTS:
+        name = getattr(blob, variant).name
+        if name:
+            default_storage.delete(name)
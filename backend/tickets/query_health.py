@@ -0,0 +1,278 @@
+"""
+EXPLAIN-based query health report.
+
+The hottest read endpoints (ticket lists per role, dashboards, report
+aggregates) are called as a sample user of each role, every SELECT they run is
+captured, and each distinct statement is explained with its real parameters:
+``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` (``EXPLAIN ANALYZE`` with
+analyze=True) on PostgreSQL. Plans are scanned for full table scans and
+temporary B-trees / on-disk sorts, and the report lists table and index sizes
+next to them so index decisions rest on the actual plans and data.
+
+Building the report runs every sampled endpoint and an EXPLAIN per statement,
+over a hundred queries: performance_stats (admin only) serves the copy stored in
+the cache for QUERY_HEALTH_REPORT_TTL seconds, rebuilt on a miss, with
+``?refresh=1`` or by ``manage.py query_health --store`` from a periodic job.
+"""
+
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.models import User
+
+from .models import Ticket
+
+# (label, role of the sample user, URL name, needs a sample ticket, query params)
+HOT_ENDPOINTS = [
+    ('ticket_list', 'admin', 'ticket_list', False, {}),
+    ('ticket_list', 'technician', 'ticket_list', False, {}),
+    ('ticket_list', 'employee', 'ticket_list', False, {}),
+    ('ticket_list?filter=unassigned', 'technician', 'ticket_list', False, {'filter': 'unassigned'}),
+    ('ticket_detail', 'admin', 'ticket_detail', True, {}),
+    ('ticket_dashboard', 'technician', 'ticket_dashboard', False, {}),
+    ('dashboard', 'employee', 'dashboard', False, {}),
+    ('admin_dashboard_stats', 'admin', 'admin_dashboard_stats', False, {}),
+    ('recent_activity', 'admin', 'recent_activity', False, {}),
+    ('ticket_analytics', 'admin', 'ticket_analytics', False, {'time_filter': 'month'}),
+    ('sla_tracking', 'admin', 'sla_tracking', False, {'time_filter': 'month'}),
+    ('technician_statistics', 'admin', 'technician_statistics', False, {}),
+]
+
+# A full scan of a table at least this large is a warning, below it a note
+FULL_SCAN_WARNING_ROWS = 1000
+
+REPORT_CACHE_KEY = 'query_health:report:{}'
+
+# SCAN walks the whole table, even in index order (SEARCH is a lookup)
+_SQLITE_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW|subquery)(\w+)')
+_SQLITE_TEMP = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+_POSTGRES_DISK_SORT = re.compile(r'Sort Method: external|Disk: \d+kB')
+_POSTGRES_TIME = re.compile(r'Execution Time: ([\d.]+) ms')
+
+
+def _sample_users():
+    users = {}
+    for role in ('admin', 'technician', 'employee'):
+        user = User.objects.filter(role=role, is_active=True).order_by('date_joined').first()
+        if user is not None:
+            users[role] = user
+    return users
+
+
+def capture_selects(func):
+    """Run ``func`` and return ``[(sql, params, seconds)]`` for every SELECT it ran"""
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if sql.lstrip().upper().startswith('SELECT'):
+                statements.append((sql, params, time.perf_counter() - started))
+
+    with connection.execute_wrapper(capture):
+        func()
+    return statements
+
+
+def explain(sql, params, analyze=False):
+    """``(plan lines, findings)`` for one statement"""
+    findings = {'full_scans': [], 'temp_btrees': [], 'execution_ms': None}
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[3] for row in cursor.fetchall()]
+            for detail in plan:
+                scan = _SQLITE_SCAN.match(detail)
+                if scan:
+                    findings['full_scans'].append(scan.group(1))
+                temp = _SQLITE_TEMP.search(detail)
+                if temp:
+                    findings['temp_btrees'].append(temp.group(1))
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"EXPLAIN {'(ANALYZE, BUFFERS) ' if analyze else ''}{sql}", params)
+            plan = [row[0] for row in cursor.fetchall()]
+            for line in plan:
+                scan = _POSTGRES_SCAN.search(line)
+                if scan:
+                    findings['full_scans'].append(scan.group(1))
+                if _POSTGRES_DISK_SORT.search(line):
+                    findings['temp_btrees'].append(line.strip())
+                executed = _POSTGRES_TIME.search(line)
+                if executed:
+                    findings['execution_ms'] = float(executed.group(1))
+        else:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = [' '.join(str(value) for value in row) for row in cursor.fetchall()]
+    return plan, findings
+
+
+def table_sizes():
+    """Row counts and on-disk sizes of the project tables and their indexes"""
+    tables = {
+        name: {'table': name, 'rows': None, 'size_bytes': None, 'indexes': []}
+        for name in connection.introspection.django_table_names(only_existing=True)
+    }
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT relname, n_live_tup, pg_relation_size(relid) FROM pg_stat_user_tables'
+            )
+            for name, rows, size in cursor.fetchall():
+                if name in tables:
+                    tables[name].update(rows=rows, size_bytes=size)
+            cursor.execute(
+                'SELECT relname, indexrelname, pg_relation_size(indexrelid), idx_scan FROM pg_stat_user_indexes'
+            )
+            for table, index, size, scans in cursor.fetchall():
+                if table in tables:
+                    tables[table]['indexes'].append({'name': index, 'size_bytes': size, 'scans': scans})
+        else:
+            # Every table counted in one statement rather than one query per table
+            if tables:
+                cursor.execute(' UNION ALL '.join(
+                    f'SELECT %s, COUNT(*) FROM {connection.ops.quote_name(name)}' for name in tables
+                ), list(tables))
+                for name, rows in cursor.fetchall():
+                    tables[name]['rows'] = rows
+            sizes = {}
+            if connection.vendor == 'sqlite':
+                try:
+                    cursor.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')
+                    sizes = dict(cursor.fetchall())
+                except Exception:
+                    # SQLite built without the dbstat table: counts only
+                    pass
+                cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'")
+                for index, table in cursor.fetchall():
+                    if table in tables:
+                        tables[table]['indexes'].append({'name': index, 'size_bytes': sizes.get(index), 'scans': None})
+            for name, info in tables.items():
+                info['size_bytes'] = sizes.get(name)
+    return sorted(tables.values(), key=lambda info: info['size_bytes'] or info['rows'] or 0, reverse=True)
+
+
+def build_report(analyze=False, only=None):
+    """
+    Run the hot endpoints (``only``: labels to restrict to) and explain their queries.
+    ``analyze`` executes the statements again under EXPLAIN ANALYZE on PostgreSQL.
+    """
+    users = _sample_users()
+    ticket = Ticket.objects.order_by('-created_at').first()
+    sizes = table_sizes()
+    rows_by_table = {info['table']: info['rows'] or 0 for info in sizes}
+    factory = APIRequestFactory()
+
+    endpoints = []
+    skipped = []
+    for label, role, url_name, needs_ticket, params in HOT_ENDPOINTS:
+        if only and label not in only:
+            continue
+        user = users.get(role)
+        if user is None or (needs_ticket and ticket is None):
+            skipped.append({'endpoint': label, 'role': role, 'reason': 'no sample data'})
+            continue
+        path = reverse(url_name, kwargs={'pk': ticket.pk} if needs_ticket else None)
+        match = resolve(path)
+
+        def call():
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+
+        started = time.perf_counter()
+        statements = capture_selects(call)
+        duration = time.perf_counter() - started
+
+        # Explain each distinct statement once, with the parameters it first ran with
+        distinct = {}
+        for sql, statement_params, seconds in statements:
+            entry = distinct.setdefault(sql, {'sql': sql, 'params': statement_params, 'count': 0, 'duration_ms': 0.0})
+            entry['count'] += 1
+            entry['duration_ms'] += seconds * 1000
+        explained = []
+        for entry in distinct.values():
+            plan, findings = explain(entry['sql'], entry['params'], analyze=analyze)
+            severity = None
+            if findings['temp_btrees']:
+                severity = 'note'
+            if findings['full_scans']:
+                largest = max(rows_by_table.get(table, 0) for table in findings['full_scans'])
+                severity = 'warning' if largest >= FULL_SCAN_WARNING_ROWS else severity or 'note'
+            explained.append({
+                'sql': entry['sql'],
+                'count': entry['count'],
+                'duration_ms': round(entry['duration_ms'], 2),
+                'plan': plan,
+                'severity': severity,
+                **findings,
+            })
+        explained.sort(key=lambda statement: statement['duration_ms'], reverse=True)
+        endpoints.append({
+            'endpoint': label,
+            'role': role,
+            'queries': len(statements),
+            'distinct_queries': len(explained),
+            'duration_ms': round(duration * 1000, 2),
+            'statements': explained,
+        })
+
+    flagged = [
+        {
+            'endpoint': endpoint['endpoint'],
+            'role': endpoint['role'],
+            'severity': statement['severity'],
+            'full_scans': statement['full_scans'],
+            'temp_btrees': statement['temp_btrees'],
+            'sql': statement['sql'],
+        }
+        for endpoint in endpoints
+        for statement in endpoint['statements']
+        if statement['severity']
+    ]
+    flagged.sort(key=lambda item: item['severity'] != 'warning')
+    return {
+        'database': connection.vendor,
+        'analyze': analyze and connection.vendor == 'postgresql',
+        'generated_at': timezone.now().isoformat(),
+        'endpoints': endpoints,
+        'skipped': skipped,
+        'flagged': flagged,
+        'tables': sizes,
+    }
+
+
+def store_report(analyze=False):
+    """Build the full report and store it for performance_stats"""
+    report = build_report(analyze=analyze)
+    cache.set(REPORT_CACHE_KEY.format(int(analyze)), report, settings.QUERY_HEALTH_REPORT_TTL)
+    return report
+
+
+def stored_report(analyze=False, only=None, refresh=False):
+    """
+    The stored report, built first when missing or with ``refresh``.
+    ``only`` restricts it to those endpoint labels.
+    """
+    report = None if refresh else cache.get(REPORT_CACHE_KEY.format(int(analyze)))
+    if report is None:
+        report = store_report(analyze)
+    if only:
+        report = dict(
+            report,
+            endpoints=[endpoint for endpoint in report['endpoints'] if endpoint['endpoint'] in only],
+            skipped=[skipped for skipped in report['skipped'] if skipped['endpoint'] in only],
+            flagged=[item for item in report['flagged'] if item['endpoint'] in only],
+        )
+    return report
@@ -0,0 +1,64 @@
+"""
+Per-ticket attachment quota.
+
+Ticket.attachment_count / attachment_bytes are kept up to date with
+conditional UPDATEs, so enforcing MAX_ATTACHMENTS_PER_TICKET and
+MAX_ATTACHMENT_BYTES_PER_TICKET never needs a COUNT/SUM over attachments
+and two concurrent uploads cannot both take the last slot.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F
+
+from .models import Ticket
+
+
+def _limit_error(attachment_count):
+    if attachment_count >= settings.MAX_ATTACHMENTS_PER_TICKET:
+        return ValidationError(f'A ticket can have at most {settings.MAX_ATTACHMENTS_PER_TICKET} attachments')
+    return ValidationError(
+        f'Attachments of a ticket cannot exceed {settings.MAX_ATTACHMENT_BYTES_PER_TICKET / (1024*1024)}MB in total'
+    )
+
+
+def _quota_error(ticket_id, size):
+    counters = Ticket.objects.filter(id=ticket_id).values('attachment_count', 'attachment_bytes').first()
+    if counters is None:
+        return ValidationError('Ticket not found')
+    return _limit_error(counters['attachment_count'])
+
+
+def check_attachment_quota(ticket, size):
+    """Early check on an already loaded ticket, before any byte is stored"""
+    if (ticket.attachment_count >= settings.MAX_ATTACHMENTS_PER_TICKET
+            or ticket.attachment_bytes + size > settings.MAX_ATTACHMENT_BYTES_PER_TICKET):
+        raise _quota_error(ticket.id, size)
+
+
+def check_quota_counters(attachment_count, attachment_bytes, size):
+    """Same check against counters that are not stored yet (files sent with a new ticket)"""
+    if (attachment_count >= settings.MAX_ATTACHMENTS_PER_TICKET
+            or attachment_bytes + size > settings.MAX_ATTACHMENT_BYTES_PER_TICKET):
+        raise _limit_error(attachment_count)
+
+
+def reserve_attachment_quota(ticket_id, size):
+    """Take one slot and ``size`` bytes, or raise ValidationError (run in the attachment's transaction)"""
+    reserved = Ticket.objects.filter(
+        id=ticket_id,
+        attachment_count__lt=settings.MAX_ATTACHMENTS_PER_TICKET,
+        attachment_bytes__lte=settings.MAX_ATTACHMENT_BYTES_PER_TICKET - size,
+    ).update(
+        attachment_count=F('attachment_count') + 1,
+        attachment_bytes=F('attachment_bytes') + size,
+    )
+    if not reserved:
+        raise _quota_error(ticket_id, size)
+
+
+def release_attachment_quota(ticket_id, size):
+    Ticket.objects.filter(id=ticket_id, attachment_count__gt=0).update(
+        attachment_count=F('attachment_count') - 1,
+        attachment_bytes=F('attachment_bytes') - size,
+    )
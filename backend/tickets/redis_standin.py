@@ -0,0 +1,161 @@
+"""
+Minimal Redis-protocol (RESP2) server used as a local stand-in for Redis.
+
+It implements just enough of the protocol for the pub/sub channel layer
+(PUBLISH / SUBSCRIBE / UNSUBSCRIBE plus the handshake commands redis-py sends),
+so multi-worker fan-out can be exercised and benchmarked without a Redis install.
+It is not a general purpose Redis replacement and keeps no data.
+"""
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _bulk(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(*items):
+    parts = [b'*%d\r\n' % len(items)]
+    for item in items:
+        if isinstance(item, int):
+            parts.append(b':%d\r\n' % item)
+        else:
+            parts.append(_bulk(item))
+    return b''.join(parts)
+
+
+class RedisStandInServer:
+    """Asyncio pub/sub server speaking the Redis wire protocol"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self._server = None
+        # channel name -> set of subscribed StreamWriters
+        self._subscribers = {}
+        self.published = 0
+
+    @property
+    def url(self):
+        return f'redis://{self.host}:{self.port}'
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command (e.g. typed through telnet / redis-cli --no-raw)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            length = int(header[1:])
+            data = await reader.readexactly(length + 2)
+            args.append(data[:-2])
+        return args
+
+    async def _handle_client(self, reader, writer):
+        subscriptions = set()
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                command = args[0].upper()
+
+                if command == b'PUBLISH':
+                    writer.write(b':%d\r\n' % self._publish(args[1], args[2]))
+                elif command == b'SUBSCRIBE':
+                    for channel in args[1:]:
+                        self._subscribers.setdefault(channel, set()).add(writer)
+                        subscriptions.add(channel)
+                        writer.write(_array(b'subscribe', channel, len(subscriptions)))
+                elif command == b'UNSUBSCRIBE':
+                    channels = args[1:] or list(subscriptions)
+                    for channel in channels:
+                        self._unsubscribe(channel, writer)
+                        subscriptions.discard(channel)
+                        writer.write(_array(b'unsubscribe', channel, len(subscriptions)))
+                elif command == b'PING':
+                    writer.write(_bulk(args[1]) if len(args) > 1 else b'+PONG\r\n')
+                elif command == b'ECHO':
+                    writer.write(_bulk(args[1]))
+                elif command in (b'CLIENT', b'SELECT', b'FLUSHDB', b'FLUSHALL', b'AUTH'):
+                    writer.write(b'+OK\r\n')
+                elif command == b'QUIT':
+                    writer.write(b'+OK\r\n')
+                    break
+                else:
+                    writer.write(b"-ERR unknown command '%s'\r\n" % args[0])
+
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for channel in subscriptions:
+                self._unsubscribe(channel, writer)
+            writer.close()
+
+    def _publish(self, channel, message):
+        self.published += 1
+        receivers = self._subscribers.get(channel, ())
+        if receivers:
+            frame = _array(b'message', channel, message)
+            for subscriber in receivers:
+                subscriber.write(frame)
+        return len(receivers)
+
+    def _unsubscribe(self, channel, writer):
+        receivers = self._subscribers.get(channel)
+        if receivers is not None:
+            receivers.discard(writer)
+            if not receivers:
+                del self._subscribers[channel]
+
+
+def start_in_thread(host='127.0.0.1', port=0):
+    """
+    Run a stand-in server on a background event loop.
+    Returns ``(server, stop)`` where ``stop()`` shuts the loop down.
+    """
+    loop = asyncio.new_event_loop()
+    server = RedisStandInServer(host, port)
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(server.close())
+        loop.close()
+
+    thread = threading.Thread(target=run, name='redis-standin', daemon=True)
+    thread.start()
+    ready.wait()
+    logger.info(f"Redis stand-in listening on {server.url}")
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    return server, stop
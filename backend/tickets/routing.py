@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/tickets/(?P<ticket_id>[^/]+)/$', consumers.TicketChatConsumer.as_asgi()),
+    re_path(r'ws/dashboard/$', consumers.DashboardConsumer.as_asgi()),
 ] 
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+Synthetic dataset for load tests and query tuning (``manage.py seed_data``).
+
+Users of every role and group are created once, then tickets are generated
+in batches and written with ``bulk_create`` together with the rows their
+lifecycle leaves behind: events, messages, additional technicians, closure
+reports and replaced parts. Timestamps follow a realistic shape:
+
+- creation: volume growing over the period, weekdays busier than weekends,
+  office-hour peaks in the morning and early afternoon
+- claim delay: exponential, shorter for higher priorities
+- resolution time: log-normal after the claim, longer for lower priorities
+- a share of closed tickets is reopened and closed again
+
+Tickets still in progress at the end of the period stay open / in progress,
+so recent data looks like a live queue. Requesters and technicians are picked
+with a skewed distribution (a few users file or handle most tickets).
+
+``bulk_create`` bypasses ``Ticket.save()``, the transitions and their signals,
+so short ids, priorities and timestamps are set here and the dashboard
+counters are recounted at the end.
+"""
+
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import models, transaction
+from django.utils import timezone
+
+from users.models import User
+
+from .dashboard_counters import reconcile
+from .models import ReplacedPart, Ticket, TicketClosureReport, TicketEvent, TicketMessage
+
+SEED_PASSWORD = 'seed-password'
+SEED_EMAIL = 'seed.{role}.{index}@example.com'
+SEED_SHORT_ID = 'SEED-{:07d}'
+
+# Share of employees per group (drives the ticket priority)
+GROUP_WEIGHTS = {
+    'Employee': 55,
+    'Intern': 10,
+    'Supervisor': 12,
+    'HR': 8,
+    'Manager': 11,
+    'Director': 4,
+}
+
+TYPE_WEIGHTS = {'Software': 45, 'Hardware': 35, 'Network': 20}
+
+# Tickets per hour of the day (office hours, dip at lunch)
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 1, 3, 8, 20, 30, 32, 26, 14, 22, 28, 26, 20, 12, 6, 4, 3, 2, 2, 1]
+# Monday .. Sunday
+WEEKDAY_WEIGHTS = [1.25, 1.1, 1.0, 1.0, 0.9, 0.2, 0.15]
+
+# Mean claim delay and median resolution time, in hours
+CLAIM_HOURS = {'P1': 0.5, 'P2': 2, 'P3': 6, 'P4': 12}
+RESOLUTION_HOURS = {'P1': 3, 'P2': 8, 'P3': 20, 'P4': 36}
+
+ADDITIONAL_TECHNICIAN_RATE = 0.12
+REOPEN_RATE = 0.06
+RECURRING_RATE = 0.1
+MESSAGE_COUNT_WEIGHTS = [30, 20, 20, 12, 8, 5, 3, 2]
+
+SUBJECTS = {
+    'Software': [
+        'Outlook ne démarre plus', 'Licence logicielle expirée', 'Mise à jour Windows bloquée',
+        "Erreur à l'ouverture d'Excel", 'Installation de logiciel demandée', 'ERP très lent',
+        'Mot de passe de session expiré', 'Antivirus signale une menace',
+    ],
+    'Hardware': [
+        'Écran qui clignote', 'Imprimante bloquée', 'Clavier défectueux', 'PC portable ne charge plus',
+        'Disque dur bruyant', 'Souris sans fil ne répond pas', 'Station d\'accueil non reconnue',
+    ],
+    'Network': [
+        'Pas de connexion Wi-Fi', 'VPN déconnecté', 'Lecteur réseau inaccessible',
+        'Internet très lent', 'Téléphone IP sans tonalité', 'Accès refusé au serveur de fichiers',
+    ],
+}
+SUBTYPES = {
+    'software': ['Application métier', 'Messagerie', 'Système', 'Sécurité', 'Licence'],
+    'hardware': ['Poste de travail', 'Périphérique', 'Impression', 'Portable'],
+    'network': ['Wi-Fi', 'VPN', 'Câblage', 'Partage réseau', 'Téléphonie'],
+}
+PARTS = ['Disque SSD 512 Go', 'Barrette RAM 8 Go', 'Clavier', 'Écran 24"', 'Batterie', 'Alimentation', 'Carte réseau']
+MESSAGES = [
+    'Bonjour, pouvez-vous me donner plus de détails ?', 'Le problème est toujours présent.',
+    'Je passe à votre bureau dans la matinée.', 'Pouvez-vous redémarrer le poste et réessayer ?',
+    'Merci, cela fonctionne de nouveau.', "J'ai joint une capture d'écran.",
+    'Intervention planifiée pour demain.', 'Le ticket peut être fermé de mon côté.',
+]
+
+
+@contextmanager
+def explicit_timestamps(*model_classes):
+    """Let bulk_create keep the created_at / updated_at values set on the instances"""
+    fields = [
+        field for model in model_classes for field in model._meta.concrete_fields
+        if isinstance(field, models.DateTimeField) and (field.auto_now or field.auto_now_add)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _skewed_weights(count, exponent):
+    """Zipf-like weights: the first users get most of the activity"""
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+class DatasetGenerator:
+    def __init__(self, days=365, growth=1.0, seed=None, password=SEED_PASSWORD):
+        self.rng = random.Random(seed)
+        self.now = timezone.now().replace(microsecond=0)
+        # Days start at local midnight so the hour weights are office hours
+        today = timezone.localtime(self.now).replace(hour=0, minute=0, second=0)
+        self.start = today - timedelta(days=days - 1)
+        self.days = days
+        self.password = password
+
+        day_weights = []
+        for day in range(days):
+            date = self.start + timedelta(days=day)
+            day_weights.append((1 + growth * day / max(days - 1, 1)) * WEEKDAY_WEIGHTS[date.weekday()])
+        self._day_weights = list(_cumulative(day_weights))
+        self._hour_weights = list(_cumulative(HOUR_WEIGHTS))
+
+    # Users
+
+    def ensure_users(self, employees, technicians, admins):
+        """Create the missing seed users; returns ``({role: [users]}, number created)``"""
+        encoded = make_password(self.password)
+        wanted = {'employee': employees, 'technician': technicians, 'admin': admins}
+        emails = {
+            SEED_EMAIL.format(role=role, index=index): (role, index)
+            for role, count in wanted.items() for index in range(count)
+        }
+        seeded = User.objects.filter(email__startswith='seed.')
+        existing = set(seeded.values_list('email', flat=True))
+        groups, group_weights = list(GROUP_WEIGHTS), list(GROUP_WEIGHTS.values())
+
+        new_users = []
+        for email, (role, index) in emails.items():
+            if email in existing:
+                continue
+            if role == 'employee':
+                group = self.rng.choices(groups, group_weights)[0]
+            elif role == 'technician':
+                group = 'Employee'
+            else:
+                group = 'Manager'
+            new_users.append(User(
+                email=email,
+                username=f'seed_{role}_{index}',
+                first_name=role.title(),
+                last_name=str(index),
+                role=role,
+                group=group,
+                password=encoded,
+                is_staff=role == 'admin',
+                date_joined=self.start - timedelta(days=self.rng.randint(1, 720)),
+            ))
+        User.objects.bulk_create(new_users, batch_size=1000)
+
+        users = {role: [] for role in wanted}
+        for user in seeded.iterator():
+            if user.email in emails:
+                users[user.role].append(user)
+        for role in users:
+            users[role].sort(key=lambda user: emails[user.email][1])
+        return users, len(new_users)
+
+    # Tickets
+
+    def _created_at(self):
+        while True:
+            day = self.rng.choices(range(self.days), cum_weights=self._day_weights)[0]
+            hour = self.rng.choices(range(24), cum_weights=self._hour_weights)[0]
+            created_at = self.start + timedelta(days=day, hours=hour, seconds=self.rng.randrange(3600))
+            # Later today is in the future
+            if created_at <= self.now:
+                return created_at
+
+    def _after(self, moment, median_hours, sigma=1.0):
+        hours = self.rng.lognormvariate(math.log(median_hours), sigma)
+        return moment + timedelta(hours=hours)
+
+    def build_batch(self, first_number, count, users):
+        """Model instances for ``count`` tickets and everything they produced"""
+        rng = self.rng
+        employees, technicians, admins = users['employee'], users['technician'], users['admin']
+        requester_weights = self._requester_weights
+        technician_weights = self._technician_weights
+        types, type_weights = list(TYPE_WEIGHTS), list(_cumulative(TYPE_WEIGHTS.values()))
+        priority_mapping = settings.PRIORITY_MAPPING
+        through = Ticket.additional_technicians.through
+
+        rows = {'tickets': [], 'technicians': [], 'events': [], 'messages': [], 'reports': [], 'parts': []}
+
+        def event(ticket, actor, event_type, at, from_value=None, to_value=None):
+            rows['events'].append(TicketEvent(
+                ticket=ticket, actor=actor, event_type=event_type,
+                from_value=from_value, to_value=to_value, created_at=at,
+            ))
+
+        for number in range(first_number, first_number + count):
+            requester = rng.choices(employees, cum_weights=requester_weights)[0]
+            ticket_type = rng.choices(types, cum_weights=type_weights)[0]
+            priority = priority_mapping.get(requester.group, 'P4')
+            created_at = self._created_at()
+            ticket = Ticket(
+                short_id=SEED_SHORT_ID.format(number),
+                subject=rng.choice(SUBJECTS[ticket_type]),
+                type=ticket_type,
+                description=f'<p>{rng.choice(SUBJECTS[ticket_type])}. {rng.choice(MESSAGES)}</p>',
+                status='open',
+                priority=priority,
+                requester=requester,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            rows['tickets'].append(ticket)
+            event(ticket, requester, 'created', created_at)
+
+            claimed_at = created_at + timedelta(hours=rng.expovariate(1 / CLAIM_HOURS[priority]))
+            if claimed_at > self.now or not technicians:
+                continue
+            technician = rng.choices(technicians, cum_weights=technician_weights)[0]
+            ticket.claimed_by = technician
+            ticket.status = 'in_progress'
+            ticket.updated_at = claimed_at
+            event(ticket, technician, 'claimed', claimed_at, 'open', 'in_progress')
+            working = [technician]
+
+            if admins and len(technicians) > 1 and rng.random() < ADDITIONAL_TECHNICIAN_RATE:
+                added_at = self._after(claimed_at, 1)
+                helper = rng.choice([other for other in technicians if other != technician])
+                if added_at < self.now:
+                    rows['technicians'].append(through(ticket_id=ticket.id, user_id=helper.id))
+                    event(ticket, rng.choice(admins), 'technician_added', added_at, '', helper.get_full_name())
+                    working.append(helper)
+
+            # Reopened tickets go through up to two resolution cycles
+            cycles = 2 if rng.random() < REOPEN_RATE else 1
+            started_at = claimed_at
+            for cycle in range(cycles):
+                closed_at = self._after(started_at, RESOLUTION_HOURS[priority])
+                messages = rng.choices(range(len(MESSAGE_COUNT_WEIGHTS)), MESSAGE_COUNT_WEIGHTS)[0]
+                end = min(closed_at, self.now)
+                for index in range(messages):
+                    sent_at = started_at + (end - started_at) * rng.random()
+                    sender = requester if index % 2 else rng.choice(working)
+                    rows['messages'].append(TicketMessage(
+                        ticket=ticket, sender=sender, message_text=rng.choice(MESSAGES), created_at=sent_at,
+                    ))
+                    ticket.updated_at = max(ticket.updated_at, sent_at)
+                if closed_at > self.now:
+                    break
+
+                closer = rng.choice(working)
+                problem_type = ticket_type.lower()
+                report = TicketClosureReport(
+                    ticket=ticket,
+                    problem_type=problem_type,
+                    problem_subtype=rng.choice(SUBTYPES[problem_type]),
+                    root_cause=f'{ticket.subject} : cause identifiée lors du diagnostic',
+                    solution_applied='Correction appliquée et vérifiée avec l\'utilisateur',
+                    is_recurring_problem=rng.random() < RECURRING_RATE,
+                    created_by=closer,
+                    created_at=closed_at,
+                )
+                rows['reports'].append(report)
+                if ticket_type == 'Hardware' and rng.random() < 0.5:
+                    for _ in range(rng.randint(1, 3)):
+                        rows['parts'].append(ReplacedPart(
+                            closure_report=report,
+                            part_name=rng.choice(PARTS),
+                            serial_number=f'SN{rng.randrange(10 ** 9):09d}',
+                            created_at=closed_at,
+                        ))
+                ticket.status = 'closed'
+                ticket.closed_at = closed_at
+                ticket.updated_at = closed_at
+                event(ticket, closer, 'closed', closed_at, 'open', 'closed')
+
+                if cycle + 1 < cycles:
+                    reopened_at = self._after(closed_at, 24)
+                    if reopened_at > self.now:
+                        break
+                    ticket.status = 'reopened'
+                    ticket.closed_at = None
+                    ticket.updated_at = reopened_at
+                    event(ticket, closer, 'reopened', reopened_at, 'closed', 'open')
+                    started_at = reopened_at
+        return rows
+
+    def generate(self, tickets, users, batch_size=5000, progress=None):
+        """Insert ``tickets`` tickets in batches; ``progress(done, rows)`` after each one"""
+        if tickets and not users['employee']:
+            raise ValueError('At least one employee is needed to request tickets')
+        self._requester_weights = list(_cumulative(_skewed_weights(len(users['employee']), 0.8)))
+        self._technician_weights = list(_cumulative(_skewed_weights(len(users['technician']), 0.4)))
+
+        first_number = Ticket.objects.filter(short_id__startswith='SEED-').count() + 1
+        done = 0
+        totals = {}
+        with explicit_timestamps(Ticket, TicketEvent, TicketMessage, TicketClosureReport, ReplacedPart):
+            while done < tickets:
+                count = min(batch_size, tickets - done)
+                rows = self.build_batch(first_number + done, count, users)
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(rows['tickets'], batch_size=batch_size)
+                    Ticket.additional_technicians.through.objects.bulk_create(rows['technicians'], batch_size=batch_size)
+                    TicketEvent.objects.bulk_create(rows['events'], batch_size=batch_size)
+                    TicketMessage.objects.bulk_create(rows['messages'], batch_size=batch_size)
+                    TicketClosureReport.objects.bulk_create(rows['reports'], batch_size=batch_size)
+                    ReplacedPart.objects.bulk_create(rows['parts'], batch_size=batch_size)
+                done += count
+                for name, instances in rows.items():
+                    totals[name] = totals.get(name, 0) + len(instances)
+                if progress:
+                    progress(done, totals)
+        return totals
+
+
+def _cumulative(weights):
+    total = 0
+    for weight in weights:
+        total += weight
+        yield total
+
+
+def seed(tickets, employees, technicians, admins, days=365, growth=1.0, batch_size=5000,
+         seed=None, password=SEED_PASSWORD, progress=None):
+    """
+    Create the seed users and ``tickets`` tickets, then recount the dashboard
+    counters. Returns the number of users created and the rows per table.
+    """
+    generator = DatasetGenerator(days=days, growth=growth, seed=seed, password=password)
+    users, created_users = generator.ensure_users(employees, technicians, admins)
+    totals = generator.generate(tickets, users, batch_size=batch_size, progress=progress)
+    reconcile()
+    return created_users, totals
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Ticket, TicketAttachment, TicketEvent, TicketMessage, TicketClosureReport, TicketClosureReportAttachment, ReplacedPart
+from .models import Ticket, TicketAttachment, TicketEvent, TicketMessage, TicketClosureReport, TicketClosureReportAttachment, ReplacedPart, UploadSession
+from .downloads import signed_download_url, preview_urls
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -11,17 +12,53 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'first_name', 'last_name', 'email', 'phone', 'role', 'group']
 
 
-class TicketAttachmentSerializer(serializers.ModelSerializer):
+class AttachmentPreviewUrlsMixin:
+    """Signs the thumbnail and preview URLs of an attachment once for both fields"""
+    
+    def _preview_urls(self, obj):
+        urls = getattr(obj, '_preview_urls', None)
+        if urls is None:
+            urls = obj._preview_urls = preview_urls(self.context.get('request'), obj)
+        return urls
+
+
+class TicketAttachmentSerializer(AttachmentPreviewUrlsMixin, serializers.ModelSerializer):
+    storage_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = TicketAttachment
-        fields = ['id', 'file_name', 'mime_type', 'size_bytes', 'storage_url', 'uploaded_by', 'created_at']
+        fields = ['id', 'file_name', 'mime_type', 'size_bytes', 'storage_url', 'thumbnail_url', 'preview_url', 'uploaded_by', 'created_at']
         read_only_fields = ['id', 'file_name', 'mime_type', 'size_bytes', 'uploaded_by', 'created_at']
     
+    def get_storage_url(self, obj):
+        return signed_download_url(self.context.get('request'), obj)
+    
+    def get_thumbnail_url(self, obj):
+        return self._preview_urls(obj)[0]
+    
+    def get_preview_url(self, obj):
+        return self._preview_urls(obj)[1]
+    
     def validate(self, data):
         print(f"TicketAttachmentSerializer validate called with data: {data}")
         return data
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'ticket', 'target', 'file_name', 'mime_type', 'total_size', 'received_bytes', 'sha256', 'status', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'ticket', 'received_bytes', 'status', 'created_at', 'updated_at']
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+            raise serializers.ValidationError('sha256 must be a 64 character hex digest')
+        return value
+
+
 class TicketEventSerializer(serializers.ModelSerializer):
     actor = UserSerializer(read_only=True)
     
@@ -44,10 +81,23 @@ class ReplacedPartSerializer(serializers.ModelSerializer):
         fields = ['id', 'part_name', 'serial_number']
 
 
-class TicketClosureReportAttachmentSerializer(serializers.ModelSerializer):
+class TicketClosureReportAttachmentSerializer(AttachmentPreviewUrlsMixin, serializers.ModelSerializer):
+    storage_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = TicketClosureReportAttachment
-        fields = ['id', 'file_name', 'mime_type', 'size_bytes', 'storage_url', 'uploaded_by', 'created_at']
+        fields = ['id', 'file_name', 'mime_type', 'size_bytes', 'storage_url', 'thumbnail_url', 'preview_url', 'uploaded_by', 'created_at']
+    
+    def get_storage_url(self, obj):
+        return signed_download_url(self.context.get('request'), obj)
+    
+    def get_thumbnail_url(self, obj):
+        return self._preview_urls(obj)[0]
+    
+    def get_preview_url(self, obj):
+        return self._preview_urls(obj)[1]
 
 
 class TicketClosureReportSerializer(serializers.ModelSerializer):
@@ -91,10 +141,10 @@ class TicketSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'short_id', 'subject', 'type', 'description', 'status',
             'priority', 'requester', 'assigned_to', 'claimed_by', 'additional_technicians',
-            'created_at', 'updated_at', 'closed_at', 'attachments', 'events',
-            'messages', 'closure_reports'
+            'created_at', 'updated_at', 'closed_at', 'attachments', 'attachment_count',
+            'attachment_bytes', 'events', 'messages', 'closure_reports'
         ]
-        read_only_fields = ['id', 'short_id', 'created_at', 'updated_at', 'closed_at']
+        read_only_fields = ['id', 'short_id', 'created_at', 'updated_at', 'closed_at', 'attachment_count', 'attachment_bytes']
     
     def get_closure_reports(self, obj):
         """Get all closure reports for this ticket"""
@@ -113,6 +163,30 @@ class TicketCreateSerializer(serializers.ModelSerializer):
             'subject', 'type', 'description'
         ]
     
+    def validate(self, data):
+        """
+        Check every file sent with the ticket (type, size, content, ticket quota)
+        before anything is created, and reject the request listing the bad ones.
+        """
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from .quotas import check_quota_counters
+        from .uploads import validate_upload, read_head
+        
+        rejected = []
+        attachment_count = attachment_bytes = 0
+        for file in self.context['request'].FILES.getlist('attachments'):
+            try:
+                validate_upload(file.name, file.size, read_head(file))
+                check_quota_counters(attachment_count, attachment_bytes, file.size)
+            except DjangoValidationError as e:
+                rejected.append(f'{file.name}: {e.messages[0]}')
+                continue
+            attachment_count += 1
+            attachment_bytes += file.size
+        if rejected:
+            raise serializers.ValidationError({'attachments': rejected})
+        return data
+    
     def create(self, validated_data):
         print(f"TicketCreateSerializer.create called with validated_data: {validated_data}")
         
@@ -121,28 +195,29 @@ class TicketCreateSerializer(serializers.ModelSerializer):
         
         print(f"About to create ticket with data: {validated_data}")
         
-        # Create the ticket
-        ticket = Ticket.objects.create(**validated_data)
+        # Create the ticket; its dashboard counters are stored in the same transaction
+        from django.db import transaction
+        from .live_updates import live_updates
+        with transaction.atomic():
+            ticket = Ticket.objects.create(**validated_data)
+            live_updates.ticket_created(ticket, self.context['request'].user)
         
         print(f"Ticket created successfully: {ticket.id}")
         
-        # Handle attachments if they exist in the request
+        # Attachments were validated with the ticket data (see validate())
         request = self.context['request']
-        if hasattr(request, 'FILES') and request.FILES:
-            print(f"Processing {len(request.FILES)} attachments for ticket {ticket.id}")
-            for file in request.FILES.getlist('attachments'):
-                try:
-                    attachment = TicketAttachment.objects.create(
-                        ticket=ticket,
-                        uploaded_by=request.user,
-                        file_name=file.name,
-                        mime_type=file.content_type,
-                        size_bytes=file.size,
-                        storage_url=file
-                    )
-                    print(f"Created attachment: {attachment.file_name}")
-                except Exception as e:
-                    print(f"Error creating attachment {file.name}: {e}")
+        from .blob_store import store_uploaded_file, create_attachment
+        for file in request.FILES.getlist('attachments'):
+            blob = store_uploaded_file(file)
+            attachment = create_attachment(
+                TicketAttachment,
+                blob,
+                ticket=ticket,
+                uploaded_by=request.user,
+                file_name=file.name,
+                mime_type=file.content_type
+            )
+            print(f"Created attachment: {attachment.file_name}")
         
         # Create the "created" event
         TicketEvent.objects.create(
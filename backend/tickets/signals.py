@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from .dashboard_counters import apply_deltas, counter_deltas, reconcile
+from .models import Ticket, TicketAttachment, TicketClosureReportAttachment
+
+
+@receiver(post_delete, sender=TicketAttachment)
+@receiver(post_delete, sender=TicketClosureReportAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    """Give back the blob reference (also runs for cascading ticket deletes)"""
+    if instance.blob_id:
+        from .blob_store import release_blob
+        release_blob(instance.blob_id)
+
+
+@receiver(post_delete, sender=TicketAttachment)
+def release_ticket_attachment_quota(sender, instance, **kwargs):
+    from .quotas import release_attachment_quota
+    release_attachment_quota(instance.ticket_id, instance.size_bytes)
+
+
+@receiver(pre_delete, sender=Ticket)
+def capture_dashboard_state(sender, instance, **kwargs):
+    # Technicians and reopened events are still there before the cascade runs
+    from .live_updates import live_updates
+    instance._dashboard_state = live_updates.snapshot(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_from_dashboard_counters(sender, instance, **kwargs):
+    state = getattr(instance, '_dashboard_state', None)
+    if state is not None:
+        apply_deltas(counter_deltas(state, None))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def reconcile_dashboard_counters_after_user_delete(sender, instance, **kwargs):
+    """SET_NULL on claimed/assigned tickets and cascaded events bypass the transitions"""
+    transaction.on_commit(reconcile)
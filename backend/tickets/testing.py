@@ -0,0 +1,162 @@
+"""
+Query-budget test harness for the API endpoints.
+
+Each app's ``tests.py`` lists its endpoints with the maximum number of SQL
+queries one request may run, and runs that list against two datasets seeded
+by tickets/seeding.py with a fixed random seed: a small one and one with ten
+times the tickets and four times the users. The budget is the same for both
+sizes, so an endpoint whose query count grows with the rows (a query per
+technician, per ticket, per event...) fails on the large dataset even when it
+fits on the small one.
+
+Requests go through the test client, middleware included, authenticated with
+``force_authenticate`` so the budgets do not include the token checks.
+"""
+
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User
+
+from .blob_store import create_attachment, store_uploaded_file
+from .dashboard_counters import reconcile
+from .models import (
+    Ticket, TicketAttachment, TicketClosureReport, TicketClosureReportAttachment, TicketEvent, TicketMessage,
+)
+from .seeding import seed
+
+# Fixed so every run tests the same dataset
+DATASET_SEED = 1
+DATASET_DAYS = 60
+# ``messages``: messages and events added to each fixture ticket, so that
+# per-ticket lists grow with the dataset too
+SMALL_DATASET = {'tickets': 40, 'employees': 6, 'technicians': 3, 'admins': 1, 'messages': 2}
+# More than the top 10 employees / technicians the reports break down
+LARGE_DATASET = {'tickets': 400, 'employees': 24, 'technicians': 12, 'admins': 3, 'messages': 20}
+
+SAMPLE_FILE = b'Query budget test attachment\n'
+
+
+class QueryBudgetTestCase(APITestCase):
+    """
+    Seeds ``dataset`` once per class and adds fixtures in a known state:
+    an unclaimed ticket, a ticket claimed by ``technician``, and a closed one
+    with a closure report and an attachment on each. Every fixture ticket has
+    ``dataset['messages']`` messages and events.
+    """
+
+    dataset = SMALL_DATASET
+
+    @classmethod
+    def setUpClass(cls):
+        # Stored files go to a throwaway MEDIA_ROOT, set up before setUpTestData.
+        cls._media_root = tempfile.mkdtemp(prefix='query-budget-')
+        # Login timestamps are written (and counted) by the request, not a background
+        # thread, and metric windows are not stored into a test database about to go away.
+        # Reads stay on 'default': a replica test mirror has its own connection, outside
+        # this class's transaction, so it neither sees the fixtures nor counts in budgets.
+        cls._media_override = override_settings(
+            MEDIA_ROOT=cls._media_root, AUTH_TIMESTAMP_FLUSH_INTERVAL=0, METRICS_PERSIST=False,
+            DATABASE_REPLICAS=[],
+        )
+        cls._media_override.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._media_override.disable()
+            shutil.rmtree(cls._media_root, ignore_errors=True)
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._media_override.disable()
+            shutil.rmtree(cls._media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            tickets=cls.dataset['tickets'],
+            employees=cls.dataset['employees'],
+            technicians=cls.dataset['technicians'],
+            admins=cls.dataset['admins'],
+            days=DATASET_DAYS,
+            seed=DATASET_SEED,
+        )
+        seeded = User.objects.filter(email__startswith='seed.').order_by('email')
+        cls.admin = seeded.filter(role='admin').first()
+        cls.technician = seeded.filter(role='technician').first()
+        cls.other_technician = seeded.filter(role='technician').last()
+        cls.employee = seeded.filter(role='employee').first()
+
+        cls.open_ticket = Ticket.objects.create(
+            subject='Imprimante hors ligne', type='Hardware', description='<p>Fixture</p>', requester=cls.employee,
+        )
+        cls.claimed_ticket = Ticket.objects.create(
+            subject='VPN indisponible', type='Network', description='<p>Fixture</p>', requester=cls.employee,
+            claimed_by=cls.technician, status='in_progress',
+        )
+        cls.closed_ticket = Ticket.objects.create(
+            subject='Licence expirée', type='Software', description='<p>Fixture</p>', requester=cls.employee,
+            claimed_by=cls.technician, status='closed', closed_at=timezone.now(),
+        )
+        cls.closure_report = TicketClosureReport.objects.create(
+            ticket=cls.closed_ticket, created_by=cls.technician, problem_type='software',
+            problem_subtype='Application métier', root_cause='Fixture', solution_applied='Fixture',
+        )
+        cls.attachment = create_attachment(
+            TicketAttachment, store_uploaded_file(cls.sample_file()),
+            ticket=cls.closed_ticket, uploaded_by=cls.employee, file_name='trace.txt', mime_type='text/plain',
+        )
+        cls.closure_report_attachment = create_attachment(
+            TicketClosureReportAttachment, store_uploaded_file(cls.sample_file()),
+            closure_report=cls.closure_report, uploaded_by=cls.technician,
+            file_name='intervention.txt', mime_type='text/plain',
+        )
+        for ticket in (cls.open_ticket, cls.claimed_ticket, cls.closed_ticket):
+            for index in range(cls.dataset['messages']):
+                sender = cls.employee if index % 2 else cls.technician
+                TicketMessage.objects.create(ticket=ticket, sender=sender, message_text=f'<p>Message {index}</p>')
+                TicketEvent.objects.create(
+                    ticket=ticket, actor=sender, event_type='message_sent', to_value=f'Message {index}',
+                )
+        # The fixtures bypass the lifecycle transitions: count them in the dashboards
+        reconcile()
+
+    @staticmethod
+    def sample_file(name='trace.txt'):
+        return SimpleUploadedFile(name, SAMPLE_FILE, content_type='text/plain')
+
+    def request(self, method, path, user=None, **kwargs):
+        """Send one request as ``user``; returns ``(response, captured queries)``"""
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, **kwargs)
+        self.client.force_authenticate(user=None)
+        return response, queries
+
+    def assertMaxQueries(self, budget, method, path, user=None, status=(200,), **kwargs):
+        """
+        Run the request and check both its status and that it ran at most
+        ``budget`` queries. Returns the response.
+        """
+        response, queries = self.request(method, path, user, **kwargs)
+        self.assertIn(
+            response.status_code, status,
+            f'{method.upper()} {path} returned {response.status_code}: {getattr(response, "data", "")}'
+        )
+        if len(queries) > budget:
+            listing = '\n'.join(f"{index}. {query['sql']}" for index, query in enumerate(queries, 1))
+            self.fail(
+                f"{method.upper()} {path} ran {len(queries)} queries, over its budget of {budget} "
+                f"({self.dataset['tickets']} seeded tickets):\n{listing}"
+            )
+        return response
@@ -0,0 +1,427 @@
+import asyncio
+import hashlib
+import os
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, channel_layers, get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from channels_redis.pubsub import RedisPubSubChannelLayer
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import user_cache
+from users.models import User
+from users.revocation import revocations
+
+from .consumers import CLOSE_FORBIDDEN, CLOSE_UNAUTHENTICATED
+from .dashboard_counters import reconcile
+from .middleware import JWTAuthMiddleware
+from .models import Ticket, TicketMessage, UploadSession
+from .query_health import HOT_ENDPOINTS
+from .redis_standin import start_in_thread
+from .routing import websocket_urlpatterns
+from .testing import LARGE_DATASET, SAMPLE_FILE, SMALL_DATASET, QueryBudgetTestCase
+from .write_behind import ChatMessageWriteBuffer
+
+
+class TicketEndpointQueryBudgets:
+    """Maximum queries per request for every URL of tickets/urls.py"""
+
+    def test_ticket_list(self):
+        for user, params, budget in (
+            (self.admin, {}, 7),
+            (self.technician, {}, 7),
+            (self.technician, {'filter': 'unassigned'}, 6),
+            (self.employee, {}, 7),
+        ):
+            with self.subTest(role=user.role, **params):
+                self.assertMaxQueries(budget, 'get', '/api/tickets/', user, data=params)
+
+    def test_ticket_create(self):
+        self.assertMaxQueries(12, 'post', '/api/tickets/', self.employee, status=(201,), data={
+            'subject': 'Écran noir', 'type': 'Hardware', 'description': '<p>Écran noir au démarrage</p>',
+        })
+
+    def test_ticket_detail(self):
+        for user in (self.admin, self.technician, self.employee):
+            with self.subTest(role=user.role):
+                self.assertMaxQueries(13, 'get', f'/api/tickets/{self.closed_ticket.id}/', user)
+
+    def test_ticket_update(self):
+        self.assertMaxQueries(22, 'patch', f'/api/tickets/{self.open_ticket.id}/', self.admin, data={
+            'description': '<p>Précisions</p>',
+        })
+
+    def test_ticket_attachments(self):
+        self.assertMaxQueries(2, 'get', f'/api/tickets/{self.closed_ticket.id}/attachments/', self.employee)
+        self.assertMaxQueries(
+            9, 'post', f'/api/tickets/{self.open_ticket.id}/attachments/', self.employee, status=(201,),
+            data={'file': self.sample_file()}, format='multipart',
+        )
+
+    def test_ticket_messages(self):
+        self.assertMaxQueries(2, 'get', f'/api/tickets/{self.closed_ticket.id}/messages/', self.employee)
+        self.assertMaxQueries(
+            1, 'post', f'/api/tickets/{self.claimed_ticket.id}/messages/', self.technician, status=(201,),
+            data={'message_text': '<p>Je passe dans la journée</p>'},
+        )
+
+    def test_accept_ticket(self):
+        self.assertMaxQueries(13, 'post', f'/api/tickets/{self.open_ticket.id}/accept/', self.technician)
+
+    def test_add_technician(self):
+        self.assertMaxQueries(
+            15, 'post', f'/api/tickets/{self.claimed_ticket.id}/add-technician/', self.admin,
+            data={'technician_id': str(self.other_technician.id)},
+        )
+
+    def test_close_ticket(self):
+        self.assertMaxQueries(12, 'post', f'/api/tickets/{self.claimed_ticket.id}/close/', self.technician)
+
+    def test_reopen_ticket(self):
+        self.assertMaxQueries(14, 'post', f'/api/tickets/{self.closed_ticket.id}/reopen/', self.technician)
+
+    def test_create_closure_report(self):
+        self.assertMaxQueries(
+            22, 'post', f'/api/tickets/{self.claimed_ticket.id}/closure-report/', self.technician, status=(201,),
+            data={
+                'problem_type': 'network',
+                'problem_subtype': 'VPN',
+                'root_cause': 'Certificat expiré',
+                'solution_applied': 'Certificat renouvelé',
+                'replaced_parts': [{'part_name': 'Carte réseau', 'serial_number': 'SN-1'}],
+            },
+        )
+
+    def test_get_closure_report(self):
+        self.assertMaxQueries(8, 'get', f'/api/tickets/{self.closed_ticket.id}/closure-report/view/', self.employee)
+
+    def test_upload_closure_report_attachment(self):
+        self.assertMaxQueries(
+            9, 'post', f'/api/tickets/{self.closed_ticket.id}/closure-report/attachments/', self.technician,
+            status=(201,), data={'file': self.sample_file('intervention.txt')}, format='multipart',
+        )
+
+    def _upload_session(self, received=False):
+        session = UploadSession.objects.create(
+            ticket=self.open_ticket, file_name='trace.txt', mime_type='text/plain', total_size=len(SAMPLE_FILE),
+            sha256=hashlib.sha256(SAMPLE_FILE).hexdigest(), created_by=self.employee,
+        )
+        if received:
+            os.makedirs(os.path.dirname(session.partial_path), exist_ok=True)
+            with open(session.partial_path, 'wb') as partial:
+                partial.write(SAMPLE_FILE)
+            UploadSession.objects.filter(id=session.id).update(received_bytes=len(SAMPLE_FILE))
+        return session
+
+    def test_create_upload_session(self):
+        self.assertMaxQueries(
+            2, 'post', f'/api/tickets/{self.open_ticket.id}/uploads/', self.employee, status=(201,), data={
+                'file_name': 'trace.txt', 'mime_type': 'text/plain', 'total_size': len(SAMPLE_FILE),
+                'sha256': hashlib.sha256(SAMPLE_FILE).hexdigest(),
+            },
+        )
+
+    def test_upload_session_detail(self):
+        session = self._upload_session()
+        path = f'/api/uploads/{session.id}/'
+        self.assertMaxQueries(1, 'get', path, self.employee)
+        self.assertMaxQueries(
+            2, 'put', path, self.employee, data=SAMPLE_FILE, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET='0',
+        )
+        self.assertMaxQueries(2, 'delete', path, self.employee, status=(204,))
+
+    def test_finalize_upload(self):
+        session = self._upload_session(received=True)
+        self.assertMaxQueries(10, 'post', f'/api/uploads/{session.id}/finalize/', self.employee, status=(201,))
+
+    def test_download_attachment(self):
+        self.assertMaxQueries(2, 'get', f'/api/attachments/{self.attachment.id}/download/', self.employee)
+
+    def test_download_closure_report_attachment(self):
+        self.assertMaxQueries(
+            2, 'get', f'/api/closure-report-attachments/{self.closure_report_attachment.id}/download/', self.employee,
+        )
+
+    def test_ticket_dashboard(self):
+        for user in (self.technician, self.employee):
+            with self.subTest(role=user.role):
+                self.assertMaxQueries(1, 'get', '/api/dashboard/', user)
+
+    def test_performance_stats(self):
+        # Served from the report stored by the periodic job
+        call_command('query_health', store=True, stdout=StringIO())
+        response = self.assertMaxQueries(0, 'get', '/api/performance-stats/', self.admin)
+        self.assertEqual(len(response.data['endpoints']), len(HOT_ENDPOINTS))
+        response = self.assertMaxQueries(0, 'get', '/api/performance-stats/', self.admin, data={'endpoint': 'dashboard'})
+        self.assertEqual([endpoint['endpoint'] for endpoint in response.data['endpoints']], ['dashboard'])
+
+    def test_top_technicians_stats(self):
+        # One technician: the technician, then the last 30 days grouped by day
+        for params, budget in (({'time_filter': 'month'}, 10), ({'technician_filter': str(self.technician.id)}, 2)):
+            with self.subTest(**params):
+                self.assertMaxQueries(budget, 'get', '/api/tickets/top-technicians-stats/', self.admin, data=params)
+
+
+class SmallDatasetTicketQueryTests(TicketEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = SMALL_DATASET
+
+
+class LargeDatasetTicketQueryTests(TicketEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = LARGE_DATASET
+
+
+class AttachmentAccessTests(QueryBudgetTestCase):
+    """
+    Attachments, their signed URLs and closure reports follow the ticket's
+    visibility; adding one takes the requester or a technician working on it
+    """
+
+    def outsiders(self):
+        other_employee = User.objects.filter(role='employee').exclude(pk=self.employee.pk).first()
+        return other_employee, self.other_technician
+
+    def test_attachment_list_is_empty_for_users_who_cannot_see_the_ticket(self):
+        path = f'/api/tickets/{self.closed_ticket.id}/attachments/'
+        for user in self.outsiders():
+            with self.subTest(role=user.role):
+                response, queries = self.request('get', path, user)
+                self.assertEqual(response.data['results'], [])
+        response, queries = self.request('get', path, self.technician)
+        attachments = response.data['results']
+        self.assertEqual([attachment['id'] for attachment in attachments], [str(self.attachment.id)])
+        # The signed URL alone is enough
+        self.client.logout()
+        self.assertEqual(self.client.get(attachments[0]['storage_url']).status_code, 200)
+
+    def test_unsigned_download_requires_seeing_the_ticket(self):
+        for path in (
+            f'/api/attachments/{self.attachment.id}/download/',
+            f'/api/closure-report-attachments/{self.closure_report_attachment.id}/download/',
+        ):
+            for user in self.outsiders():
+                with self.subTest(path=path, role=user.role):
+                    response, queries = self.request('get', path, user)
+                    self.assertEqual(response.status_code, 403)
+            response, queries = self.request('get', path, self.technician)
+            self.assertEqual(response.status_code, 200)
+
+    def test_closure_report_requires_seeing_the_ticket(self):
+        path = f'/api/tickets/{self.closed_ticket.id}/closure-report/view/'
+        for user in self.outsiders():
+            with self.subTest(role=user.role):
+                response, queries = self.request('get', path, user)
+                self.assertEqual(response.status_code, 403)
+        response, queries = self.request('get', path, self.technician)
+        self.assertEqual(response.status_code, 200)
+
+    def test_uploads_require_the_requester_or_a_working_technician(self):
+        session = {
+            'file_name': 'trace.txt', 'mime_type': 'text/plain', 'total_size': len(SAMPLE_FILE),
+            'sha256': hashlib.sha256(SAMPLE_FILE).hexdigest(),
+        }
+        for user in self.outsiders():
+            with self.subTest(role=user.role):
+                response, queries = self.request(
+                    'post', f'/api/tickets/{self.claimed_ticket.id}/attachments/', user,
+                    data={'file': self.sample_file()}, format='multipart',
+                )
+                self.assertEqual(response.status_code, 403)
+                response, queries = self.request('post', f'/api/tickets/{self.claimed_ticket.id}/uploads/', user, data=session)
+                self.assertEqual(response.status_code, 403)
+        self.assertFalse(UploadSession.objects.filter(ticket=self.claimed_ticket).exists())
+        for user in (self.employee, self.technician):
+            with self.subTest(role=user.role):
+                response, queries = self.request('post', f'/api/tickets/{self.claimed_ticket.id}/uploads/', user, data=session)
+                self.assertEqual(response.status_code, 201)
+
+
+class DashboardCounterTests(QueryBudgetTestCase):
+    """The counters every transition maintains (tickets/dashboard_counters.py) match a recount"""
+
+    def test_counters_match_a_recount_after_each_transition(self):
+        path = f'/api/tickets/{self.open_ticket.id}/'
+        closure_report = {
+            'problem_type': 'network', 'problem_subtype': 'VPN',
+            'root_cause': 'Certificat expiré', 'solution_applied': 'Certificat renouvelé',
+        }
+        for step, method, url, user, data in (
+            ('accept', 'post', f'{path}accept/', self.technician, None),
+            ('add technician', 'post', f'{path}add-technician/', self.admin, {'technician_id': str(self.other_technician.id)}),
+            ('close', 'post', f'{path}close/', self.other_technician, None),
+            ('reopen', 'post', f'{path}reopen/', self.technician, None),
+            ('closure report', 'post', f'{path}closure-report/', self.technician, closure_report),
+            ('update', 'patch', path, self.admin, {'status': 'in_progress'}),
+        ):
+            with self.subTest(step):
+                response, queries = self.request(method, url, user, data=data)
+                self.assertIn(response.status_code, (200, 201), getattr(response, 'data', ''))
+                self.assertEqual(reconcile(dry_run=True), {})
+
+    def test_admin_edits_move_the_counters_with_the_additional_technicians(self):
+        superuser = User.objects.create_superuser('counters.admin@example.com', password='motdepasse-solide-42')
+        self.client.force_login(superuser)
+        ticket = self.claimed_ticket
+        response = self.client.post(f'/admin/tickets/ticket/{ticket.id}/change/', {
+            'subject': ticket.subject, 'type': ticket.type, 'description': ticket.description, 'status': 'closed',
+            'requester': str(ticket.requester_id), 'claimed_by': str(ticket.claimed_by_id),
+            'additional_technicians': [str(self.other_technician.id)], '_save': 'Save',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(ticket.additional_technicians.filter(pk=self.other_technician.pk).exists())
+        self.assertEqual(reconcile(dry_run=True), {})
+
+
+@override_settings(CHAT_WRITE_BEHIND=False)
+class TicketChatConsumerTests(TransactionTestCase):
+    """tickets/consumers.py: who may open a ticket's chat socket, and who may post on it"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.requester = User.objects.create_user('chat.requester@example.com', password='motdepasse-solide-42')
+        self.other_employee = User.objects.create_user('chat.other@example.com', password='motdepasse-solide-42')
+        self.technician = User.objects.create_user(
+            'chat.technician@example.com', password='motdepasse-solide-42', role='technician',
+        )
+        self.admin = User.objects.create_user('chat.admin@example.com', password='motdepasse-solide-42', role='admin')
+        self.ticket = Ticket.objects.create(
+            subject='Chat', type='Other', description='<p>Chat</p>', requester=self.requester,
+        )
+
+    @async_to_sync
+    async def chat(self, token=None, message=None):
+        """
+        Open the ticket's socket with ``token`` and optionally post ``message``.
+        Returns ``(connected, close code or the reply to the message)``.
+        """
+        query = f'?token={token}' if token else ''
+        communicator = WebsocketCommunicator(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns)), f'/ws/tickets/{self.ticket.id}/{query}',
+        )
+        connected, code = await communicator.connect()
+        if not connected or message is None:
+            await communicator.disconnect()
+            return connected, code
+        await communicator.send_json_to({'type': 'message', 'message': message})
+        reply = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+        return connected, reply
+
+    def test_anonymous_and_invalid_tokens_are_rejected(self):
+        for token in (None, 'not-a-jwt'):
+            with self.subTest(token=token):
+                self.assertEqual(self.chat(token), (False, CLOSE_UNAUTHENTICATED))
+
+    def test_revoked_token_is_rejected(self):
+        token = AccessToken.for_user(self.requester)
+        revocations.revoke_token(token)
+        self.assertEqual(self.chat(str(token)), (False, CLOSE_UNAUTHENTICATED))
+
+    def test_users_outside_the_ticket_are_rejected(self):
+        self.assertEqual(self.chat(str(AccessToken.for_user(self.other_employee))), (False, CLOSE_FORBIDDEN))
+
+    def test_requester_and_technicians_can_post(self):
+        for user in (self.requester, self.technician):
+            with self.subTest(role=user.role):
+                connected, reply = self.chat(str(AccessToken.for_user(user)), f'<p>{user.role}</p>')
+                self.assertTrue(connected)
+                self.assertEqual((reply['type'], reply['user_id']), ('chat_message', str(user.id)))
+        self.assertEqual(TicketMessage.objects.filter(ticket=self.ticket).count(), 2)
+
+    def test_admins_can_read_but_not_post(self):
+        connected, reply = self.chat(str(AccessToken.for_user(self.admin)), '<p>admin</p>')
+        self.assertTrue(connected)
+        self.assertEqual(reply['type'], 'error')
+        self.assertFalse(TicketMessage.objects.filter(ticket=self.ticket).exists())
+
+
+class ChannelLayerTests(SimpleTestCase):
+    """
+    settings.CHANNEL_LAYERS: pub/sub fan-out between workers through
+    tickets/redis_standin.py, and the in-process layer used without REDIS_URL
+    """
+
+    def setUp(self):
+        self.server, stop = start_in_thread()
+        self.addCleanup(stop)
+
+    @async_to_sync
+    async def fan_out(self, receiving, sending):
+        """Send one group message from ``sending``; returns what two channels of ``receiving`` got"""
+        channels = [await receiving.new_channel() for _ in range(2)]
+        for channel in channels:
+            await receiving.group_add('ticket_updates', channel)
+        await sending.group_send('ticket_updates', {'type': 'ticket_update', 'event': 'closed'})
+        try:
+            return [await asyncio.wait_for(receiving.receive(channel), timeout=5) for channel in channels]
+        finally:
+            for channel in channels:
+                await receiving.group_discard('ticket_updates', channel)
+            for layer in {receiving, sending}:
+                if hasattr(layer, 'flush'):
+                    await layer.flush()
+
+    def test_pubsub_layer_fans_out_between_workers(self):
+        pubsub = {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {'hosts': [self.server.url], 'prefix': 'tests'},
+        }
+        with override_settings(CHANNEL_LAYERS={'default': pubsub, 'other_worker': pubsub}):
+            receiving, sending = channel_layers['default'], channel_layers['other_worker']
+            self.assertIsInstance(receiving, RedisPubSubChannelLayer)
+            self.assertIsNot(receiving, sending)
+            messages = self.fan_out(receiving, sending)
+        self.assertEqual(messages, [{'type': 'ticket_update', 'event': 'closed'}] * 2)
+        self.assertEqual(self.server.published, 1)
+
+    def test_in_process_fallback(self):
+        with override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}):
+            layer = get_channel_layer()
+            self.assertIsInstance(layer, InMemoryChannelLayer)
+            messages = self.fan_out(layer, layer)
+        self.assertEqual(messages, [{'type': 'ticket_update', 'event': 'closed'}] * 2)
+        self.assertEqual(self.server.published, 0)
+
+
+class ChatWriteBehindTests(TransactionTestCase):
+    """tickets/write_behind.py; transactional, the writer inserts from another thread"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('chat@example.com', password='motdepasse-solide-42')
+        self.ticket = Ticket.objects.create(subject='Chat', type='Other', description='<p>Chat</p>', requester=self.user)
+
+    def message(self, text, **fields):
+        return TicketMessage(ticket=self.ticket, sender=self.user, message_text=text, **fields)
+
+    @async_to_sync
+    async def write(self, messages):
+        """Enqueue ``messages`` and flush; returns (failed, buffer)"""
+        buffer = ChatMessageWriteBuffer(max_batch_size=10, flush_interval=0.01)
+        for message in messages:
+            await buffer.enqueue(message)
+        return await buffer.flush(), buffer
+
+    def test_flush_waits_for_the_writes_and_keeps_the_broadcast_timestamp(self):
+        broadcast_at = timezone.now() - timedelta(seconds=5)
+        messages = [self.message(f'<p>{index}</p>', created_at=broadcast_at) for index in range(25)]
+        failed, buffer = self.write(messages)
+        self.assertEqual((failed, buffer.written, buffer.failed), (0, 25, 0))
+        self.assertEqual(TicketMessage.objects.filter(ticket=self.ticket).count(), 25)
+        self.assertEqual(TicketMessage.objects.get(id=messages[0].id).created_at, broadcast_at)
+
+    def test_failed_batch_is_retried_per_row_and_only_stored_rows_count(self):
+        stored = self.message('<p>Déjà enregistré</p>')
+        stored.save()
+        # Same primary key as a stored message: fails the batch insert
+        duplicate = self.message('<p>Doublon</p>', id=stored.id)
+        with self.assertLogs('tickets.write_behind', 'WARNING') as logs:
+            failed, buffer = self.write([self.message('<p>Avant</p>'), duplicate, self.message('<p>Après</p>')])
+        self.assertIn(str(duplicate.id), logs.output[-1])
+        self.assertEqual((failed, buffer.written, buffer.failed), (1, 2, 1))
+        self.assertEqual(TicketMessage.objects.filter(ticket=self.ticket).count(), 3)
@@ -0,0 +1,128 @@
+"""
+Storage tiering for attachment blobs.
+
+- Compression: text attachments (ATTACHMENT_COMPRESSIBLE_TYPES) are rewritten
+  with zstd, or gzip when the optional ``zstandard`` package is missing. The
+  compressed copy is kept only if it saves at least 10%; otherwise the blob
+  is marked ``compression_skipped`` and not tried again.
+- Archival: blobs whose every referencing ticket has been closed for
+  ATTACHMENT_ARCHIVE_AFTER_DAYS move to the ``attachment_archive`` storage
+  (a separate directory by default, or any Django storage backend).
+
+Attachments keep their ``storage_url`` and the download view reads through
+``open_blob()``, decompressing on the fly, so nothing visible changes.
+"""
+
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage, storages
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .blob_store import blob_storage, open_blob, zstandard
+from .models import AttachmentBlob, Ticket, TicketAttachment, TicketClosureReportAttachment, attachment_blob_path
+from .uploads import STREAM_BLOCK_SIZE
+
+SUFFIXES = {'': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Keep the compressed copy only when it is at most this fraction of the original
+MIN_COMPRESSION_RATIO = 0.9
+
+
+def default_algorithm():
+    if settings.ATTACHMENT_COMPRESSION == 'zstd' and zstandard is not None:
+        return 'zstd'
+    return 'gzip'
+
+
+def _write_encoded(source, destination, encoding):
+    if encoding == 'gzip':
+        with gzip.GzipFile(fileobj=destination, mode='wb', compresslevel=6, mtime=0) as writer:
+            shutil.copyfileobj(source, writer, STREAM_BLOCK_SIZE)
+    elif encoding == 'zstd':
+        with zstandard.ZstdCompressor(level=10).stream_writer(destination, closefd=False) as writer:
+            shutil.copyfileobj(source, writer, STREAM_BLOCK_SIZE)
+    else:
+        shutil.copyfileobj(source, destination, STREAM_BLOCK_SIZE)
+
+
+def rewrite_blob(blob, tier=None, encoding=None):
+    """
+    Store ``blob`` again in ``tier`` with ``encoding`` and drop the old copy.
+    Returns ``(old_stored_size, new_stored_size)``, or None if nothing changed.
+    """
+    tier = blob.tier if tier is None else tier
+    encoding = blob.encoding if encoding is None else encoding
+    if (tier, encoding) == (blob.tier, blob.encoding):
+        return None
+
+    old_storage, old_name = blob_storage(blob), blob.file.name
+    old_size = blob.stored_size if blob.stored_size is not None else blob.size_bytes
+    target_storage = storages['attachment_archive'] if tier == 'archive' else default_storage
+
+    # Moving without changing the encoding copies the stored bytes as they are
+    recode = encoding != blob.encoding
+    with tempfile.TemporaryFile() as temp:
+        with open_blob(blob, decompress=recode) as source:
+            _write_encoded(source, temp, encoding if recode else '')
+        stored_size = temp.tell()
+        if recode and encoding and stored_size > blob.size_bytes * MIN_COMPRESSION_RATIO:
+            # The content never changes (same SHA-256): no point in trying again
+            AttachmentBlob.objects.filter(pk=blob.sha256).update(compression_skipped=True)
+            blob.compression_skipped = True
+            if tier == blob.tier:
+                return None
+            # Not worth compressing, but still move it
+            return rewrite_blob(blob, tier=tier, encoding='')
+        temp.seek(0)
+        new_name = target_storage.save(attachment_blob_path(blob.sha256) + SUFFIXES[encoding], File(temp))
+
+    with transaction.atomic():
+        current = AttachmentBlob.objects.select_for_update().filter(pk=blob.sha256).first()
+        if current is None or current.file.name != old_name or current.tier != blob.tier:
+            # Released or rewritten concurrently: keep whatever the row points at
+            target_storage.delete(new_name)
+            return None
+        AttachmentBlob.objects.filter(pk=blob.sha256).update(
+            file=new_name, tier=tier, encoding=encoding, stored_size=stored_size
+        )
+
+    old_storage.delete(old_name)
+    blob.file.name, blob.tier, blob.encoding, blob.stored_size = new_name, tier, encoding, stored_size
+    return old_size, stored_size
+
+
+def compressible_blobs():
+    extensions = Q()
+    for file_ext in settings.ATTACHMENT_COMPRESSIBLE_TYPES:
+        extensions |= Q(file_name__iendswith=f'.{file_ext}')
+    return AttachmentBlob.objects.filter(
+        encoding='',
+        compression_skipped=False,
+        size_bytes__gte=settings.ATTACHMENT_COMPRESS_MIN_SIZE,
+    ).filter(
+        Exists(TicketAttachment.objects.filter(extensions, blob=OuterRef('pk')))
+        | Exists(TicketClosureReportAttachment.objects.filter(extensions, blob=OuterRef('pk')))
+    )
+
+
+def cold_blobs(days=None):
+    """Hot blobs referenced only by tickets closed for more than ``days``"""
+    days = settings.ATTACHMENT_ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    warm_tickets = Ticket.objects.filter(
+        ~Q(status='closed') | Q(closed_at__isnull=True) | Q(closed_at__gte=cutoff)
+    ).values('id')
+    warm_ticket_attachments = TicketAttachment.objects.filter(blob=OuterRef('pk'), ticket__in=warm_tickets)
+    warm_report_attachments = TicketClosureReportAttachment.objects.filter(
+        blob=OuterRef('pk'), closure_report__ticket__in=warm_tickets
+    )
+    return AttachmentBlob.objects.filter(tier='hot', ref_count__gt=0).exclude(
+        Exists(warm_ticket_attachments) | Exists(warm_report_attachments)
+    )
@@ -0,0 +1,116 @@
+"""
+File helpers for resumable chunked uploads.
+
+Chunks are streamed from the request body straight into a partial file with a
+fixed-size buffer, so memory use does not depend on the file or chunk size.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+# Read/write buffer used when streaming request bodies and hashing files
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Bytes needed from the start of a file to recognise its type
+SNIFF_BYTES = 64
+
+# Magic numbers by extension: any one (offset, bytes) pair must match.
+# Extensions missing here are only checked against ALLOWED_FILE_TYPES.
+FILE_SIGNATURES = {
+    'jpg': [(0, b'\xff\xd8\xff')],
+    'jpeg': [(0, b'\xff\xd8\xff')],
+    'png': [(0, b'\x89PNG\r\n\x1a\n')],
+    'pdf': [(0, b'%PDF-')],
+    'docx': [(0, b'PK\x03\x04')],
+    'xlsx': [(0, b'PK\x03\x04')],
+    'mp4': [(4, b'ftyp')],
+    'mov': [(4, b'ftyp'), (4, b'moov'), (4, b'mdat'), (4, b'wide'), (4, b'free'), (4, b'skip')],
+    'avi': [(8, b'AVI ')],
+    'wmv': [(0, b'\x30\x26\xb2\x75\x8e\x66\xcf\x11')],
+    'flv': [(0, b'FLV')],
+    'webm': [(0, b'\x1a\x45\xdf\xa3')],
+    'mkv': [(0, b'\x1a\x45\xdf\xa3')],
+}
+TEXT_FILE_TYPES = ('txt', 'log')
+
+
+def sniff_matches(file_ext, head):
+    """True if the first bytes of a file are consistent with its extension"""
+    if file_ext in TEXT_FILE_TYPES:
+        # Plain text never contains NUL bytes; executables and archives do
+        return b'\x00' not in head
+    signatures = FILE_SIGNATURES.get(file_ext)
+    if signatures is None:
+        return True
+    return any(head[offset:offset + len(magic)] == magic for offset, magic in signatures)
+
+
+def read_head(uploaded_file):
+    """First SNIFF_BYTES of a Django UploadedFile, leaving it rewound"""
+    uploaded_file.seek(0)
+    head = uploaded_file.read(SNIFF_BYTES)
+    uploaded_file.seek(0)
+    return head
+
+
+def validate_upload(file_name, size, head=None):
+    """
+    Same rules as TicketAttachment.clean(), applied before any byte is stored.
+    When ``head`` (the first bytes of the file) is given, the content must
+    also match the extension.
+    """
+    if size <= 0:
+        raise ValidationError('File is empty')
+    if size > settings.MAX_UPLOAD_SIZE:
+        raise ValidationError(f'File size must be under {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB')
+    file_ext = os.path.splitext(file_name)[1][1:].lower()
+    if file_ext not in settings.ALLOWED_FILE_TYPES:
+        raise ValidationError(f'File type {file_ext} is not allowed')
+    if head is not None and not sniff_matches(file_ext, head):
+        raise ValidationError(f'File content does not match the .{file_ext} extension')
+
+
+def write_chunk(path, offset, stream, length, prefix=b''):
+    """
+    Stream ``length`` bytes from ``stream`` into ``path`` at ``offset``.
+    ``prefix`` holds bytes of the chunk already read from ``stream`` (e.g. to
+    sniff the file type). Returns ``(bytes_written, sha256_hexdigest)`` of the chunk.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    digest = hashlib.sha256()
+    written = 0
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+    with open(path, mode) as destination:
+        destination.seek(offset)
+        if prefix:
+            destination.write(prefix)
+            digest.update(prefix)
+            written = len(prefix)
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            destination.write(block)
+            digest.update(block)
+            written += len(block)
+        # Drop anything left over from an earlier, abandoned attempt at this offset
+        destination.truncate()
+    return written, digest.hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(STREAM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discard_partial(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -13,6 +13,11 @@ urlpatterns = [
     path('tickets/<uuid:ticket_id>/closure-report/', views.create_closure_report, name='create_closure_report'),
     path('tickets/<uuid:ticket_id>/closure-report/view/', views.get_closure_report, name='get_closure_report'),
     path('tickets/<uuid:ticket_id>/closure-report/attachments/', views.upload_closure_report_attachment, name='upload_closure_report_attachment'),
+    path('tickets/<uuid:ticket_id>/uploads/', views.create_upload_session, name='create_upload_session'),
+    path('uploads/<uuid:upload_id>/', views.upload_session_detail, name='upload_session_detail'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finalize_upload, name='finalize_upload'),
+    path('attachments/<uuid:attachment_id>/download/', views.download_attachment, name='download_attachment'),
+    path('closure-report-attachments/<uuid:attachment_id>/download/', views.download_closure_report_attachment, name='download_closure_report_attachment'),
     path('dashboard/', views.TicketDashboardView.as_view(), name='ticket_dashboard'),
     path('performance-stats/', views.performance_stats, name='performance_stats'),
     path('tickets/top-technicians-stats/', views.top_technicians_stats, name='top_technicians_stats'),
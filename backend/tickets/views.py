@@ -1,18 +1,27 @@
 from rest_framework import generics, status, serializers
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Q, Count
 from django.utils import timezone
-from .models import Ticket, TicketAttachment, TicketEvent, TicketMessage, TicketClosureReport, TicketClosureReportAttachment, ReplacedPart
+from .models import Ticket, TicketAttachment, TicketEvent, TicketMessage, TicketClosureReport, TicketClosureReportAttachment, ReplacedPart, UploadSession
 from .serializers import (
     TicketSerializer, TicketListSerializer, TicketCreateSerializer, TicketAttachmentSerializer,
     TicketEventSerializer, TicketMessageSerializer, TicketClosureReportSerializer,
-    TicketClosureReportAttachmentSerializer, ReplacedPartSerializer
+    TicketClosureReportAttachmentSerializer, ReplacedPartSerializer, UploadSessionSerializer
 )
+from .uploads import validate_upload, read_head, write_chunk, file_sha256, discard_partial, SNIFF_BYTES
+from .quotas import check_attachment_quota
+from .blob_store import store_uploaded_file, store_file_path, create_attachment
+from .downloads import serve_attachment, has_valid_signature
 from .email_service import email_service
+from .live_updates import live_updates
+from .dashboard_counters import TECHNICIANS, read_counters, requester_scope, technician_scope
 from users.models import User
 
 class TicketListView(generics.ListCreateAPIView):
@@ -32,7 +41,7 @@ class TicketListView(generics.ListCreateAPIView):
             queryset = Ticket.objects.select_related(
                 'requester', 'assigned_to', 'claimed_by'
             ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
+                'additional_technicians', 'attachments__blob', 'messages', 'events'
             )
             
             status_filter = self.request.query_params.get('status', None)
@@ -92,14 +101,10 @@ class TicketListView(generics.ListCreateAPIView):
             base_queryset = Ticket.objects.select_related(
                 'requester', 'assigned_to', 'claimed_by'
             ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
+                'additional_technicians', 'attachments__blob', 'messages', 'events'
             )
             
-            queryset = base_queryset.filter(
-                Q(claimed_by__isnull=True) | 
-                Q(claimed_by=user) | 
-                Q(additional_technicians=user)
-            ).distinct()
+            queryset = base_queryset.visible_to(user)
             
             # Apply same filters as admin
             status_filter = self.request.query_params.get('status', None)
@@ -128,8 +133,8 @@ class TicketListView(generics.ListCreateAPIView):
             if filter_type == 'unassigned':
                 queryset = queryset.filter(claimed_by__isnull=True)
             elif filter_type == 'my-open':
-                # Show all open tickets in the system, not just technician's tickets
-                queryset = base_queryset.filter(status='open')
+                # Every open ticket the technician can see (their attachments come with signed URLs)
+                queryset = base_queryset.visible_to(user).filter(status='open')
             elif filter_type == 'closed':
                 assigned_to = self.request.query_params.get('assigned', None)
                 if assigned_to == 'me':
@@ -175,7 +180,7 @@ class TicketListView(generics.ListCreateAPIView):
             queryset = Ticket.objects.select_related(
                 'requester', 'assigned_to', 'claimed_by'
             ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
+                'additional_technicians', 'attachments__blob', 'messages', 'events'
             ).filter(requester=user)
             
             # Apply same filters as admin and technician
@@ -260,30 +265,27 @@ class TicketDetailView(generics.RetrieveUpdateAPIView):
     lookup_field = 'pk'
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.role == 'admin':
-            return Ticket.objects.select_related(
-                'requester', 'assigned_to', 'claimed_by'
-            ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
-            )
-        elif user.role == 'technician':
-            return Ticket.objects.select_related(
-                'requester', 'assigned_to', 'claimed_by'
-            ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
-            ).filter(
-                Q(claimed_by__isnull=True) | 
-                Q(claimed_by=user) | 
-                Q(additional_technicians=user)
-            ).distinct()
-        else:
-            return Ticket.objects.select_related(
-                'requester', 'assigned_to', 'claimed_by'
-            ).prefetch_related(
-                'additional_technicians', 'attachments', 'messages', 'events'
-            ).filter(requester=user)
+        return Ticket.objects.select_related(
+            'requester', 'assigned_to', 'claimed_by'
+        ).prefetch_related(
+            'additional_technicians', 'attachments__blob', 'messages__sender', 'events__actor'
+        ).visible_to(self.request.user)
+    
+    def perform_update(self, serializer):
+        # Status/type edits outside the lifecycle endpoints still move the dashboard counters
+        with transaction.atomic():
+            before = live_updates.snapshot(serializer.instance)
+            ticket = serializer.save()
+            live_updates.ticket_changed(ticket, 'updated', self.request.user, before)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # The saved instance's prefetched relations are stale: reload the ticket with
+        # them rather than fetching every message and event sender one query at a time
+        return Response(self.get_serializer(self.get_object()).data)
 
 class TicketDashboardView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
@@ -292,29 +294,24 @@ class TicketDashboardView(generics.GenericAPIView):
         user = request.user
         
         if user.role == 'technician':
-            # Single optimized query for technician dashboard
-            ticket_stats = Ticket.objects.filter(
-                Q(claimed_by__isnull=True) | Q(claimed_by=user) | Q(additional_technicians=user)
-            ).aggregate(
-                unassigned_tickets=Count('id', filter=Q(claimed_by__isnull=True, status='open')),
-                my_open_tickets=Count('id', filter=Q(
-                    (Q(claimed_by=user) | Q(additional_technicians=user)) & Q(status='open')
-                )),
-                closed_tickets=Count('id', filter=Q(
-                    (Q(claimed_by=user) | Q(additional_technicians=user)) & Q(status='closed')
-                ))
-            )
+            # Maintained counters (tickets/dashboard_counters.py): one indexed read
+            counters = read_counters(TECHNICIANS, technician_scope(user.id))
+            ticket_stats = {
+                'unassigned_tickets': counters.get('unassigned_tickets', 0),
+                'my_open_tickets': counters.get('my_open_tickets', 0),
+                'closed_tickets': counters.get('closed_tickets', 0),
+            }
             
             return Response(ticket_stats)
         
         elif user.role == 'employee':
-            # Single optimized query for employee dashboard
-            ticket_stats = Ticket.objects.filter(requester=user).aggregate(
-                opened_tickets=Count('id', filter=Q(status='open')),
-                unassigned_tickets=Count('id', filter=Q(status='open', claimed_by__isnull=True)),
-                closed_tickets=Count('id', filter=Q(status='closed')),
-                total_tickets=Count('id')
-            )
+            counters = read_counters(requester_scope(user.id))
+            ticket_stats = {
+                'opened_tickets': counters.get('opened_tickets', 0),
+                'unassigned_tickets': counters.get('my_unassigned_tickets', 0),
+                'closed_tickets': counters.get('closed_tickets', 0),
+                'total_tickets': counters.get('total_tickets', 0),
+            }
             
             return Response(ticket_stats)
         
@@ -326,8 +323,11 @@ class TicketAttachmentView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
+        # Listed with signed URLs: only for a ticket the user can see
         ticket_id = self.kwargs['ticket_id']
-        return TicketAttachment.objects.filter(ticket_id=ticket_id)
+        return TicketAttachment.objects.filter(
+            ticket_id=ticket_id, ticket__in=Ticket.objects.visible_to(self.request.user).values('pk')
+        ).select_related('blob')
     
     def create(self, request, *args, **kwargs):
         """Handle file upload for ticket attachments"""
@@ -341,14 +341,32 @@ class TicketAttachmentView(generics.ListCreateAPIView):
         print(f"Uploading file: {file.name}, size: {file.size}, type: {file.content_type}")
         
         try:
-            # Create the attachment directly
-            attachment = TicketAttachment.objects.create(
+            ticket = Ticket.objects.only(
+                'id', 'requester_id', 'claimed_by_id', 'attachment_count', 'attachment_bytes'
+            ).get(id=ticket_id)
+        except Ticket.DoesNotExist:
+            return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if not ticket.writable_by(request.user):
+            return Response({'error': 'You can only add attachments to tickets you requested or are working on'}, status=status.HTTP_403_FORBIDDEN)
+        
+        # Type, size, magic bytes and ticket quota are all checked before the file is stored
+        try:
+            validate_upload(file.name, file.size, read_head(file))
+            check_attachment_quota(ticket, file.size)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Store the content once (deduplicated by SHA-256) and reference it
+            blob = store_uploaded_file(file)
+            attachment = create_attachment(
+                TicketAttachment,
+                blob,
                 ticket_id=ticket_id,
                 uploaded_by=request.user,
                 file_name=file.name,
-                mime_type=file.content_type,
-                size_bytes=file.size,
-                storage_url=file
+                mime_type=file.content_type
             )
             
             # Serialize the response
@@ -365,7 +383,7 @@ class TicketMessageView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         ticket_id = self.kwargs['ticket_id']
-        return TicketMessage.objects.filter(ticket_id=ticket_id)
+        return TicketMessage.objects.filter(ticket_id=ticket_id).select_related('sender')
     
     def perform_create(self, serializer):
         """Set the sender and ticket when creating a message"""
@@ -380,22 +398,27 @@ def accept_ticket(request, ticket_id):
         return Response({'error': 'Only technicians can accept tickets'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
-        if ticket.claimed_by:
-            return Response({'error': 'Ticket already claimed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        ticket.claimed_by = request.user
-        ticket.status = 'in_progress'
-        ticket.save()
-        
-        # Create event log
-        event = TicketEvent.objects.create(
-            ticket=ticket,
-            actor=request.user,
-            event_type='claimed',
-            from_value='open',
-            to_value='in_progress'
-        )
+        # The claim, its event and the dashboard counters are committed together
+        with transaction.atomic():
+            # Lock the row so two technicians cannot both claim it
+            ticket = Ticket.objects.select_for_update().get(id=ticket_id)
+            if ticket.claimed_by:
+                return Response({'error': 'Ticket already claimed'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            before = live_updates.snapshot(ticket)
+            ticket.claimed_by = request.user
+            ticket.status = 'in_progress'
+            ticket.save()
+            
+            # Create event log
+            event = TicketEvent.objects.create(
+                ticket=ticket,
+                actor=request.user,
+                event_type='claimed',
+                from_value='open',
+                to_value='in_progress'
+            )
+            live_updates.ticket_claimed(ticket, request.user, before)
         
         # Send email notification to the employee who created the ticket
         email_service.notify_ticket_claimed(ticket, event)
@@ -412,7 +435,6 @@ def add_technician(request, ticket_id):
         return Response({'error': 'Only admins can add technicians'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
         technician_id = request.data.get('technician_id')
         
         if not technician_id:
@@ -420,16 +442,21 @@ def add_technician(request, ticket_id):
         
         try:
             technician = User.objects.get(id=technician_id, role='technician')
-            ticket.additional_technicians.add(technician)
-            
-            # Create event log
-            event = TicketEvent.objects.create(
-                ticket=ticket,
-                actor=request.user,
-                event_type='technician_added',
-                from_value='',
-                to_value=technician.get_full_name()
-            )
+            with transaction.atomic():
+                # Lock the row: the snapshot must be the state this change is applied to
+                ticket = Ticket.objects.select_for_update().get(id=ticket_id)
+                before = live_updates.snapshot(ticket)
+                ticket.additional_technicians.add(technician)
+                
+                # Create event log
+                event = TicketEvent.objects.create(
+                    ticket=ticket,
+                    actor=request.user,
+                    event_type='technician_added',
+                    from_value='',
+                    to_value=technician.get_full_name()
+                )
+                live_updates.technician_added(ticket, request.user, before)
             
             # Send email notification to the added technician
             email_service.notify_technician_added(ticket, event, technician)
@@ -449,11 +476,15 @@ def close_ticket(request, ticket_id):
         return Response({'error': 'Only technicians can close tickets'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
-        if ticket.claimed_by != request.user and request.user not in ticket.additional_technicians.all():
-            return Response({'error': 'You can only close tickets you are working on'}, status=status.HTTP_403_FORBIDDEN)
-        
-        ticket.close()
+        with transaction.atomic():
+            # Lock the row: the snapshot must be the state this change is applied to
+            ticket = Ticket.objects.select_for_update().get(id=ticket_id)
+            if ticket.claimed_by != request.user and request.user not in ticket.additional_technicians.all():
+                return Response({'error': 'You can only close tickets you are working on'}, status=status.HTTP_403_FORBIDDEN)
+            
+            before = live_updates.snapshot(ticket)
+            ticket.close()
+            live_updates.ticket_closed(ticket, request.user, before)
         
         return Response({'message': 'Ticket closed successfully'})
     except Ticket.DoesNotExist:
@@ -467,29 +498,33 @@ def reopen_ticket(request, ticket_id):
         return Response({'error': 'Only technicians can reopen tickets'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
-        
-        # Check if ticket is closed
-        if ticket.status != 'closed':
-            return Response({'error': 'Only closed tickets can be reopened'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if technician has permission (owner or assigned technician)
-        if ticket.claimed_by != request.user and request.user not in ticket.additional_technicians.all():
-            return Response({'error': 'You can only reopen tickets you are working on'}, status=status.HTTP_403_FORBIDDEN)
-        
-        # Reopen the ticket
-        ticket.status = 'reopened'
-        ticket.closed_at = None  # Reset closed timestamp
-        ticket.save()
-        
-        # Create event log
-        event = TicketEvent.objects.create(
-            ticket=ticket,
-            actor=request.user,
-            event_type='reopened',
-            from_value='closed',
-            to_value='open'
-        )
+        with transaction.atomic():
+            # Lock the row so the ticket is reopened once, from the state snapshotted here
+            ticket = Ticket.objects.select_for_update().get(id=ticket_id)
+            
+            # Check if ticket is closed
+            if ticket.status != 'closed':
+                return Response({'error': 'Only closed tickets can be reopened'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Check if technician has permission (owner or assigned technician)
+            if ticket.claimed_by != request.user and request.user not in ticket.additional_technicians.all():
+                return Response({'error': 'You can only reopen tickets you are working on'}, status=status.HTTP_403_FORBIDDEN)
+            
+            # Reopen the ticket
+            before = live_updates.snapshot(ticket)
+            ticket.status = 'reopened'
+            ticket.closed_at = None  # Reset closed timestamp
+            ticket.save()
+            
+            # Create event log
+            event = TicketEvent.objects.create(
+                ticket=ticket,
+                actor=request.user,
+                event_type='reopened',
+                from_value='closed',
+                to_value='open'
+            )
+            live_updates.ticket_reopened(ticket, request.user, before)
         
         # Send email notification to the employee who created the ticket
         email_service.notify_ticket_reopened(ticket, event)
@@ -502,29 +537,21 @@ def reopen_ticket(request, ticket_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def performance_stats(request):
-    """Simple performance monitoring endpoint"""
-    from django.db import connection
-    from django.utils import timezone
+    """
+    Query health report: EXPLAIN plans of the queries run by the hottest endpoints,
+    flagged full scans / temporary B-trees, table and index sizes (tickets/query_health.py).
+    ``?analyze=1`` uses EXPLAIN ANALYZE on PostgreSQL; ``?endpoint=`` restricts the endpoints.
+    The report is served from the cache (see ``generated_at``); ``?refresh=1`` rebuilds it.
+    """
+    if request.user.role != 'admin':
+        return Response({'error': 'Only admins can access query diagnostics'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Get basic database stats
-    with connection.cursor() as cursor:
-        cursor.execute("SELECT COUNT(*) FROM tickets_ticket")
-        total_tickets = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM tickets_ticket WHERE status = 'Open'")
-        open_tickets = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM tickets_ticket WHERE created_at >= %s", 
-                     [timezone.now() - timezone.timedelta(hours=24)])
-        tickets_last_24h = cursor.fetchone()[0]
+    from .query_health import stored_report
     
-    return Response({
-        'total_tickets': total_tickets,
-        'open_tickets': open_tickets,
-        'tickets_last_24h': tickets_last_24h,
-        'timestamp': timezone.now().isoformat(),
-        'database': connection.settings_dict['ENGINE'].split('.')[-1]
-    })
+    analyze = request.GET.get('analyze') in ('1', 'true')
+    refresh = request.GET.get('refresh') in ('1', 'true')
+    only = request.GET.getlist('endpoint') or None
+    return Response(stored_report(analyze=analyze, only=only, refresh=refresh))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -534,7 +561,8 @@ def top_technicians_stats(request):
         return Response({'error': 'Only admins and technicians can access technician stats'}, status=status.HTTP_403_FORBIDDEN)
     
     from django.contrib.auth import get_user_model
-    from django.db.models import Count, Q
+    from django.db.models import Count, Exists, OuterRef, Q
+    from django.db.models.functions import TruncDate
     from django.utils import timezone
     from datetime import timedelta
     
@@ -568,34 +596,32 @@ def top_technicians_stats(request):
         try:
             technician = User.objects.get(id=technician_filter, role='technician')
             
-            # Get time series data for the last 30 days
+            # Get time series data for the last 30 days, counted per day in one grouped query
+            first_day = (now - timedelta(days=29)).replace(hour=0, minute=0, second=0, microsecond=0)
+            reopened = Exists(TicketEvent.objects.filter(ticket=OuterRef('pk'), event_type='reopened'))
+            per_day = {
+                row['day']: row
+                for row in tickets_qs.filter(
+                    Q(claimed_by=technician) | Q(additional_technicians=technician),
+                    created_at__gte=first_day
+                ).order_by().values(day=TruncDate('created_at', tzinfo=now.tzinfo)).annotate(
+                    claimed=Count('pk', distinct=True),
+                    closed=Count('pk', distinct=True, filter=Q(status='closed')),
+                    reopened=Count('pk', distinct=True, filter=reopened)
+                )
+            }
+            
             time_series_data = []
             for i in range(30):
                 date = now - timedelta(days=i)
                 day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_end = day_start + timedelta(days=1)
-                
-                day_tickets = tickets_qs.filter(created_at__gte=day_start, created_at__lt=day_end)
-                
-                claimed = day_tickets.filter(
-                    Q(claimed_by=technician) | Q(additional_technicians=technician)
-                ).distinct().count()
-                
-                closed = day_tickets.filter(
-                    Q(claimed_by=technician) | Q(additional_technicians=technician),
-                    status='closed'
-                ).distinct().count()
-                
-                reopened = day_tickets.filter(
-                    Q(claimed_by=technician) | Q(additional_technicians=technician),
-                    events__event_type='reopened'
-                ).distinct().count()
+                day = per_day.get(day_start.date(), {})
                 
                 time_series_data.append({
                     'date': day_start.strftime('%Y-%m-%d'),
-                    'ticketsClaimed': claimed,
-                    'ticketsClosed': closed,
-                    'ticketsReopened': reopened
+                    'ticketsClaimed': day.get('claimed', 0),
+                    'ticketsClosed': day.get('closed', 0),
+                    'ticketsReopened': day.get('reopened', 0)
                 })
             
             return Response({
@@ -610,25 +636,17 @@ def top_technicians_stats(request):
         except User.DoesNotExist:
             return Response({'error': 'Technician not found'}, status=status.HTTP_404_NOT_FOUND)
     
+    # Tickets claimed (claimed by or additional technician), closed and reopened, per technician
+    claimed_counts = tickets_qs.count_per_technician()
+    closed_counts = tickets_qs.filter(status='closed').count_per_technician()
+    reopened_counts = tickets_qs.filter(events__event_type='reopened').count_per_technician()
+    
     # Get top 5 technicians with their stats
     technician_stats = []
     for technician in technicians:
-        # Tickets claimed (claimed by or additional technician)
-        claimed_tickets = tickets_qs.filter(
-            Q(claimed_by=technician) | Q(additional_technicians=technician)
-        ).distinct().count()
-        
-        # Tickets closed
-        closed_tickets = tickets_qs.filter(
-            Q(claimed_by=technician) | Q(additional_technicians=technician),
-            status='closed'
-        ).distinct().count()
-        
-        # Tickets reopened
-        reopened_tickets = tickets_qs.filter(
-            Q(claimed_by=technician) | Q(additional_technicians=technician),
-            events__event_type='reopened'
-        ).distinct().count()
+        claimed_tickets = claimed_counts.get(technician.id, 0)
+        closed_tickets = closed_counts.get(technician.id, 0)
+        reopened_tickets = reopened_counts.get(technician.id, 0)
         
         technician_stats.append({
             'id': str(technician.id),
@@ -667,8 +685,11 @@ def update_ticket_type(request, ticket_id):
         return Response({'error': 'Problem type is required'}, status=status.HTTP_400_BAD_REQUEST)
     
     # Update the ticket type
-    ticket.type = problem_type.title()  # Convert to title case
-    ticket.save()
+    with transaction.atomic():
+        before = live_updates.snapshot(ticket)
+        ticket.type = problem_type.title()  # Convert to title case
+        ticket.save()
+        live_updates.ticket_changed(ticket, 'updated', request.user, before)
     
     return Response({'message': 'Ticket type updated successfully', 'type': ticket.type})
 
@@ -680,7 +701,7 @@ def create_closure_report(request, ticket_id):
         return Response({'error': 'Only technicians can create closure reports'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = Ticket.objects.select_related('claimed_by').get(id=ticket_id)
         
         # Check if ticket is already closed
         if ticket.status == 'closed':
@@ -712,32 +733,37 @@ def create_closure_report(request, ticket_id):
         # Create closure report
         serializer = TicketClosureReportSerializer(data=data)
         if serializer.is_valid():
-            closure_report = serializer.save(
-                ticket=ticket,
-                created_by=request.user
-            )
-            
-            # Update the ticket's type to match the closure report's problem_type
-            ticket.type = closure_report.problem_type.title()  # Convert to title case
-            ticket.save()
-            print(f"Created closure report with ID: {closure_report.id}")
-            print(f"Replaced parts count: {closure_report.replaced_parts.count()}")
-            for part in closure_report.replaced_parts.all():
-                print(f"  - Part: {part.part_name}, Serial: {part.serial_number}")
-            
-            # Close the ticket
-            ticket.status = 'closed'
-            ticket.closed_at = timezone.now()
-            ticket.save()
-            
-            # Create event log
-            event = TicketEvent.objects.create(
-                ticket=ticket,
-                actor=request.user,
-                event_type='closed',
-                from_value='open',
-                to_value='closed'
-            )
+            with transaction.atomic():
+                # Lock the row: the snapshot must be the state this change is applied to
+                ticket = Ticket.objects.select_for_update(of=('self',)).select_related('claimed_by').get(id=ticket.id)
+                before = live_updates.snapshot(ticket)
+                closure_report = serializer.save(
+                    ticket=ticket,
+                    created_by=request.user
+                )
+                
+                # Update the ticket's type to match the closure report's problem_type
+                ticket.type = closure_report.problem_type.title()  # Convert to title case
+                ticket.save()
+                print(f"Created closure report with ID: {closure_report.id}")
+                print(f"Replaced parts count: {closure_report.replaced_parts.count()}")
+                for part in closure_report.replaced_parts.all():
+                    print(f"  - Part: {part.part_name}, Serial: {part.serial_number}")
+                
+                # Close the ticket
+                ticket.status = 'closed'
+                ticket.closed_at = timezone.now()
+                ticket.save()
+                
+                # Create event log
+                event = TicketEvent.objects.create(
+                    ticket=ticket,
+                    actor=request.user,
+                    event_type='closed',
+                    from_value='open',
+                    to_value='closed'
+                )
+                live_updates.ticket_closed(ticket, request.user, before)
             
             # Send email notification to the employee who created the ticket
             email_service.notify_ticket_closed(ticket, event)
@@ -761,12 +787,14 @@ def get_closure_report(request, ticket_id):
     try:
         ticket = Ticket.objects.get(id=ticket_id)
         
-        # Check permissions
-        if request.user.role == 'employee' and ticket.requester != request.user:
-            return Response({'error': 'You can only view closure reports for your own tickets'}, status=status.HTTP_403_FORBIDDEN)
+        # Check permissions: the report's attachments come with signed URLs
+        if not ticket.is_visible_to(request.user):
+            return Response({'error': 'You can only view closure reports of tickets you can see'}, status=status.HTTP_403_FORBIDDEN)
         
-        if hasattr(ticket, 'closure_report'):
-            serializer = TicketClosureReportSerializer(ticket.closure_report)
+        # Reopened tickets can have several reports; the latest one is current
+        closure_report = _latest_closure_report(ticket)
+        if closure_report is not None:
+            serializer = TicketClosureReportSerializer(closure_report)
             return Response(serializer.data)
         else:
             return Response({'error': 'No closure report found for this ticket'}, status=status.HTTP_404_NOT_FOUND)
@@ -785,27 +813,31 @@ def upload_closure_report_attachment(request, ticket_id):
     try:
         ticket = Ticket.objects.get(id=ticket_id)
         
-        if not hasattr(ticket, 'closure_report'):
+        closure_report = _latest_closure_report(ticket)
+        if closure_report is None:
             return Response({'error': 'No closure report found for this ticket'}, status=status.HTTP_404_NOT_FOUND)
         
-        closure_report = ticket.closure_report
-        
         # Check if technician has permission
-        if closure_report.created_by != request.user:
+        if closure_report.created_by_id != request.user.id:
             return Response({'error': 'You can only upload attachments to your own closure reports'}, status=status.HTTP_403_FORBIDDEN)
         
         if 'file' not in request.FILES:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
         file = request.FILES['file']
+        try:
+            validate_upload(file.name, file.size, read_head(file))
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create attachment
-        attachment = TicketClosureReportAttachment.objects.create(
+        # Create attachment backed by the shared blob store
+        blob = store_uploaded_file(file)
+        attachment = create_attachment(
+            TicketClosureReportAttachment,
+            blob,
             closure_report=closure_report,
             file_name=file.name,
             mime_type=file.content_type,
-            size_bytes=file.size,
-            storage_url=file,
             uploaded_by=request.user
         )
         
@@ -813,4 +845,213 @@ def upload_closure_report_attachment(request, ticket_id):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
         
     except Ticket.DoesNotExist:
-        return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND) 
\ No newline at end of file
+        return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND) 
+
+def _latest_closure_report(ticket):
+    return ticket.closure_reports.order_by('-created_at').first()
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request, ticket_id):
+    """Start a resumable chunked upload (init → PUT chunks → finalize)"""
+    try:
+        ticket = Ticket.objects.get(id=ticket_id)
+    except Ticket.DoesNotExist:
+        return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = UploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    if serializer.validated_data.get('target') == 'closure_report':
+        if request.user.role != 'technician':
+            return Response({'error': 'Only technicians can upload closure report attachments'}, status=status.HTTP_403_FORBIDDEN)
+        closure_report = _latest_closure_report(ticket)
+        if closure_report is None:
+            return Response({'error': 'No closure report found for this ticket'}, status=status.HTTP_404_NOT_FOUND)
+        if closure_report.created_by_id != request.user.id:
+            return Response({'error': 'You can only upload attachments to your own closure reports'}, status=status.HTTP_403_FORBIDDEN)
+    elif not ticket.writable_by(request.user):
+        return Response({'error': 'You can only add attachments to tickets you requested or are working on'}, status=status.HTTP_403_FORBIDDEN)
+    
+    # Reject oversized or disallowed files before any byte is transferred
+    try:
+        validate_upload(serializer.validated_data['file_name'], serializer.validated_data['total_size'])
+        if serializer.validated_data.get('target', 'attachment') == 'attachment':
+            check_attachment_quota(ticket, serializer.validated_data['total_size'])
+    except DjangoValidationError as e:
+        return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer.save(ticket=ticket, created_by=request.user)
+    data = dict(serializer.data, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session_detail(request, upload_id):
+    """
+    GET: current offset (to resume). DELETE: abort.
+    PUT: raw chunk body written at the ``Upload-Offset`` header, optionally
+    verified against ``Upload-Checksum: sha256 <hex>``.
+    """
+    try:
+        session = UploadSession.objects.get(id=upload_id, created_by=request.user)
+    except UploadSession.DoesNotExist:
+        return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'GET':
+        return Response(UploadSessionSerializer(session).data)
+    
+    if request.method == 'DELETE':
+        UploadSession.objects.filter(id=session.id).update(status='aborted', updated_at=timezone.now())
+        discard_partial(session.partial_path)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    if session.status != 'pending':
+        return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+    
+    try:
+        offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+    except (KeyError, ValueError):
+        return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if offset != session.received_bytes:
+        return Response({'error': 'Offset mismatch', 'offset': session.received_bytes}, status=status.HTTP_409_CONFLICT)
+    
+    length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if length <= 0:
+        return Response({'error': 'Empty chunk'}, status=status.HTTP_400_BAD_REQUEST)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response({'error': f'Chunks must be at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if offset + length > session.total_size:
+        return Response({'error': 'Chunk extends past the declared file size'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    prefix = b''
+    if offset == 0:
+        # Sniff the magic bytes before anything is written to disk
+        prefix = request.stream.read(min(SNIFF_BYTES, length))
+        try:
+            validate_upload(session.file_name, session.total_size, prefix)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    
+    written, chunk_digest = write_chunk(session.partial_path, offset, request.stream, length, prefix=prefix)
+    if written != length:
+        return Response({'error': 'Incomplete chunk', 'offset': offset}, status=status.HTTP_400_BAD_REQUEST)
+    
+    checksum = request.META.get('HTTP_UPLOAD_CHECKSUM', '')
+    if checksum:
+        algorithm, _, expected = checksum.partition(' ')
+        if algorithm.lower() != 'sha256' or expected.strip().lower() != chunk_digest:
+            # Offset is not advanced; the retried chunk overwrites these bytes
+            return Response({'error': 'Chunk checksum mismatch', 'offset': offset}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Conditional update so two concurrent PUTs cannot both advance the offset
+    advanced = UploadSession.objects.filter(
+        id=session.id, status='pending', received_bytes=offset
+    ).update(received_bytes=offset + written, updated_at=timezone.now())
+    if not advanced:
+        session.refresh_from_db()
+        return Response({'error': 'Offset mismatch', 'offset': session.received_bytes}, status=status.HTTP_409_CONFLICT)
+    
+    return Response({'offset': offset + written, 'complete': offset + written == session.total_size})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_upload(request, upload_id):
+    """Verify the whole-file SHA-256 and turn the upload into an attachment"""
+    try:
+        session = UploadSession.objects.select_related('ticket').get(id=upload_id, created_by=request.user)
+    except UploadSession.DoesNotExist:
+        return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if session.status != 'pending':
+        return Response({'error': f'Upload session is {session.status}'}, status=status.HTTP_409_CONFLICT)
+    if not session.is_complete:
+        return Response({'error': 'Upload is incomplete', 'offset': session.received_bytes}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Claim the session so a duplicate finalize cannot create two attachments
+    if not UploadSession.objects.filter(id=session.id, status='pending').update(status='complete', updated_at=timezone.now()):
+        return Response({'error': 'Upload session is already being finalized'}, status=status.HTTP_409_CONFLICT)
+    
+    if file_sha256(session.partial_path) != session.sha256:
+        # Corrupted in transit: start over from offset 0
+        discard_partial(session.partial_path)
+        UploadSession.objects.filter(id=session.id).update(status='pending', received_bytes=0, updated_at=timezone.now())
+        return Response({'error': 'Checksum mismatch, upload restarted', 'offset': 0}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if session.target == 'closure_report':
+        closure_report = _latest_closure_report(session.ticket)
+        if closure_report is None:
+            UploadSession.objects.filter(id=session.id).update(status='pending')
+            return Response({'error': 'No closure report found for this ticket'}, status=status.HTTP_404_NOT_FOUND)
+    else:
+        try:
+            check_attachment_quota(session.ticket, session.total_size)
+        except DjangoValidationError as e:
+            # Keep the uploaded bytes: finalizing can be retried once room is made
+            UploadSession.objects.filter(id=session.id).update(status='pending')
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # The partial file is moved into the blob store (or dropped if the content already exists)
+    blob = store_file_path(session.partial_path, sha256=session.sha256)
+    if session.target == 'closure_report':
+        attachment = create_attachment(
+            TicketClosureReportAttachment,
+            blob,
+            closure_report=closure_report,
+            file_name=session.file_name,
+            mime_type=session.mime_type,
+            uploaded_by=request.user
+        )
+        serializer = TicketClosureReportAttachmentSerializer(attachment, context={'request': request})
+    else:
+        try:
+            attachment = create_attachment(
+                TicketAttachment,
+                blob,
+                ticket=session.ticket,
+                file_name=session.file_name,
+                mime_type=session.mime_type,
+                uploaded_by=request.user
+            )
+        except DjangoValidationError as e:
+            # Lost the race for the last slot; the bytes are already gone
+            UploadSession.objects.filter(id=session.id).update(status='aborted')
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = TicketAttachmentSerializer(attachment, context={'request': request})
+    
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def _download(request, model, attachment_id, ticket_path):
+    try:
+        attachment = model.objects.select_related(ticket_path).get(id=attachment_id)
+    except model.DoesNotExist:
+        return Response({'error': 'Attachment not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Signed URLs are handed out by the serializers to users who can see the ticket
+    if not has_valid_signature(request, attachment):
+        if not request.user.is_authenticated:
+            return Response({'error': 'Authentication credentials were not provided'}, status=status.HTTP_401_UNAUTHORIZED)
+        ticket = attachment.ticket if model is TicketAttachment else attachment.closure_report.ticket
+        if not ticket.is_visible_to(request.user):
+            return Response({'error': 'You can only download attachments of tickets you can see'}, status=status.HTTP_403_FORBIDDEN)
+    
+    return serve_attachment(request, attachment)
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([AllowAny])
+def download_attachment(request, attachment_id):
+    """Stream a ticket attachment (Range, ETag, optional sendfile offload)"""
+    return _download(request, TicketAttachment, attachment_id, 'ticket')
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([AllowAny])
+def download_closure_report_attachment(request, attachment_id):
+    """Stream a closure report attachment (Range, ETag, optional sendfile offload)"""
+    return _download(request, TicketClosureReportAttachment, attachment_id, 'closure_report__ticket')
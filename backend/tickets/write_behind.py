@@ -0,0 +1,126 @@
+"""
+Write-behind buffer for chat messages.
+
+Consumers enqueue unsaved ``TicketMessage`` instances and broadcast straight
+away; a single writer task per event loop persists them with ``bulk_create``
+in batches bounded by size and time. The queue is bounded, so when the
+database falls behind ``enqueue`` waits (backpressure) instead of growing
+memory without limit.
+
+A batch that fails to insert is retried one row at a time, so a single bad row
+(e.g. its ticket was deleted meanwhile) does not lose the rest of the batch.
+Rows that still fail are logged and counted in ``failed``, not in ``written``.
+"""
+
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import TicketMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageWriteBuffer:
+    def __init__(self, max_batch_size=50, flush_interval=0.05, max_queue_size=1000):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        # Monotonic counters used by flush() to wait for a point in the stream;
+        # every processed message is either written or failed
+        self.enqueued = 0
+        self.processed = 0
+        self.written = 0
+        self.failed = 0
+        self._written_changed = asyncio.Condition()
+        self._writer_task = None
+
+    async def enqueue(self, message):
+        """Queue an unsaved TicketMessage; waits while the queue is full"""
+        self._ensure_writer()
+        await self.queue.put(message)
+        self.enqueued += 1
+
+    async def flush(self):
+        """
+        Wait until every message enqueued before this call has been processed.
+        Returns the number of messages that failed to persist meanwhile (0
+        when everything was written).
+        """
+        target = self.enqueued
+        failed_before = self.failed
+        if self.processed >= target:
+            return 0
+        self._ensure_writer()
+        async with self._written_changed:
+            await self._written_changed.wait_for(lambda: self.processed >= target)
+        return self.failed - failed_before
+
+    def _ensure_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.ensure_future(self._run_writer())
+
+    async def _run_writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                written = await database_sync_to_async(self._write_batch)(batch)
+            except Exception:
+                logger.exception(f"Failed to persist {len(batch)} chat messages")
+                written = 0
+
+            for _ in batch:
+                self.queue.task_done()
+            async with self._written_changed:
+                self.processed += len(batch)
+                self.written += written
+                self.failed += len(batch) - written
+                self._written_changed.notify_all()
+
+    @staticmethod
+    def _write_batch(batch):
+        """Insert the batch; returns the number of messages actually stored"""
+        try:
+            TicketMessage.objects.bulk_create(batch)
+            return len(batch)
+        except Exception as e:
+            # bulk_create is atomic: nothing was stored, retry the rows one by one
+            logger.warning(f"Batch insert of {len(batch)} chat messages failed ({str(e)}), retrying per row")
+        written = 0
+        for message in batch:
+            try:
+                TicketMessage.objects.bulk_create([message])
+                written += 1
+            except Exception as e:
+                logger.error(f"Chat message {message.id} on ticket {message.ticket_id} was not persisted: {str(e)}")
+        return written
+
+
+_buffers = {}
+
+
+def get_write_buffer():
+    """Return the buffer bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(loop)
+    if buffer is None:
+        buffer = ChatMessageWriteBuffer(
+            max_batch_size=getattr(settings, 'CHAT_WRITE_BEHIND_BATCH_SIZE', 50),
+            flush_interval=getattr(settings, 'CHAT_WRITE_BEHIND_FLUSH_INTERVAL', 0.05),
+            max_queue_size=getattr(settings, 'CHAT_WRITE_BEHIND_MAX_QUEUE', 1000),
+        )
+        _buffers[loop] = buffer
+    return buffer
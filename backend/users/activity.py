@@ -0,0 +1,108 @@
+"""
+last_login / last_logout bookkeeping for the login and logout views.
+
+Both used to be full ``user.save()`` calls that rewrote every column in the
+request. Each timestamp is now written on its own column only: immediately
+with ``update_fields`` when AUTH_TIMESTAMP_FLUSH_INTERVAL is 0, otherwise
+queued in memory and written by a background thread every
+AUTH_TIMESTAMP_FLUSH_INTERVAL seconds in a single transaction, so a burst of
+logins costs one SQLite write instead of one per request.
+
+Queued timestamps are lost if the process is killed before the next flush;
+they are flushed on normal interpreter exit.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .authentication import user_cache
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# {user_id: {field: timestamp}}
+_pending = {}
+_lock = threading.Lock()
+_flusher = None
+
+
+def _ensure_flusher(interval):
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_run_flusher, args=(interval,), name='auth-timestamp-flush', daemon=True
+            )
+            _flusher.start()
+            atexit.register(flush_timestamps)
+
+
+def _run_flusher(interval):
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            flush_timestamps()
+        except Exception as e:
+            logger.error(f"Flushing login timestamps failed: {str(e)}")
+        finally:
+            close_old_connections()
+
+
+def _record(user, field):
+    now = timezone.now()
+    setattr(user, field, now)
+    interval = settings.AUTH_TIMESTAMP_FLUSH_INTERVAL
+    if interval <= 0:
+        user.save(update_fields=[field])
+        return
+    with _lock:
+        _pending.setdefault(user.pk, {})[field] = now
+    _ensure_flusher(interval)
+
+
+def record_login(user):
+    _record(user, 'last_login')
+
+
+def record_logout(user):
+    _record(user, 'last_logout')
+
+
+def flush_timestamps():
+    """Write the queued timestamps. Returns the number of users updated."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return 0
+
+    # One bulk UPDATE per combination of fields
+    batches = {}
+    for user_id, values in pending.items():
+        batches.setdefault(tuple(sorted(values)), []).append(User(pk=user_id, **values))
+    try:
+        with transaction.atomic():
+            for fields, users in batches.items():
+                User.objects.bulk_update(users, fields, batch_size=500)
+    except Exception:
+        # Requeue, without overwriting anything recorded in the meantime
+        with _lock:
+            for user_id, values in pending.items():
+                queued = _pending.setdefault(user_id, {})
+                for field, value in values.items():
+                    queued.setdefault(field, value)
+        raise
+
+    # bulk_update sends no post_save: drop the stale copies explicitly
+    for user_id in pending:
+        user_cache.invalidate(user_id)
+    return len(pending)
@@ -0,0 +1,101 @@
+"""
+JWT authentication with a per-process user cache.
+
+simplejwt loads the User row on every request. Polling dashboards make that
+one of the most frequent queries, so authenticated users are kept in a small
+LRU keyed by user id and token version (simplejwt's password-hash claim,
+enabled with CHECK_REVOKE_TOKEN) for AUTH_USER_CACHE_TTL seconds. Revoked
+tokens are rejected from memory as well (users/revocation.py).
+
+Saving or deleting a user evicts it from this process immediately and from the
+others through the revocation list's shared sequence, within
+AUTH_REVOCATION_SYNC_INTERVAL (see users/signals.py). Cached users are still
+checked for is_active on every request.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import revocations
+
+
+class UserCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            cached_version, user, expires = entry
+            if cached_version != version or expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._entries[user_id] = (version, user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that rejects revoked tokens (users/revocation.py) and
+    serves the user from ``user_cache`` when it can
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(validated_token):
+            raise InvalidToken({
+                'detail': 'Token has been revoked',
+                'code': 'token_not_valid',
+            })
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        version = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM, '')
+
+        user = user_cache.get(user_id, version)
+        if user is None:
+            # Raises for unknown/inactive users and tokens issued before a password change
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, version, user)
+        elif not user.is_active:
+            user_cache.invalidate(user_id)
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        # Views modify request.user (last_logout, profile updates): never hand out the shared instance
+        return copy.copy(user)
+
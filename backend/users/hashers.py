@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from PASSWORD_HASH_ITERATIONS.
+
+    Uses the same "pbkdf2_sha256" algorithm name as Django's hasher, so existing
+    hashes keep verifying; a stored hash with a different iteration count is
+    re-encoded on the user's next successful login.
+    Measure candidate values with ``manage.py bench_login``.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
@@ -0,0 +1,161 @@
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.test import APIClient
+
+from users.activity import flush_timestamps
+from users.models import User
+
+PASSWORD = 'bench-login-password'
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark password hashing cost and login throughput (uses a temporary test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            default=f'100000,260000,{settings.PASSWORD_HASH_ITERATIONS}',
+            help='Comma-separated PBKDF2 iteration counts to time (default: 100000,260000,current setting)',
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=5,
+            help='Hashes per iteration count (default: 5)',
+        )
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=200,
+            help='Logins per mode, one per user (default: 200; 0 skips the login benchmark)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Simultaneous login requests (default: 8)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(value) for value in options['iterations'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--iterations must be a comma-separated list of integers')
+
+        self.stdout.write('Password hashing (PBKDF2-SHA256):')
+        for iterations in counts:
+            durations = []
+            for _ in range(options['samples']):
+                started = time.perf_counter()
+                self._hash(iterations)
+                durations.append((time.perf_counter() - started) * 1000)
+            marker = ' (current)' if iterations == settings.PASSWORD_HASH_ITERATIONS else ''
+            self.stdout.write(f"  {iterations:>9} iterations: {statistics.median(durations):7.1f} ms/hash{marker}")
+
+        if options['logins'] > 0:
+            self.bench_logins(options['logins'], options['concurrency'])
+
+    def _hash(self, iterations):
+        hasher = get_hasher('pbkdf2_sha256')
+        return hasher.encode(PASSWORD, hasher.salt(), iterations)
+
+    def bench_logins(self, total, concurrency):
+        db = settings.DATABASES['default']
+        temp_dir = None
+        if db['ENGINE'] == 'django.db.backends.sqlite3':
+            # The default in-memory test database is not shared between threads reliably
+            temp_dir = tempfile.mkdtemp()
+            db.setdefault('TEST', {})['NAME'] = os.path.join(temp_dir, 'bench_login.sqlite3')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            # Hash once: every bench user shares the same password hash
+            encoded = make_password(PASSWORD)
+            User.objects.bulk_create([
+                User(email=f'bench{i}@example.com', username=f'bench{i}', password=encoded)
+                for i in range(total * 2)
+            ])
+            connection.close()
+
+            flush_interval = settings.AUTH_TIMESTAMP_FLUSH_INTERVAL
+            self.stdout.write(f'Login throughput ({total} logins, concurrency {concurrency}):')
+            try:
+                for label, interval, offset in (
+                    ('immediate writes', 0, 0),
+                    # Long interval: the single flush below is timed explicitly
+                    ('batched writes', 3600, total),
+                ):
+                    settings.AUTH_TIMESTAMP_FLUSH_INTERVAL = interval
+                    report = self.run_logins(total, concurrency, offset)
+                    self.stdout.write(
+                        f"  {label:<17} {report['rate']:7.1f} logins/s  "
+                        f"p50={report['p50']:.0f}ms p95={report['p95']:.0f}ms  "
+                        f"UPDATE statements: {report['updates']}"
+                    )
+                    if report['failed']:
+                        raise CommandError(f"{report['failed']} logins failed")
+            finally:
+                settings.AUTH_TIMESTAMP_FLUSH_INTERVAL = flush_interval
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            if temp_dir:
+                os.rmdir(temp_dir)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def run_logins(self, total, concurrency, offset):
+        updates = []
+
+        def count_updates(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('UPDATE'):
+                updates.append(sql)
+            return execute(sql, params, many, context)
+
+        def login(index):
+            client = APIClient()
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_updates):
+                response = client.post(
+                    '/api/auth/login/',
+                    {'email': f'bench{offset + index}@example.com', 'password': PASSWORD},
+                    format='json'
+                )
+            elapsed = (time.perf_counter() - started) * 1000
+            connection.close()
+            return response.status_code == 200, elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(login, range(total)))
+        with connection.execute_wrapper(count_updates):
+            flush_timestamps()
+        duration = time.perf_counter() - started
+
+        latencies = [elapsed for ok, elapsed in results]
+        return {
+            'rate': total / max(duration, 1e-9),
+            'p50': statistics.median(latencies),
+            'p95': _percentile(latencies, 95),
+            'updates': len(updates),
+            'failed': sum(1 for ok, elapsed in results if not ok),
+        }
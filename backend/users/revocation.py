@@ -0,0 +1,174 @@
+"""
+Token revocation without a database query per request.
+
+Three kinds of entries are kept in memory in every worker:
+
+- revoked token ids (``jti``) until the token's own expiry: logout revokes the
+  access token and, when sent, the refresh token. A Bloom filter answers the
+  common "not revoked" case; the exact dict confirms its positives, so a false
+  positive never rejects a valid token.
+- per-user "tokens invalid before" timestamps: deleting a user or changing
+  their password rejects every token issued earlier, in all workers, without
+  waiting for the authenticated-user cache (users/authentication.py) to expire.
+- user evictions: any other change to a user (deactivation, role) drops it
+  from the authenticated-user cache of every worker.
+
+Workers share entries through the default cache: each one is stored under a
+sequence number (``cache.incr``), and every worker pulls the entries it has not
+seen yet at most every AUTH_REVOCATION_SYNC_INTERVAL seconds. The cache must be
+shared between workers (CACHE_URL) for revocations to reach all of them; the
+entries expire with the longest token lifetime, so losing the cache only
+revives tokens that were revoked on other workers.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+SEQUENCE_KEY = 'auth:revocations:seq'
+ENTRY_KEY = 'auth:revocations:{}'
+
+# A sequence number whose entry is still missing after this long expired, was
+# evicted or belonged to a crashed publisher, and is no longer retried
+GAP_TIMEOUT = 10
+SYNC_BATCH_SIZE = 500
+PRUNE_INTERVAL = 600
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(settings.AUTH_REVOCATION_BLOOM_CAPACITY)
+        self._jtis = {}  # jti -> expiry (epoch seconds)
+        self._invalid_before = {}  # user id -> (epoch seconds, entry expiry)
+        self._next_prune = time.time() + PRUNE_INTERVAL
+        self._seq = 0
+        self._missing = {}  # sequence number -> first time it was found missing
+        self._next_sync = 0.0
+
+    # Checks
+
+    def is_revoked(self, token):
+        self.sync()
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and jti in self._bloom and jti in self._jtis:
+            return True
+        invalid_before = self._invalid_before.get(str(token.get(api_settings.USER_ID_CLAIM)))
+        if invalid_before is not None:
+            return token.get('iat', 0) < invalid_before[0]
+        return False
+
+    # Publishing
+
+    def revoke_token(self, token):
+        """Revoke one access or refresh token until it expires"""
+        self._publish({'jti': token[api_settings.JTI_CLAIM], 'expires': int(token['exp'])})
+
+    def revoke_user(self, user_id, at=None):
+        """Reject every token of ``user_id`` issued before ``at`` (default: now)"""
+        at = int(at.timestamp() if isinstance(at, datetime) else (at or time.time()))
+        # Nothing issued before ``at`` outlives the longest token lifetime
+        lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        self._publish({'user_id': str(user_id), 'at': at, 'expires': at + int(lifetime.total_seconds()) + 1})
+
+    def evict_user(self, user_id):
+        """Drop ``user_id`` from the authenticated-user cache of every worker"""
+        # Entries older than the cache TTL have nothing left to evict
+        expires = int(time.time()) + settings.AUTH_USER_CACHE_TTL + 1
+        self._publish({'user_id': str(user_id), 'expires': expires})
+
+    def _publish(self, entry):
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        seq = cache.incr(SEQUENCE_KEY)
+        cache.set(ENTRY_KEY.format(seq), entry, timeout=max(1, entry['expires'] - int(time.time())))
+        with self._lock:
+            self._apply(entry)
+
+    # Synchronisation
+
+    def _apply(self, entry):
+        if 'jti' in entry:
+            self._jtis[entry['jti']] = entry['expires']
+            self._bloom.add(entry['jti'])
+            return
+        if 'at' in entry:
+            current = self._invalid_before.get(entry['user_id'])
+            if current is None or current[0] < entry['at']:
+                self._invalid_before[entry['user_id']] = (entry['at'], entry['expires'])
+        # Both user entries drop the cached user object in this worker
+        from .authentication import user_cache
+        user_cache.invalidate(entry['user_id'])
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        with self._lock:
+            if not force and now < self._next_sync:
+                return
+            self._next_sync = now + settings.AUTH_REVOCATION_SYNC_INTERVAL
+            latest = cache.get(SEQUENCE_KEY, 0)
+            if latest < self._seq:
+                # The cache was cleared: start over from its new sequence
+                self._seq = 0
+                self._missing.clear()
+
+            # Entries whose number was taken but not yet written (or evicted)
+            # are retried until GAP_TIMEOUT
+            sequences = list(self._missing) + list(range(self._seq + 1, latest + 1))
+            for start in range(0, len(sequences), SYNC_BATCH_SIZE):
+                batch = sequences[start:start + SYNC_BATCH_SIZE]
+                entries = cache.get_many([ENTRY_KEY.format(seq) for seq in batch])
+                for seq in batch:
+                    entry = entries.get(ENTRY_KEY.format(seq))
+                    if entry is not None:
+                        self._apply(entry)
+                        self._missing.pop(seq, None)
+                    elif now - self._missing.setdefault(seq, now) > GAP_TIMEOUT:
+                        del self._missing[seq]
+            self._seq = max(self._seq, latest)
+
+            if time.time() > self._next_prune:
+                self._prune()
+
+    def _prune(self):
+        """Forget expired entries; the Bloom filter is rebuilt without them"""
+        now = time.time()
+        jtis = {jti: expires for jti, expires in self._jtis.items() if expires > now}
+        bloom = BloomFilter(settings.AUTH_REVOCATION_BLOOM_CAPACITY)
+        for jti in jtis:
+            bloom.add(jti)
+        # Readers do not take the lock: swap in complete structures only
+        self._bloom, self._jtis = bloom, jtis
+        self._invalid_before = {
+            user_id: value for user_id, value in self._invalid_before.items() if value[1] > now
+        }
+        self._next_prune = now + PRUNE_INTERVAL
+
+revocations = RevocationList()
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+from .revocation import revocations
+
+
+# Written on login/logout (users/activity.py); they do not change who the user is
+TIMESTAMP_FIELDS = frozenset({'last_login', 'last_logout'})
+
+
+@receiver(post_save, sender=User)
+def evict_cached_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Profile edits, role changes and deactivations take effect on the next
+    request in this worker, and within AUTH_REVOCATION_SYNC_INTERVAL in the others
+    """
+    user_cache.invalidate(instance.pk)
+    if update_fields is None or not set(update_fields) <= TIMESTAMP_FIELDS:
+        revocations.evict_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def evict_deleted_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def revoke_tokens_on_password_change(sender, instance, **kwargs):
+    """Tokens issued before a password change stop working in every worker at once"""
+    # set_password() keeps the raw password in _password until the user is saved
+    if getattr(instance, '_password', None) is not None and not instance._state.adding:
+        revocations.revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revocations.revoke_user(instance.pk)
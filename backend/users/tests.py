@@ -0,0 +1,230 @@
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from tickets.models import Ticket
+from tickets.seeding import SEED_PASSWORD
+from tickets.testing import LARGE_DATASET, SMALL_DATASET, QueryBudgetTestCase
+
+from .authentication import UserCache, user_cache
+from .models import User
+from .revocation import RevocationList, revocations
+
+
+class UserEndpointQueryBudgets:
+    """Maximum queries per request for every URL of users/urls.py"""
+
+    def test_register(self):
+        self.assertMaxQueries(5, 'post', '/api/auth/register/', status=(201,), data={
+            'email': 'nouveau@example.com', 'username': 'nouveau', 'first_name': 'Nouveau', 'last_name': 'Compte',
+            'role': 'employee', 'group': 'Employee', 'password': 'motdepasse-solide-42',
+        })
+
+    def test_login(self):
+        self.assertMaxQueries(2, 'post', '/api/auth/login/', data={
+            'email': self.employee.email, 'password': SEED_PASSWORD,
+        })
+
+    def test_logout(self):
+        self.assertMaxQueries(1, 'post', '/api/auth/logout/', self.employee)
+
+    def test_token_refresh(self):
+        response = self.client.post('/api/auth/login/', {'email': self.employee.email, 'password': SEED_PASSWORD})
+        self.assertMaxQueries(0, 'post', '/api/auth/token/refresh/', data={'refresh': response.data['refresh']})
+
+    def test_profile(self):
+        self.assertMaxQueries(0, 'get', '/api/auth/profile/', self.employee)
+
+    def test_update_profile(self):
+        self.assertMaxQueries(2, 'put', '/api/auth/profile/update/', self.employee, data={'phone': '0612345678'})
+
+    def test_change_password(self):
+        self.assertMaxQueries(3, 'post', '/api/auth/change-password/', self.employee, data={
+            'current_password': SEED_PASSWORD, 'new_password': 'motdepasse-solide-42',
+        })
+
+    def test_dashboard(self):
+        for user in (self.technician, self.employee):
+            with self.subTest(role=user.role):
+                self.assertMaxQueries(1, 'get', '/api/auth/dashboard/', user)
+
+    def test_recent_activity(self):
+        for user in (self.admin, self.technician, self.employee):
+            with self.subTest(role=user.role):
+                self.assertMaxQueries(1, 'get', '/api/auth/recent-activity/', user)
+
+    def test_admin_dashboard_stats(self):
+        response = self.assertMaxQueries(2, 'get', '/api/auth/admin/dashboard-stats/', self.admin)
+        # Read from the maintained counters; they match a recount
+        tickets = Ticket.objects.all()
+        self.assertEqual(response.data['total_tickets'], tickets.count())
+        self.assertEqual(response.data['open_tickets'], tickets.filter(status='open').count())
+        self.assertEqual(response.data['tickets_by_priority']['P1'], tickets.filter(priority='P1').count())
+        self.assertEqual(response.data['tickets_by_type']['Network'], tickets.filter(type='Network').count())
+
+    def test_user_list(self):
+        for user in (self.admin, self.employee):
+            with self.subTest(role=user.role):
+                self.assertMaxQueries(1, 'get', '/api/auth/users/', user)
+
+    def test_create_user(self):
+        self.assertMaxQueries(5, 'post', '/api/auth/admin/users/create/', self.admin, status=(201,), data={
+            'email': 'technicien@example.com', 'username': 'technicien', 'first_name': 'Nouveau',
+            'last_name': 'Technicien', 'role': 'technician', 'group': 'Employee', 'password': 'motdepasse-solide-42',
+        })
+
+    def test_update_user(self):
+        self.assertMaxQueries(
+            2, 'put', f'/api/auth/admin/users/{self.other_technician.id}/update/', self.admin,
+            data={'phone': '0698765432'},
+        )
+
+    def test_delete_user(self):
+        self.assertMaxQueries(19, 'delete', f'/api/auth/admin/users/{self.other_technician.id}/delete/', self.admin)
+
+
+class SmallDatasetUserQueryTests(UserEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = SMALL_DATASET
+
+
+class LargeDatasetUserQueryTests(UserEndpointQueryBudgets, QueryBudgetTestCase):
+    dataset = LARGE_DATASET
+
+
+class CachedUserTests(APITestCase):
+    """users/authentication.py: the user cache, and its eviction in every worker through users/revocation.py"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('cache@example.com', password=SEED_PASSWORD)
+        self.token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def profile(self):
+        return self.client.get('/api/auth/profile/')
+
+    def cached_user(self):
+        return user_cache.get(str(self.user.pk), self.token.get(api_settings.REVOKE_TOKEN_CLAIM, ''))
+
+    def cache_stale_user(self, **fields):
+        stale = User.objects.get(pk=self.user.pk)
+        for name, value in fields.items():
+            setattr(stale, name, value)
+        user_cache.set(str(self.user.pk), self.token.get(api_settings.REVOKE_TOKEN_CLAIM, ''), stale)
+
+    def test_cache_hit_needs_no_query(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.profile().status_code, 200)
+
+    def test_saving_a_user_evicts_it_from_the_other_workers(self):
+        revocations.sync(force=True)
+        self.cache_stale_user()
+        # Saved in another worker: only this worker's sync can evict the stale entry
+        with mock.patch('users.authentication.user_cache', UserCache(8, 30)), \
+                mock.patch('users.signals.user_cache', UserCache(8, 30)):
+            User.objects.get(pk=self.user.pk).save(update_fields=['role'])
+        self.assertIsNotNone(self.cached_user())
+        revocations.sync(force=True)
+        self.assertIsNone(self.cached_user())
+
+    def test_login_timestamps_do_not_evict(self):
+        self.cache_stale_user()
+        with mock.patch.object(revocations, 'evict_user') as evict_user:
+            self.user.save(update_fields=['last_login'])
+        evict_user.assert_not_called()
+        # This worker drops its own entry all the same
+        self.assertIsNone(self.cached_user())
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.profile().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_inactive_cached_user_is_rejected(self):
+        # Deactivated before its eviction reached this worker
+        self.cache_stale_user(is_active=False)
+        response = self.profile()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'user_inactive')
+
+
+# Login timestamps are written in the request, not by the flusher thread after the test database is gone
+@override_settings(AUTH_TIMESTAMP_FLUSH_INTERVAL=0)
+class ChangePasswordTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('password@example.com', password=SEED_PASSWORD)
+        response = self.client.post('/api/auth/login/', {'email': self.user.email, 'password': SEED_PASSWORD})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_new_tokens_replace_the_revoked_ones(self):
+        response = self.client.post('/api/auth/change-password/', {
+            'current_password': SEED_PASSWORD, 'new_password': 'motdepasse-solide-42',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+        refreshed = self.client.post('/api/auth/token/refresh/', {'refresh': response.data['refresh']})
+        self.assertEqual(refreshed.status_code, 200)
+
+    def test_wrong_current_password_or_short_new_password(self):
+        for data in (
+            {'current_password': 'incorrect', 'new_password': 'motdepasse-solide-42'},
+            {'current_password': SEED_PASSWORD, 'new_password': 'court'},
+        ):
+            with self.subTest(**data):
+                self.assertEqual(self.client.post('/api/auth/change-password/', data).status_code, 400)
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password(SEED_PASSWORD))
+
+
+@override_settings(AUTH_TIMESTAMP_FLUSH_INTERVAL=0)
+class RevocationTests(APITestCase):
+    """users/revocation.py; each RevocationList stands for one worker"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('revocation@example.com', password=SEED_PASSWORD)
+
+    def test_bloom_filter_hits_are_confirmed(self):
+        worker = RevocationList()
+        revoked, valid, false_positive = (AccessToken.for_user(self.user) for _ in range(3))
+        worker.revoke_token(revoked)
+        worker._bloom.add(false_positive[api_settings.JTI_CLAIM])
+
+        self.assertIn(revoked[api_settings.JTI_CLAIM], worker._bloom)
+        self.assertTrue(worker.is_revoked(revoked))
+        self.assertFalse(worker.is_revoked(valid))
+        # In the filter but not in the exact list: still valid
+        self.assertFalse(worker.is_revoked(false_positive))
+
+    # Workers only see each other's entries when they sync
+    @override_settings(AUTH_REVOCATION_SYNC_INTERVAL=60)
+    def test_entries_reach_the_other_workers_through_the_cache_sequence(self):
+        publisher, other = RevocationList(), RevocationList()
+        other.sync(force=True)
+        token = AccessToken.for_user(self.user)
+        self.assertFalse(other.is_revoked(token))
+
+        publisher.revoke_token(token)
+        self.assertFalse(other.is_revoked(token))
+        other.sync(force=True)
+        self.assertTrue(other.is_revoked(token))
+
+        # Every token of the user issued before a password change, in the other worker too
+        earlier = RefreshToken.for_user(self.user)
+        publisher.revoke_user(self.user.pk, at=int(earlier['iat']) + 1)
+        other.sync(force=True)
+        self.assertTrue(other.is_revoked(earlier))
+
+    def test_logout_revokes_the_refresh_token(self):
+        tokens = self.client.post('/api/auth/login/', {'email': self.user.email, 'password': SEED_PASSWORD}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': tokens['refresh']}).status_code, 200)
+
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}).status_code, 401)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile, name='profile'),
     path('profile/update/', views.update_profile_view, name='update_profile'),
+    path('change-password/', views.change_password_view, name='change_password'),
     path('dashboard/', views.dashboard_stats, name='dashboard'),
     path('recent-activity/', views.recent_activity, name='recent_activity'),
     path('admin/dashboard-stats/', views.admin_dashboard_stats, name='admin_dashboard_stats'),
@@ -33,10 +33,9 @@ def login_view(request):
     user = authenticate(request, username=email, password=password)
     
     if user is not None:
-        # Update last_login timestamp
-        from django.utils import timezone
-        user.last_login = timezone.now()
-        user.save()
+        # Update last_login timestamp (single column, possibly batched)
+        from .activity import record_login
+        record_login(user)
         
         # Generate JWT token
         from rest_framework_simplejwt.tokens import RefreshToken
@@ -54,12 +53,25 @@ def login_view(request):
 @permission_classes([IsAuthenticated])
 def logout_view(request):
     """User logout endpoint"""
-    from django.utils import timezone
+    from .activity import record_logout
+    from .revocation import revocations
     
     # Track logout timestamp
-    user = request.user
-    user.last_logout = timezone.now()
-    user.save()
+    record_logout(request.user)
+    
+    # Revoke the access token used for this request and, if sent, the refresh token
+    if request.auth is not None:
+        revocations.revoke_token(request.auth)
+    refresh_token = request.data.get('refresh')
+    if refresh_token:
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from rest_framework_simplejwt.exceptions import TokenError
+        try:
+            refresh = RefreshToken(refresh_token)
+            if str(refresh.get('user_id')) == str(request.user.pk):
+                revocations.revoke_token(refresh)
+        except TokenError:
+            pass
     
     logout(request)
     return Response({'message': 'Logged out successfully'})
@@ -116,6 +128,8 @@ def change_password_view(request):
     
     if not user.check_password(current_password):
         return Response({'error': 'Current password is incorrect'}, status=status.HTTP_400_BAD_REQUEST)
+    if not new_password or len(new_password) < 8:
+        return Response({'error': 'Password must be at least 8 characters long.'}, status=status.HTTP_400_BAD_REQUEST)
     
     user.set_password(new_password)
     user.save()
@@ -125,7 +139,15 @@ def change_password_view(request):
     from tickets.email_service import email_service
     email_service.notify_admin_user_changed(user, changes)
     
-    return Response({'message': 'Password changed successfully'})
+    # Tokens issued before the change are revoked (CHECK_REVOKE_TOKEN): hand out new ones
+    from rest_framework_simplejwt.tokens import RefreshToken
+    refresh = RefreshToken.for_user(user)
+    
+    return Response({
+        'message': 'Password changed successfully',
+        'access': str(refresh.access_token),
+        'refresh': str(refresh)
+    })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -134,7 +156,7 @@ def admin_dashboard_stats(request):
     if request.user.role != 'admin':
         return Response({'error': 'Only admins can access dashboard stats'}, status=status.HTTP_403_FORBIDDEN)
 
-    from tickets.models import Ticket
+    from tickets.dashboard_counters import ADMIN, read_counters
     from django.db.models import Count, Q
 
     # Single optimized query for user statistics
@@ -145,41 +167,23 @@ def admin_dashboard_stats(request):
         technician_users=Count('id', filter=Q(role='technician'))
     )
 
-    # Single optimized query for ticket statistics
-    ticket_stats = Ticket.objects.aggregate(
-        total_tickets=Count('id'),
-        open_tickets=Count('id', filter=Q(status='open')),
-        closed_tickets=Count('id', filter=Q(status='closed')),
-        p1_tickets=Count('id', filter=Q(priority='P1')),
-        p2_tickets=Count('id', filter=Q(priority='P2')),
-        p3_tickets=Count('id', filter=Q(priority='P3')),
-        p4_tickets=Count('id', filter=Q(priority='P4')),
-        network_tickets=Count('id', filter=Q(type='Network')),
-        hardware_tickets=Count('id', filter=Q(type='Hardware')),
-        software_tickets=Count('id', filter=Q(type='Software'))
-    )
+    # Maintained counters (tickets/dashboard_counters.py): one indexed read
+    ticket_stats = read_counters(ADMIN)
+    by_priority = ticket_stats.get('tickets_by_priority', {})
+    by_type = ticket_stats.get('tickets_by_type', {})
 
     return Response({
         'total_users': user_stats['total_users'],
-        'total_tickets': ticket_stats['total_tickets'],
-        'open_tickets': ticket_stats['open_tickets'],
-        'closed_tickets': ticket_stats['closed_tickets'],
+        'total_tickets': ticket_stats.get('total_tickets', 0),
+        'open_tickets': ticket_stats.get('open_tickets', 0),
+        'closed_tickets': ticket_stats.get('closed_tickets', 0),
         'users_by_role': {
             'admin': user_stats['admin_users'],
             'employee': user_stats['employee_users'],
             'technician': user_stats['technician_users'],
         },
-        'tickets_by_priority': {
-            'P1': ticket_stats['p1_tickets'],
-            'P2': ticket_stats['p2_tickets'],
-            'P3': ticket_stats['p3_tickets'],
-            'P4': ticket_stats['p4_tickets'],
-        },
-        'tickets_by_type': {
-            'Network': ticket_stats['network_tickets'],
-            'Hardware': ticket_stats['hardware_tickets'],
-            'Software': ticket_stats['software_tickets'],
-        },
+        'tickets_by_priority': {priority: by_priority.get(priority, 0) for priority in ('P1', 'P2', 'P3', 'P4')},
+        'tickets_by_type': {ticket_type: by_type.get(ticket_type, 0) for ticket_type in ('Network', 'Hardware', 'Software')},
     })
 
 @api_view(['GET'])
@@ -187,7 +191,7 @@ def admin_dashboard_stats(request):
 def dashboard_stats(request):
     """General dashboard statistics for technicians and employees"""
     from tickets.models import Ticket
-    from django.db.models import Count, Q
+    from tickets.dashboard_counters import EMPLOYEES, TECHNICIANS, read_counters, requester_scope, technician_scope
     
     user = request.user
     
@@ -195,39 +199,9 @@ def dashboard_stats(request):
         # Redirect to admin dashboard stats
         return admin_dashboard_stats(request)
     
-    # For technicians and employees
+    # For technicians and employees: maintained counters (tickets/dashboard_counters.py)
     if user.role == 'technician':
-        current_time = timezone.now()
-        
-        # Technician-specific stats - using claimed_by and additional_technicians
-        unassigned_tickets = Ticket.objects.filter(status='open', claimed_by__isnull=True).count()
-        
-        # Total open tickets in the system
-        total_open_tickets = Ticket.objects.filter(status='open').count()
-        
-        # My open tickets (claimed by me or I'm additional technician)
-        my_open_tickets = Ticket.objects.filter(
-            Q(claimed_by=user) | Q(additional_technicians=user),
-            status='open'
-        ).distinct().count()
-        
-        # My closed tickets (claimed by me or I'm additional technician)
-        closed_tickets = Ticket.objects.filter(
-            Q(claimed_by=user) | Q(additional_technicians=user),
-            status='closed'
-        ).distinct().count()
-        
-        # My in progress tickets (claimed by me or I'm additional technician)
-        in_progress_tickets = Ticket.objects.filter(
-            Q(claimed_by=user) | Q(additional_technicians=user),
-            status='in_progress'
-        ).distinct().count()
-        
-        # My reopened tickets (tickets that were closed and reopened)
-        reopened_tickets = Ticket.objects.filter(
-            Q(claimed_by=user) | Q(additional_technicians=user),
-            events__event_type='reopened'
-        ).distinct().count()
+        counters = read_counters(TECHNICIANS, technician_scope(user.id))
         
         # New tickets since last logout (tickets created while user was away)
         new_tickets_since_login = 0
@@ -237,7 +211,7 @@ def dashboard_stats(request):
             # This shows tickets created while the user was away
             new_tickets_since_login = Ticket.objects.filter(
                 created_at__gt=user.last_logout,
-                created_at__lt=current_time
+                created_at__lt=timezone.now()
             ).count()
             
         elif user.last_login:
@@ -247,32 +221,26 @@ def dashboard_stats(request):
             ).count()
         
         return Response({
-            'unassigned_tickets': unassigned_tickets,
-            'total_open_tickets': total_open_tickets,
-            'my_open_tickets': my_open_tickets,
-            'in_progress_tickets': in_progress_tickets,
-            'closed_tickets': closed_tickets,
-            'reopened_tickets': reopened_tickets,
+            'unassigned_tickets': counters.get('unassigned_tickets', 0),
+            'total_open_tickets': counters.get('total_open_tickets', 0),
+            'my_open_tickets': counters.get('my_open_tickets', 0),
+            'in_progress_tickets': counters.get('in_progress_tickets', 0),
+            'closed_tickets': counters.get('closed_tickets', 0),
+            'reopened_tickets': counters.get('reopened_tickets', 0),
             'new_tickets_since_login': new_tickets_since_login,
             'role': 'technician'
         })
     
     elif user.role == 'employee':
-        # Employee-specific stats
-        my_tickets = Ticket.objects.filter(requester=user).count()
-        my_open_tickets = Ticket.objects.filter(requester=user, status='open').count()
-        my_in_progress_tickets = Ticket.objects.filter(requester=user, status='in_progress').count()
-        my_closed_tickets = Ticket.objects.filter(requester=user, status='closed').count()
-        my_reopened_tickets = Ticket.objects.filter(requester=user, status='reopened').count()
-        unassigned_tickets = Ticket.objects.filter(status='open', assigned_to__isnull=True).count()
+        counters = read_counters(EMPLOYEES, requester_scope(user.id))
         
         return Response({
-            'total_tickets': my_tickets,
-            'opened_tickets': my_open_tickets,
-            'in_progress_tickets': my_in_progress_tickets,
-            'closed_tickets': my_closed_tickets,
-            'reopened_tickets': my_reopened_tickets,
-            'unassigned_tickets': unassigned_tickets,
+            'total_tickets': counters.get('total_tickets', 0),
+            'opened_tickets': counters.get('opened_tickets', 0),
+            'in_progress_tickets': counters.get('in_progress_tickets', 0),
+            'closed_tickets': counters.get('closed_tickets', 0),
+            'reopened_tickets': counters.get('reopened_tickets', 0),
+            'unassigned_tickets': counters.get('unassigned_tickets', 0),
             'role': 'employee'
         })
     
@@ -388,6 +356,9 @@ def token_refresh(request):
             return Response({'error': 'Refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         refresh = RefreshToken(refresh_token)
+        from .revocation import revocations
+        if revocations.is_revoked(refresh):
+            return Response({'error': 'Invalid refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
         access_token = str(refresh.access_token)
         
         return Response({
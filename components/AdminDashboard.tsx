@@ -5,6 +5,7 @@ import { api } from '@/lib/api'
 import { useAuth } from '@/contexts/AuthContext'
 import { useRouter } from 'next/navigation'
 import { useEffect } from 'react'
+import { useLiveUpdates } from '@/lib/liveUpdates'
 import {
     Users,
     Ticket,
@@ -67,9 +68,12 @@ export default function AdminDashboard() {
             const response = await api.get('/api/auth/admin/dashboard-stats/')
             return response.data
         },
-        enabled: user?.role === 'admin'
+        enabled: user?.role === 'admin',
+        staleTime: Infinity, // Kept fresh by live updates pushed over the WebSocket
     })
 
+    useLiveUpdates(['admin-dashboard-stats'], user?.role === 'admin')
+
     // Fetch recent users
     const { data: recentUsers } = useQuery({
         queryKey: ['recent-users'],
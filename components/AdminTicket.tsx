@@ -73,6 +73,8 @@ interface Ticket {
         file_size: number
         created_at: string
         storage_url?: string
+        thumbnail_url?: string | null
+        preview_url?: string | null
         mime_type?: string
     }>
     messages: Array<{
@@ -279,7 +281,7 @@ export default function AdminTicket({ ticketId }: AdminTicketProps) {
                             <h2 className="text-lg font-medium text-gray-900 mb-4">Pièces Jointes</h2>
                             <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
                                 {ticket.attachments.map((attachment) => {
-                                    const isImage = attachment.mime_type?.startsWith('image/')
+                                    const isImage = attachment.mime_type?.startsWith('image/') || !!attachment.thumbnail_url
                                     const fileSize = attachment.file_size ? (attachment.file_size / 1024 / 1024).toFixed(2) : '0'
 
                                     return (
@@ -287,7 +289,7 @@ export default function AdminTicket({ ticketId }: AdminTicketProps) {
                                             {isImage && attachment.storage_url && (
                                                 <div className="aspect-video bg-gray-100 flex items-center justify-center">
                                                     <img
-                                                        src={attachment.storage_url}
+                                                        src={attachment.thumbnail_url || attachment.storage_url}
                                                         alt={attachment.file_name}
                                                         className="max-w-full max-h-full object-contain"
                                                         onError={(e) => {
@@ -7,6 +7,7 @@ import { useRouter } from 'next/navigation'
 import { Ticket, Plus, Clock, CheckCircle, Bell, UserCheck, RotateCcw, FileText } from 'lucide-react'
 import Link from 'next/link'
 import { useNotifications } from '@/contexts/NotificationContext'
+import { useLiveUpdates } from '@/lib/liveUpdates'
 
 interface DashboardStats {
     opened_tickets: number
@@ -44,9 +45,12 @@ export default function EmployeeDashboard() {
         queryFn: async () => {
             const response = await api.get('/api/auth/dashboard/')
             return response.data
-        }
+        },
+        staleTime: Infinity, // Kept fresh by live updates pushed over the WebSocket
     })
 
+    useLiveUpdates(['dashboard-stats'])
+
     const { data: recentActivity, isLoading: activityLoading } = useQuery<RecentActivity[]>({
         queryKey: ['recent-activity'],
         queryFn: async () => {
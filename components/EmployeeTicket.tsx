@@ -66,6 +66,8 @@ interface Ticket {
         mime_type: string
         size_bytes: number
         storage_url: string
+        thumbnail_url: string | null
+        preview_url: string | null
     }>
     messages: Array<{
         id: string
@@ -298,13 +300,13 @@ export default function EmployeeTicket({ ticketId }: EmployeeTicketProps) {
                             </div>
                             <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
                                 {ticket.attachments.map((attachment) => {
-                                    const isImage = attachment.mime_type.startsWith('image/')
+                                    const isImage = attachment.mime_type.startsWith('image/') || !!attachment.thumbnail_url
                                     return (
                                         <div key={attachment.id} className="bg-gray-50 rounded-xl border border-gray-200 overflow-hidden hover:shadow-md transition-shadow">
                                             {isImage && (
                                                 <div className="aspect-video bg-gray-100 flex items-center justify-center">
                                                     <img
-                                                        src={attachment.storage_url}
+                                                        src={attachment.thumbnail_url || attachment.storage_url}
                                                         alt={attachment.file_name}
                                                         className="max-w-full max-h-full object-contain"
                                                         onError={(e) => {
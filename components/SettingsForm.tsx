@@ -79,7 +79,12 @@ export default function SettingsForm() {
             const response = await api.post('/api/auth/change-password/', data)
             return response.data
         },
-        onSuccess: () => {
+        onSuccess: (data) => {
+            // The change revokes the tokens in use: keep the new pair, as login does
+            if (data?.access && data?.refresh) {
+                localStorage.setItem('access_token', data.access)
+                localStorage.setItem('refresh_token', data.refresh)
+            }
             setPasswordData({
                 current_password: '',
                 new_password: '',
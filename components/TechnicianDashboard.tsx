@@ -7,6 +7,7 @@ import { Ticket, Plus, Clock, CheckCircle, AlertTriangle, RotateCcw, UserCheck,
 import Link from 'next/link'
 import { format } from 'date-fns'
 import { useAuth } from '@/contexts/AuthContext'
+import { useLiveUpdates } from '@/lib/liveUpdates'
 
 interface DashboardStats {
     unassigned_tickets: number
@@ -45,10 +46,12 @@ export default function TechnicianDashboard() {
             const response = await api.get('/api/auth/dashboard/')
             return response.data
         },
-        staleTime: 0, // Always consider data stale to ensure fresh data
+        staleTime: Infinity, // Kept fresh by live updates pushed over the WebSocket
         refetchOnMount: true, // Refetch when component mounts
     })
 
+    useLiveUpdates(['dashboard-stats'])
+
     const { data: recentActivity, isLoading: activityLoading } = useQuery<RecentActivity[]>({
         queryKey: ['recent-activity'],
         queryFn: async () => {
@@ -69,6 +69,8 @@ interface Ticket {
         mime_type: string
         size_bytes: number
         storage_url: string
+        thumbnail_url: string | null
+        preview_url: string | null
     }>
     messages: Array<{
         id: string
@@ -899,12 +901,13 @@ export default function TechnicianTicket({ ticketId }: TechnicianTicketProps) {
                                 {ticket.attachments.map((attachment) => {
                                     const isImage = attachment.mime_type.startsWith('image/')
                                     const isVideo = attachment.mime_type.startsWith('video/')
+                                    const hasPagePreview = !isImage && !isVideo && attachment.thumbnail_url
                                     return (
                                         <div key={attachment.id} className="bg-gray-50 rounded-xl border border-gray-200 overflow-hidden hover:shadow-md transition-all duration-200">
-                                            {isImage && (
+                                            {(isImage || hasPagePreview) && (
                                                 <div className="aspect-video bg-gray-100 flex items-center justify-center">
                                                     <img
-                                                        src={attachment.storage_url}
+                                                        src={attachment.thumbnail_url || attachment.storage_url}
                                                         alt={attachment.file_name}
                                                         className="max-w-full max-h-full object-contain"
                                                         onError={(e) => {
@@ -917,9 +920,10 @@ export default function TechnicianTicket({ ticketId }: TechnicianTicketProps) {
                                                 <div className="aspect-video bg-gray-100 flex items-center justify-center">
                                                     <video
                                                         src={attachment.storage_url}
+                                                        poster={attachment.preview_url || undefined}
                                                         controls
                                                         className="max-w-full max-h-full"
-                                                        preload="metadata"
+                                                        preload={attachment.preview_url ? 'none' : 'metadata'}
                                                     >
                                                         Votre navigateur ne supporte pas la lecture de vidéos.
                                                     </video>
@@ -90,8 +90,8 @@ export function AuthProvider({ children }: { children: ReactNode }) {
 
     const logout = async () => {
         try {
-            // Call backend logout endpoint to update last_logout timestamp
-            await api.post('/api/auth/logout/')
+            // Call backend logout endpoint to update last_logout and revoke both tokens
+            await api.post('/api/auth/logout/', { refresh: localStorage.getItem('refresh_token') })
         } catch (error) {
             // Even if logout fails, we still want to clear local state
             console.error('Logout API call failed:', error)
@@ -0,0 +1,93 @@
+'use client'
+
+import { useEffect } from 'react'
+import { QueryKey, useQueryClient } from '@tanstack/react-query'
+
+// Live dashboard updates pushed by the backend on ws/dashboard/.
+// The dashboard is loaded once over HTTP; each ticket lifecycle event then
+// carries counter deltas with the same shape as the dashboard payload.
+
+type Deltas = { [key: string]: number | Deltas }
+
+export interface TicketUpdateMessage {
+    type: 'ticket_update'
+    event: 'created' | 'claimed' | 'technician_added' | 'closed' | 'reopened' | 'updated'
+    ticket: {
+        id: string
+        short_id: string
+        subject: string
+        status: string
+        priority: string
+        type: string
+    }
+    actor_id: string | null
+    deltas: Deltas
+}
+
+export const getWebSocketUrl = (path: string) => {
+    const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+    const token = localStorage.getItem('access_token')
+    return `${apiUrl.replace(/^http/, 'ws')}${path}?token=${encodeURIComponent(token || '')}`
+}
+
+export const applyDeltas = <T,>(data: T, deltas: Deltas): T => {
+    if (!data) return data
+    const result: any = { ...data }
+    Object.entries(deltas).forEach(([key, value]) => {
+        if (typeof value === 'number') {
+            result[key] = (result[key] || 0) + value
+        } else {
+            result[key] = applyDeltas(result[key] || {}, value)
+        }
+    })
+    return result
+}
+
+export function useLiveUpdates(statsQueryKey: QueryKey, enabled = true) {
+    const queryClient = useQueryClient()
+
+    useEffect(() => {
+        if (!enabled) return
+
+        let socket: WebSocket | null = null
+        let retryTimer: ReturnType<typeof setTimeout> | null = null
+        let retryDelay = 1000
+        let closed = false
+
+        const connect = () => {
+            socket = new WebSocket(getWebSocketUrl('/ws/dashboard/'))
+
+            socket.onopen = () => {
+                retryDelay = 1000
+                // Anything that happened while disconnected is not replayed: resync once
+                queryClient.invalidateQueries({ queryKey: statsQueryKey })
+            }
+
+            socket.onmessage = (event) => {
+                const message: TicketUpdateMessage = JSON.parse(event.data)
+                if (message.type !== 'ticket_update') return
+
+                if (Object.keys(message.deltas).length > 0) {
+                    queryClient.setQueryData(statsQueryKey, (old: any) => applyDeltas(old, message.deltas))
+                }
+                queryClient.invalidateQueries({ queryKey: ['recent-activity'] })
+                queryClient.invalidateQueries({ queryKey: ['tickets'] })
+            }
+
+            socket.onclose = () => {
+                // 4401: token missing or expired, the API interceptor will refresh it
+                if (closed) return
+                retryTimer = setTimeout(connect, retryDelay)
+                retryDelay = Math.min(retryDelay * 2, 30000)
+            }
+        }
+
+        connect()
+
+        return () => {
+            closed = true
+            if (retryTimer) clearTimeout(retryTimer)
+            socket?.close()
+        }
+    }, [enabled, queryClient, JSON.stringify(statsQueryKey)])
+}